@@ -5,7 +5,8 @@ from sqlalchemy import pool
 
 from alembic import context
 
-from app.database import Base
+from app.database import Base, SYNC_DATABASE_URL
+import app.models  # noqa: F401  (registers the tables on Base.metadata)
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -16,6 +17,9 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Migrate whatever database the app is configured for (DATABASE_URL), via its sync driver
+config.set_main_option("sqlalchemy.url", SYNC_DATABASE_URL)
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
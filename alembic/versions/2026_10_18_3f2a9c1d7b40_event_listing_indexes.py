@@ -0,0 +1,79 @@
+"""event listing indexes
+
+Also the base revision: it creates the tables the app started out with
+(users, events, attendees) when they are missing, so ``alembic upgrade head``
+works on an empty database as well as on one the app's ``create_all`` built
+before migrations existed.
+
+Revision ID: 3f2a9c1d7b40
+Revises: 
+Create Date: 2026-10-18 09:12:44.381204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7b40'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The baseline schema, as it was before the first migration
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('password', sa.String(), nullable=False),
+        sa.Column('role', sa.String(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index('ix_users_id', 'users', ['id'], if_not_exists=True)
+    op.create_index('ix_users_username', 'users', ['username'], unique=True, if_not_exists=True)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True, if_not_exists=True)
+    op.create_table(
+        'events',
+        sa.Column('event_id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('location', sa.String(), nullable=False),
+        sa.Column('max_attendees', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('organizer_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index('ix_events_event_id', 'events', ['event_id'], if_not_exists=True)
+    op.create_table(
+        'attendees',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('first_name', sa.String(), nullable=False),
+        sa.Column('last_name', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False, unique=True),
+        sa.Column('password', sa.String(), nullable=False),
+        sa.Column('phone_number', sa.String(), nullable=True),
+        sa.Column('event_id', sa.Integer(), sa.ForeignKey('events.event_id'), nullable=True),
+        sa.Column('check_in_status', sa.Boolean(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index('ix_attendees_id', 'attendees', ['id'], if_not_exists=True)
+
+    # Keyset pagination walks (start_time, event_id); the status/location
+    # variants let the filtered listings range-scan in the same order.
+    op.create_index('ix_events_start_time_event_id', 'events', ['start_time', 'event_id'], if_not_exists=True)
+    op.create_index('ix_events_status_start_time', 'events', ['status', 'start_time', 'event_id'], if_not_exists=True)
+    op.create_index('ix_events_location_start_time', 'events', ['location', 'start_time', 'event_id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_location_start_time', table_name='events')
+    op.drop_index('ix_events_status_start_time', table_name='events')
+    op.drop_index('ix_events_start_time_event_id', table_name='events')
+    # The baseline tables stay: they may hold data from before the first migration
@@ -0,0 +1,55 @@
+"""events full text search
+
+Revision ID: 5e93b8a1d0c6
+Revises: c47d0e9a2f13
+Create Date: 2026-10-18 15:41:52.118640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e93b8a1d0c6'
+down_revision: Union[str, None] = 'c47d0e9a2f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.models.EVENTS_FTS_DDL as of this revision
+EVENTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+    "name, description, location, content='events', content_rowid='event_id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts(rowid, name, description, location) "
+    "VALUES (new.event_id, new.name, new.description, new.location); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, name, description, location) "
+    "VALUES ('delete', old.event_id, old.name, old.description, old.location); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF name, description, location ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, name, description, location) "
+    "VALUES ('delete', old.event_id, old.name, old.description, old.location); "
+    "INSERT INTO events_fts(rowid, name, description, location) "
+    "VALUES (new.event_id, new.name, new.description, new.location); END",
+)
+
+
+def upgrade() -> None:
+    # Other databases fall back to LIKE matching (crud.EVENT_SEARCH_BACKEND)
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in EVENTS_FTS_DDL:
+        op.execute(statement)
+    # Index the rows that already exist
+    op.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER IF EXISTS events_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS events_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS events_fts_insert")
+    op.execute("DROP TABLE IF EXISTS events_fts")
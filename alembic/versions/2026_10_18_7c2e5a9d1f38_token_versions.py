@@ -0,0 +1,32 @@
+"""token versions
+
+Revision ID: 7c2e5a9d1f38
+Revises: f41b9d6c2e70
+Create Date: 2026-10-18 22:41:09.517302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e5a9d1f38'
+down_revision: Union[str, None] = 'f41b9d6c2e70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table('token_versions'):
+        op.create_table(
+            'token_versions',
+            sa.Column('role', sa.String(), primary_key=True),
+            sa.Column('principal_id', sa.Integer(), primary_key=True),
+            sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('token_versions')
@@ -0,0 +1,37 @@
+"""event registered count
+
+Revision ID: 8b1e4d27c6a5
+Revises: 3f2a9c1d7b40
+Create Date: 2026-10-18 11:03:17.552918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1e4d27c6a5'
+down_revision: Union[str, None] = '3f2a9c1d7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('events')}
+    if 'registered_count' not in columns:
+        op.add_column(
+            'events', sa.Column('registered_count', sa.Integer(), server_default='0', nullable=False)
+        )
+
+    # Backfill from the attendees currently pointing at each event
+    op.execute(
+        "UPDATE events SET registered_count = "
+        "(SELECT COUNT(*) FROM attendees WHERE attendees.event_id = events.event_id)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_column('registered_count')
@@ -0,0 +1,54 @@
+"""bulk check-in jobs
+
+Revision ID: 9d4f6b2a8e15
+Revises: 7c2e5a9d1f38
+Create Date: 2026-10-18 23:18:52.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f6b2a8e15'
+down_revision: Union[str, None] = '7c2e5a9d1f38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('bulk_check_in_jobs'):
+        op.create_table(
+            'bulk_check_in_jobs',
+            sa.Column('id', sa.String(), primary_key=True),
+            sa.Column('event_id', sa.Integer(), sa.ForeignKey('events.event_id'), nullable=False),
+            sa.Column('organizer_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('status', sa.String(), nullable=True),
+            sa.Column('claimed_by', sa.String(), nullable=True),
+            sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+            sa.Column('source_path', sa.String(), nullable=False),
+            sa.Column('rows_processed', sa.Integer(), nullable=False),
+            sa.Column('rows_found', sa.Integer(), nullable=False),
+            sa.Column('rows_not_found', sa.Integer(), nullable=False),
+            sa.Column('error', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+    else:
+        # Built by create_all before jobs were claimed: add the lease columns
+        existing = {column['name'] for column in inspector.get_columns('bulk_check_in_jobs')}
+        with op.batch_alter_table('bulk_check_in_jobs') as batch_op:
+            if 'claimed_by' not in existing:
+                batch_op.add_column(sa.Column('claimed_by', sa.String(), nullable=True))
+            if 'heartbeat_at' not in existing:
+                batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_bulk_check_in_jobs_id', 'bulk_check_in_jobs', ['id'], if_not_exists=True)
+    op.create_index('ix_bulk_check_in_jobs_event_id', 'bulk_check_in_jobs', ['event_id'], if_not_exists=True)
+    op.create_index('ix_bulk_check_in_jobs_status', 'bulk_check_in_jobs', ['status'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_table('bulk_check_in_jobs')
@@ -0,0 +1,59 @@
+"""events time window index
+
+Revision ID: a6f1c3e85b27
+Revises: 5e93b8a1d0c6
+Create Date: 2026-10-18 17:08:29.640173
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f1c3e85b27'
+down_revision: Union[str, None] = '5e93b8a1d0c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.models.EVENTS_WINDOW_DDL as of this revision
+EVENTS_WINDOW_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_window USING rtree(id, starts, ends)",
+    "CREATE TRIGGER IF NOT EXISTS events_window_insert AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_window(id, starts, ends) "
+    "VALUES (new.event_id, strftime('%s', new.start_time), strftime('%s', new.end_time)); END",
+    "CREATE TRIGGER IF NOT EXISTS events_window_delete AFTER DELETE ON events BEGIN "
+    "DELETE FROM events_window WHERE id = old.event_id; END",
+    "CREATE TRIGGER IF NOT EXISTS events_window_update AFTER UPDATE OF start_time, end_time ON events BEGIN "
+    "UPDATE events_window SET starts = strftime('%s', new.start_time), ends = strftime('%s', new.end_time) "
+    "WHERE id = new.event_id; END",
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        op.create_index(
+            'ix_events_end_time_start_time', 'events', ['end_time', 'start_time'], if_not_exists=True
+        )
+        return
+
+    backfill = not sa.inspect(bind).has_table('events_window')
+    for statement in EVENTS_WINDOW_DDL:
+        op.execute(statement)
+    if backfill:
+        op.execute(
+            "INSERT INTO events_window(id, starts, ends) "
+            "SELECT event_id, strftime('%s', start_time), strftime('%s', end_time) FROM events"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_index('ix_events_end_time_start_time', table_name='events')
+        return
+    op.execute("DROP TRIGGER IF EXISTS events_window_update")
+    op.execute("DROP TRIGGER IF EXISTS events_window_delete")
+    op.execute("DROP TRIGGER IF EXISTS events_window_insert")
+    op.execute("DROP TABLE IF EXISTS events_window")
@@ -0,0 +1,42 @@
+"""event waitlist buckets
+
+Revision ID: b5a7d3e91c42
+Revises: 9d4f6b2a8e15
+Create Date: 2026-10-18 23:47:15.280936
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5a7d3e91c42'
+down_revision: Union[str, None] = '9d4f6b2a8e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.models.WAITLIST_BUCKET_SIZE as of this revision
+WAITLIST_BUCKET_SIZE = 512
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('event_waitlist_buckets'):
+        return
+    op.create_table(
+        'event_waitlist_buckets',
+        sa.Column('event_id', sa.Integer(), sa.ForeignKey('events.event_id'), primary_key=True),
+        sa.Column('bucket', sa.Integer(), primary_key=True),
+        sa.Column('entries', sa.Integer(), nullable=False),
+    )
+    # Count the queues that already exist (integer division on both SQLite and PostgreSQL)
+    op.execute(
+        'INSERT INTO event_waitlist_buckets (event_id, bucket, entries) '
+        f'SELECT event_id, sequence / {WAITLIST_BUCKET_SIZE}, COUNT(*) FROM event_waitlist '
+        f'GROUP BY event_id, sequence / {WAITLIST_BUCKET_SIZE}'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('event_waitlist_buckets')
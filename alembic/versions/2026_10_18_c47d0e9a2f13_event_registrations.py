@@ -0,0 +1,82 @@
+"""event registrations
+
+Revision ID: c47d0e9a2f13
+Revises: 8b1e4d27c6a5
+Create Date: 2026-10-18 13:26:05.907431
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47d0e9a2f13'
+down_revision: Union[str, None] = '8b1e4d27c6a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10_000  # Attendee ids copied per INSERT ... SELECT
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not inspector.has_table('event_registrations'):
+        op.create_table(
+            'event_registrations',
+            sa.Column('event_id', sa.Integer(), sa.ForeignKey('events.event_id'), primary_key=True),
+            sa.Column('attendee_id', sa.Integer(), sa.ForeignKey('attendees.id'), primary_key=True),
+            sa.Column('check_in_status', sa.Boolean(), server_default=sa.false(), nullable=False),
+            sa.Column('registered_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        )
+    op.create_index(
+        'ix_event_registrations_event_check_in', 'event_registrations',
+        ['event_id', 'check_in_status', 'attendee_id'], if_not_exists=True,
+    )
+    op.create_index('ix_event_registrations_attendee', 'event_registrations', ['attendee_id'], if_not_exists=True)
+
+    if 'event_id' not in {column['name'] for column in inspector.get_columns('attendees')}:
+        return
+
+    # Copy each attendee's single registration across in id-range batches
+    max_id = bind.execute(sa.text("SELECT MAX(id) FROM attendees")).scalar() or 0
+    for low in range(0, max_id, BACKFILL_BATCH_SIZE):
+        bind.execute(
+            sa.text(
+                "INSERT INTO event_registrations (event_id, attendee_id, check_in_status) "
+                "SELECT event_id, id, COALESCE(check_in_status, :false) FROM attendees "
+                "WHERE event_id IS NOT NULL AND id > :low AND id <= :high"
+            ).bindparams(sa.bindparam('false', False, type_=sa.Boolean())),
+            {'low': low, 'high': low + BACKFILL_BATCH_SIZE},
+        )
+
+    with op.batch_alter_table('attendees') as batch_op:
+        batch_op.drop_column('check_in_status')
+        batch_op.drop_column('event_id')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('attendees') as batch_op:
+        batch_op.add_column(sa.Column('event_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('check_in_status', sa.Boolean(), nullable=True))
+        batch_op.create_foreign_key('fk_attendees_event_id_events', 'events', ['event_id'], ['event_id'])
+
+    # Attendees can only point at one event again; keep their most recent registration
+    op.execute(
+        "UPDATE attendees SET "
+        "event_id = (SELECT r.event_id FROM event_registrations r WHERE r.attendee_id = attendees.id "
+        "ORDER BY r.registered_at DESC, r.event_id DESC LIMIT 1), "
+        "check_in_status = COALESCE((SELECT r.check_in_status FROM event_registrations r "
+        "WHERE r.attendee_id = attendees.id ORDER BY r.registered_at DESC, r.event_id DESC LIMIT 1), false)"
+    )
+    op.execute(
+        "UPDATE events SET registered_count = "
+        "(SELECT COUNT(*) FROM attendees WHERE attendees.event_id = events.event_id)"
+    )
+
+    op.drop_index('ix_event_registrations_attendee', table_name='event_registrations')
+    op.drop_index('ix_event_registrations_event_check_in', table_name='event_registrations')
+    op.drop_table('event_registrations')
@@ -0,0 +1,35 @@
+"""idempotency keys
+
+Revision ID: d2b7e4f09a31
+Revises: a6f1c3e85b27
+Create Date: 2026-10-18 19:42:17.305816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b7e4f09a31'
+down_revision: Union[str, None] = 'a6f1c3e85b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table('idempotency_keys'):
+        op.create_table(
+            'idempotency_keys',
+            sa.Column('key', sa.String(), primary_key=True),
+            sa.Column('status_code', sa.Integer(), nullable=False),
+            sa.Column('body', sa.String(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+        )
+    op.create_index('ix_idempotency_keys_created_at', 'idempotency_keys', ['created_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_idempotency_keys_created_at', table_name='idempotency_keys', if_exists=True)
+    op.drop_table('idempotency_keys')
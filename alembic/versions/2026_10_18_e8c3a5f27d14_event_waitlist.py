@@ -0,0 +1,47 @@
+"""event waitlist
+
+Revision ID: e8c3a5f27d14
+Revises: d2b7e4f09a31
+Create Date: 2026-10-18 20:12:44.301857
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c3a5f27d14'
+down_revision: Union[str, None] = 'd2b7e4f09a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {column['name'] for column in inspector.get_columns('events')}
+    for name in ('waitlist_issued', 'waitlist_served'):
+        if name not in columns:
+            op.add_column('events', sa.Column(name, sa.Integer(), server_default='0', nullable=False))
+
+    if not inspector.has_table('event_waitlist'):
+        op.create_table(
+            'event_waitlist',
+            sa.Column('event_id', sa.Integer(), sa.ForeignKey('events.event_id'), primary_key=True),
+            sa.Column('attendee_id', sa.Integer(), sa.ForeignKey('attendees.id'), primary_key=True),
+            sa.Column('sequence', sa.Integer(), nullable=False),
+            sa.Column('joined_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        )
+    op.create_index(
+        'ix_event_waitlist_event_sequence', 'event_waitlist', ['event_id', 'sequence'],
+        unique=True, if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_event_waitlist_event_sequence', table_name='event_waitlist', if_exists=True)
+    op.drop_table('event_waitlist')
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_column('waitlist_served')
+        batch_op.drop_column('waitlist_issued')
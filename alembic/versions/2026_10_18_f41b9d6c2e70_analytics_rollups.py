@@ -0,0 +1,82 @@
+"""analytics rollups
+
+Revision ID: f41b9d6c2e70
+Revises: e8c3a5f27d14
+Create Date: 2026-10-18 21:36:05.118420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f41b9d6c2e70'
+down_revision: Union[str, None] = 'e8c3a5f27d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.rollups.rebuild_statements() as of this revision (no check-in has a date yet)
+BACKFILL = (
+    "INSERT INTO event_stats (event_id, organizer_id, registrations, check_ins) "
+    "SELECT events.event_id, events.organizer_id, COUNT(event_registrations.attendee_id), "
+    "COALESCE(SUM(CAST(event_registrations.check_in_status AS INTEGER)), 0) "
+    "FROM events LEFT OUTER JOIN event_registrations ON event_registrations.event_id = events.event_id "
+    "GROUP BY events.event_id, events.organizer_id",
+    "INSERT INTO organizer_stats (organizer_id, events, registrations, check_ins) "
+    "SELECT organizer_id, COUNT(*), SUM(registrations), SUM(check_ins) FROM event_stats GROUP BY organizer_id",
+    "INSERT INTO organizer_daily_stats (organizer_id, day, registrations, check_ins) "
+    "SELECT events.organizer_id, date(event_registrations.registered_at), COUNT(*), 0 "
+    "FROM event_registrations JOIN events ON events.event_id = event_registrations.event_id "
+    "GROUP BY events.organizer_id, date(event_registrations.registered_at)",
+)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {column['name'] for column in inspector.get_columns('event_registrations')}
+    if 'checked_in_at' not in columns:
+        op.add_column('event_registrations', sa.Column('checked_in_at', sa.DateTime(), nullable=True))
+
+    backfill = not inspector.has_table('event_stats')
+    if backfill:
+        op.create_table(
+            'event_stats',
+            sa.Column('event_id', sa.Integer(), sa.ForeignKey('events.event_id'), primary_key=True),
+            sa.Column('organizer_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('registrations', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('check_ins', sa.Integer(), server_default='0', nullable=False),
+        )
+    op.create_index(
+        'ix_event_stats_organizer_event', 'event_stats', ['organizer_id', 'event_id'], if_not_exists=True
+    )
+    if not inspector.has_table('organizer_stats'):
+        op.create_table(
+            'organizer_stats',
+            sa.Column('organizer_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+            sa.Column('events', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('registrations', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('check_ins', sa.Integer(), server_default='0', nullable=False),
+        )
+    if not inspector.has_table('organizer_daily_stats'):
+        op.create_table(
+            'organizer_daily_stats',
+            sa.Column('organizer_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+            sa.Column('day', sa.Date(), primary_key=True),
+            sa.Column('registrations', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('check_ins', sa.Integer(), server_default='0', nullable=False),
+        )
+
+    if backfill:
+        for statement in BACKFILL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    op.drop_table('organizer_daily_stats')
+    op.drop_table('organizer_stats')
+    op.drop_index('ix_event_stats_organizer_event', table_name='event_stats', if_exists=True)
+    op.drop_table('event_stats')
+    with op.batch_alter_table('event_registrations') as batch_op:
+        batch_op.drop_column('checked_in_at')
@@ -0,0 +1,214 @@
+import fnmatch
+import json
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """A thread-safe LRU mapping whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MemoryBackend:
+    """In-process cache backend: values are kept as-is in a TTLCache.
+
+    Version counters are bounded as well (least recently bumped dropped first).
+    They take their values from one increasing sequence, and dropping one moves
+    every key without a counter on to a fresh version, so no key ever returns to
+    a version an entry may still be cached under.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, max_counters: int = None):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._counters = OrderedDict()
+        self.max_counters = max_counters or maxsize
+        self._sequence = 0
+        self._floor = 0  # Version of every key without a counter
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl: float = None):
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def incr(self, key) -> int:
+        with self._lock:
+            self._sequence += 1
+            self._counters[key] = self._sequence
+            self._counters.move_to_end(key)
+            if len(self._counters) > self.max_counters:
+                self._counters.popitem(last=False)
+                self._sequence += 1
+                self._floor = self._sequence
+            return self._counters[key]
+
+    def counter(self, key) -> int:
+        return self._counters.get(key, self._floor)
+
+    def clear(self):
+        self._cache.clear()
+        with self._lock:
+            self._counters.clear()
+            self._sequence = self._floor = 0
+
+
+class RedisBackend:
+    """Cache backend over a redis-py style client; values are stored as JSON.
+
+    Counters live in the same server, so every worker process sees the same
+    invalidations.
+    """
+
+    def __init__(self, client, prefix: str = "event-api:", ttl: float = 60.0):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl: float = None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl if ttl is None else ttl)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key) -> int:
+        return int(self.client.incr(self.prefix + key))
+
+    def counter(self, key) -> int:
+        raw = self.client.get(self.prefix + key)
+        return 0 if raw is None else int(raw)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class LocalRedis:
+    """A tiny in-process stand-in for the parts of a redis-py client RedisBackend uses.
+
+    Handy for running the Redis code path (JSON round-trips included) in
+    development and tests without a server.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._values = TTLCache(maxsize=maxsize)
+        self._counters = {}
+        self._counter_expiry = {}
+        self._lock = threading.Lock()
+
+    def _drop_expired_counters(self, *keys):
+        """Forget lapsed counters among ``keys`` (all of them once there are more than ``maxsize``)."""
+        now = time.monotonic()
+        if len(self._counter_expiry) > self.maxsize:
+            keys = list(self._counter_expiry)
+        for key in keys:
+            if self._counter_expiry.get(key, now + 1) <= now:
+                del self._counter_expiry[key]
+                self._counters.pop(key, None)
+
+    def get(self, key):
+        with self._lock:
+            self._drop_expired_counters(key)
+            if key in self._counters:
+                return str(self._counters[key]).encode()
+        value = self._values.get(key)
+        return None if value is None else value.encode()
+
+    def set(self, key, value, ex: int = None):
+        self._values.set(key, value, ttl=ex)
+
+    def delete(self, *keys):
+        for key in keys:
+            self._values.delete(key)
+            with self._lock:
+                self._counters.pop(key, None)
+                self._counter_expiry.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._drop_expired_counters(key)
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def expire(self, key, seconds: int) -> bool:
+        with self._lock:
+            if key in self._counters:
+                self._counter_expiry[key] = time.monotonic() + seconds
+                return True
+        value = self._values.get(key)
+        if value is None:
+            return False
+        self._values.set(key, value, ttl=seconds)
+        return True
+
+    def scan_iter(self, match: str = "*"):
+        with self._lock:
+            counters = list(self._counters)
+        return [key for key in self._values.keys() + counters if fnmatch.fnmatchcase(key, match)]
+
+
+def build_backend(name: str, url: str = None, maxsize: int = 1024, ttl: float = 60.0):
+    """Create a cache backend: ``memory`` (default), ``redis`` (needs the redis package) or ``local-redis``."""
+    if name == "memory":
+        return MemoryBackend(maxsize=maxsize, ttl=ttl)
+    if name == "local-redis":
+        return RedisBackend(LocalRedis(maxsize=maxsize), ttl=ttl)
+    if name == "redis":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("The redis cache backend needs the 'redis' package installed") from exc
+        return RedisBackend(redis.Redis.from_url(url or "redis://localhost:6379/0"), ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {name}")
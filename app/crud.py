@@ -1,145 +1,902 @@
-import csv
-from io import StringIO
-from sqlalchemy.orm import Session
-from app.models import Event, Attendee
-from app.schemas import EventCreate, EventUpdate, AttendeeCreate
-from datetime import datetime
+import base64
+import hashlib
+import json
+import os
+import re
+from sqlalchemy import (
+    Integer, bindparam, column, delete, func, insert, literal_column, or_, select, table, tuple_, update
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter, ValidationError
+from app import live, rollups
+from app.cache import TTLCache, build_backend
+from app.database import run_write
+from app.models import WAITLIST_BUCKET_SIZE, Event, Attendee, EventRegistration, WaitlistBucket, WaitlistEntry
+from app.rendering import dumps
+from app.schemas import EventBatchUpdate, EventCreate, EventResponse, EventUpdate, AttendeeCreate, AttendeeResponse
+from app.streaming import CSVRowSplitter
+from datetime import datetime, timezone
 from fastapi import HTTPException
 
+# Event Cache (Read-Through; create_event / update_event Invalidate It)
+# Keys embed a version counter that writers bump, so a reader racing a write can
+# only store its result under the outdated version, where nobody looks it up again
+EVENT_CACHE_TTL = float(os.getenv("EVENT_CACHE_TTL", "30"))
+event_cache = build_backend(
+    os.getenv("EVENT_CACHE_BACKEND", "memory"),  # memory, local-redis or redis
+    url=os.getenv("EVENT_CACHE_URL"),
+    maxsize=int(os.getenv("EVENT_CACHE_SIZE", "4096")),
+    ttl=EVENT_CACHE_TTL,
+)
+EVENT_PAGES_VERSION_KEY = "events:pages:version"
+
+
+def etag_for(body: bytes) -> str:
+    return '"{}"'.format(hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def _event_version_key(event_id: int) -> str:
+    return f"events:{event_id}:version"
+
+
+def invalidate_events(*event_ids: int):
+    """Drop the cached copies of the given events and every cached listing page."""
+    for event_id in event_ids:
+        event_cache.incr(_event_version_key(event_id))
+    event_cache.incr(EVENT_PAGES_VERSION_KEY)
+
 # 1️. Create Event
-def create_event(db: Session, event_data: EventCreate, organizer_id: int):
-    new_event = Event(**event_data.dict(), status="scheduled", organizer_id=organizer_id)
-    db.add(new_event)
-    db.commit()
-    db.refresh(new_event)
+async def create_event(db: AsyncSession, event_data: EventCreate, organizer_id: int):
+    async def insert_event(session):
+        new_event = Event(**event_data.dict(), status="scheduled", organizer_id=organizer_id)
+        session.add(new_event)
+        await session.flush()
+        await rollups.record_events(session, organizer_id, [new_event.event_id])
+        await session.refresh(new_event)
+        return new_event
+
+    new_event = await run_write(db, insert_event)
+    invalidate_events()
     return new_event
 
-# 2️. Get Events (with Filters)
-def get_events(db: Session, status=None, location=None, date=None):
-    query = db.query(Event)
+# 2️. Get Events (with Filters, Keyset-Paginated)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Only the columns EventResponse needs, so listings skip building ORM instances
+EVENT_RESPONSE_COLUMNS = (
+    Event.event_id, Event.name, Event.description, Event.start_time, Event.end_time,
+    Event.location, Event.max_attendees, Event.status,
+)
+EVENT_RESPONSE_FIELDS = tuple(EventResponse.model_fields)
+
+
+def event_body(row) -> dict:
+    """An EventResponse body straight from a row's columns, without re-validating them (see app.rendering)."""
+    return {field: row[field] for field in EVENT_RESPONSE_FIELDS}
+
+
+def _encode_cursor(values) -> str:
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        first, second = json.loads(raw)
+        return first, int(second)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_cursor(start_time: datetime, event_id: int) -> str:
+    return _encode_cursor([start_time.isoformat(), event_id])
+
+
+def decode_cursor(cursor: str):
+    start_time, event_id = _decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(start_time), event_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# Search: "auto" uses the FTS5 index on SQLite and LIKE matching elsewhere; "like" forces the fallback
+EVENT_SEARCH_BACKEND = os.getenv("EVENT_SEARCH_BACKEND", "auto")
+EVENT_SEARCH_WEIGHTS = (10.0, 1.0, 5.0)  # bm25 weights for name, description, location
+# Queries matching more events than this are listed in start time order instead of ranked: scoring
+# every match of a common word costs more than the ranking is worth. It also bounds ranked offsets.
+EVENT_SEARCH_RANK_LIMIT = int(os.getenv("EVENT_SEARCH_RANK_LIMIT", "2000"))
+# Which side of the limit a query falls on changes slowly, so popular searches skip the probe
+search_mode_cache = TTLCache(
+    maxsize=int(os.getenv("EVENT_SEARCH_MODE_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("EVENT_SEARCH_MODE_CACHE_TTL", "60")),
+)
+SEARCH_TERM = re.compile(r"\w+")
+events_fts = table("events_fts", column("rowid"))
+
+
+def search_terms(q: str):
+    terms = SEARCH_TERM.findall(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query must contain a letter or digit")
+    return terms
+
+
+def _uses_fts(db: AsyncSession) -> bool:
+    return EVENT_SEARCH_BACKEND == "auto" and db.bind.dialect.name == "sqlite"
+
+
+def search_scope(*params) -> str:
+    """Fingerprint of a search and its filters; search cursors are only valid for the same one."""
+    return hashlib.blake2b(json.dumps(params, default=str).encode(), digest_size=6).hexdigest()
+
+
+def encode_search_cursor(scope: str, mode: str, position) -> str:
+    return _encode_cursor([f"{mode}:{scope}", position])
+
+
+def decode_search_cursor(cursor: str, scope: str):
+    """``(mode, position)``: ``("rank", offset)`` or ``("time", listing cursor)``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        tag, position = json.loads(raw)
+        mode, _, cursor_scope = tag.partition(":")
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_scope == scope:
+        if mode == "rank" and isinstance(position, int) and 0 <= position <= EVENT_SEARCH_RANK_LIMIT:
+            return mode, position
+        if mode == "time" and isinstance(position, str):
+            return mode, position
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _fts_match(terms, prefix: bool = True) -> str:
+    return " ".join(f'"{term}"*' if prefix else f'"{term}"' for term in terms)  # Quoted terms, implicitly ANDed
+
+
+def _fts_rowids(match: str):
+    return select(events_fts.c.rowid).select_from(events_fts).where(literal_column("events_fts").op("MATCH")(match))
+
+
+async def _fts_matches_more_than(db: AsyncSession, match: str, count: int) -> bool:
+    probe = _fts_rowids(match).limit(count + 1).subquery()
+    return await db.scalar(select(func.count()).select_from(probe)) > count
+
+
+async def _search_mode(db: AsyncSession, terms) -> str:
+    """``"rank"`` when at most EVENT_SEARCH_RANK_LIMIT events match, else ``"time"``.
+
+    Whole words are counted first: their doclists are read lazily, so the
+    count stops early. Only when that does not settle it are the prefix
+    expansions counted, which FTS5 merges in full for terms longer than the
+    prefix index. Verdicts are kept in ``search_mode_cache``.
+    """
+    key = (tuple(terms), EVENT_SEARCH_RANK_LIMIT)
+    mode = search_mode_cache.get(key)
+    if mode is None:
+        broad = (
+            await _fts_matches_more_than(db, _fts_match(terms, prefix=False), EVENT_SEARCH_RANK_LIMIT)
+            or await _fts_matches_more_than(db, _fts_match(terms), EVENT_SEARCH_RANK_LIMIT)
+        )
+        mode = "time" if broad else "rank"
+        search_mode_cache.set(key, mode)
+    return mode
+
+
+# Time windows: "auto" narrows overlap filters with the events_window R*Tree on SQLite; "none" skips it
+EVENT_WINDOW_INDEX = os.getenv("EVENT_WINDOW_INDEX", "auto")
+EPOCH = datetime(1970, 1, 1)
+events_window = table("events_window", column("id"), column("starts"), column("ends"))
+
+
+def to_utc_naive(moment: datetime) -> datetime:
+    """Stored times are naive; compare aware query bounds in UTC."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def window_filter(db: AsyncSession, start: datetime = None, end: datetime = None):
+    """Conditions for events overlapping [start, end]; either bound may be omitted.
+
+    ``start == end`` selects the events under way at that instant.
+    """
+    conditions, candidates = [], select(events_window.c.id)
+    if end is not None:
+        conditions.append(Event.start_time <= end)
+        candidates = candidates.where(events_window.c.starts <= (end - EPOCH).total_seconds())
+    if start is not None:
+        conditions.append(Event.end_time > start)
+        candidates = candidates.where(events_window.c.ends > (start - EPOCH).total_seconds())
+    # Open-ended windows match too much of the table for the R*Tree to beat walking start_time order
+    if start is not None and end is not None and EVENT_WINDOW_INDEX == "auto" and db.bind.dialect.name == "sqlite":
+        conditions.append(Event.event_id.in_(candidates))
+    return conditions
+
+
+async def get_events(
+    db: AsyncSession, status=None, location=None, date=None, limit=DEFAULT_PAGE_SIZE, cursor=None, q=None,
+    start=None, end=None
+):
+    query = select(*EVENT_RESPONSE_COLUMNS)
     
     if status:
-        query = query.filter(Event.status == status)
+        query = query.where(Event.status == status)
     if location:
-        query = query.filter(Event.location == location)
+        query = query.where(Event.location == location)
     if date:
-        query = query.filter(Event.start_time >= datetime.strptime(date, "%Y-%m-%d"))
+        try:
+            query = query.where(Event.start_time >= datetime.strptime(date, "%Y-%m-%d"))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="date must look like YYYY-MM-DD")
+    if start is not None or end is not None:
+        query = query.where(*window_filter(db, start, end))
+
+    limit = min(limit, MAX_PAGE_SIZE)
+    scope = None
+    if q:
+        terms = search_terms(q)
+        if _uses_fts(db):
+            scope = search_scope(terms, status, location, date, start, end)
+            mode, position = decode_search_cursor(cursor, scope) if cursor else (await _search_mode(db, terms), None)
+            if mode == "rank":
+                return await _ranked_search(db, query, terms, limit, position or 0, scope)
+            # Too many matches to rank: the same matches, listed in start time order. This still reads
+            # every match (a join runs about twice as fast as IN here), but skips scoring them
+            matches = _fts_rowids(_fts_match(terms)).subquery()
+            query = query.join(matches, matches.c.rowid == Event.event_id)
+            cursor = position
+        else:
+            # Every term must match somewhere, like FTS but as substrings; this scans the table
+            query = query.where(*(
+                or_(Event.name.icontains(term, autoescape=True), Event.description.icontains(term, autoescape=True),
+                    Event.location.icontains(term, autoescape=True))
+                for term in terms
+            ))
+
+    if cursor:
+        query = query.where(tuple_(Event.start_time, Event.event_id) > tuple_(*decode_cursor(cursor)))
+
+    rows = (await db.execute(query.order_by(Event.start_time, Event.event_id).limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].start_time, rows[-1].event_id)
+        if scope is not None:
+            next_cursor = encode_search_cursor(scope, "time", next_cursor)
+
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+async def _ranked_search(db: AsyncSession, query, terms, limit, offset, scope):
+    """Best matches first, ranked inside FTS5 (ORDER BY rank LIMIT) and paged by offset.
 
-    return query.all()
+    Scores move as the catalog changes, so they would make a poor keyset; the
+    offset is bounded by EVENT_SEARCH_RANK_LIMIT and its cursor by the query.
+    """
+    fts = literal_column("events_fts")
+    weights = f"bm25({', '.join(map(str, EVENT_SEARCH_WEIGHTS))})"
+    ranked = (
+        select(events_fts.c.rowid, literal_column("rank").label("rank"))
+        .select_from(events_fts)
+        .where(fts.op("MATCH")(_fts_match(terms)), literal_column("rank").op("MATCH")(weights))
+        .order_by(literal_column("rank"))
+        .limit(EVENT_SEARCH_RANK_LIMIT)
+        .subquery()
+    )
+    query = (
+        query.join(ranked, ranked.c.rowid == Event.event_id)
+        .order_by(ranked.c.rank, Event.event_id).offset(offset).limit(limit + 1)
+    )
+    rows = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if offset + limit < EVENT_SEARCH_RANK_LIMIT:
+            next_cursor = encode_search_cursor(scope, "rank", offset + limit)
+
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+async def get_events_page(
+    db: AsyncSession, status=None, location=None, date=None, limit=DEFAULT_PAGE_SIZE, cursor=None, q=None,
+    start=None, end=None
+):
+    """Cached ``get_events``; returns ``{"body": <rendered EventPage JSON>, "etag": ...}``."""
+    version = event_cache.counter(EVENT_PAGES_VERSION_KEY)
+    key = f"events:pages:{version}:" + json.dumps(
+        [status, location, date, min(limit, MAX_PAGE_SIZE), cursor, q, start, end], default=datetime.isoformat
+    )
+    entry = event_cache.get(key)
+    if entry is None:
+        page = await get_events(
+            db, status=status, location=location, date=date, limit=limit, cursor=cursor, q=q, start=start, end=end
+        )
+        body = dumps({"items": [event_body(row._mapping) for row in page["items"]], "next_cursor": page["next_cursor"]})
+        entry = {"body": body.decode(), "etag": etag_for(body)}
+        event_cache.set(key, entry)
+    return entry
 
 # 3️. Get Event by ID
-def get_event_by_id(db: Session, event_id: int):
-    return db.query(Event).filter(Event.event_id == event_id).first()
+async def get_event_by_id(db: AsyncSession, event_id: int):
+    return await db.get(Event, event_id)
+
+
+async def get_event_snapshot(db: AsyncSession, event_id: int):
+    """Cached event lookup; returns ``{"body", "organizer_id", "etag"}`` or ``None``.
+
+    ``body`` is the rendered EventResponse JSON.
+    """
+    key = f"events:{event_id}:v{event_cache.counter(_event_version_key(event_id))}"
+    entry = event_cache.get(key)
+    if entry is None:
+        row = (await db.execute(
+            select(*EVENT_RESPONSE_COLUMNS, Event.organizer_id).where(Event.event_id == event_id)
+        )).mappings().first()
+        if row is None:
+            return None
+        body = dumps(event_body(row))
+        entry = {"body": body.decode(), "organizer_id": row["organizer_id"], "etag": etag_for(body)}
+        event_cache.set(key, entry)
+    return entry
 
 # 4️. Update Event
-def update_event(db: Session, db_event: Event, event_update: EventUpdate):
-    for key, value in event_update.dict(exclude_unset=True).items():
-        setattr(db_event, key, value)
-    
-    db.commit()
-    db.refresh(db_event)
-    return db_event
+async def update_event(db: AsyncSession, event_id: int, event_update: EventUpdate):
+    changes = event_update.dict(exclude_unset=True)
+    query = select(*EVENT_RESPONSE_COLUMNS).where(Event.event_id == event_id)
+    if changes:
+        query = (
+            update(Event).where(Event.event_id == event_id).values(**changes)
+            .returning(*EVENT_RESPONSE_COLUMNS).execution_options(synchronize_session=False)
+        )
 
-# 5️. Register Attendee
-def register_attendee(db: Session, event_id: int, current_user):
-    event = get_event_by_id(db, event_id)
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
+    async def apply(session):
+        updated = (await session.execute(query)).first()
+        promoted = 0
+        if updated is not None and "max_attendees" in changes:
+            promoted = await promote_waitlist(session, event_id)  # Seats a raised capacity frees go to the queue first
+        return updated, promoted
 
-    # Check if event is already full
-    if db.query(Attendee).filter(Attendee.event_id == event_id).count() >= event.max_attendees:
-        raise HTTPException(status_code=400, detail="Event is full")
+    updated, promoted = await run_write(db, apply)
+    invalidate_events(event_id)
+    live.counters.add(event_id, registered=promoted)
+    return updated
 
-    # Fetch the existing attendee
-    existing_attendee = db.query(Attendee).filter(
-        Attendee.email == current_user.email
-    ).first()
-    
-    if not existing_attendee:
+# 5️. Register Attendee (Write Operation: Run via database.run_write, Which Commits)
+async def register_attendee(db: AsyncSession, event_id: int, current_user):
+    """Register the current attendee for an event.
+
+    The seat is taken with a conditional increment of ``registered_count``, so
+    concurrent registrations can never oversell; errors raised afterwards roll
+    it back with the rest of the caller's transaction. When the event is full
+    the attendee joins its waitlist instead, and the result is
+    ``{"event_id", "status": "waitlisted", "position"}``.
+    """
+    attendee = (await db.execute(
+        select(Attendee.id, Attendee.first_name, Attendee.last_name, Attendee.email, Attendee.phone_number)
+        .where(Attendee.email == current_user.email)
+    )).mappings().first()
+    if attendee is None:
         raise HTTPException(status_code=404, detail="Attendee not found")
 
-    # Check if already registered for the event
-    if existing_attendee.event_id == event_id:
-        raise HTTPException(status_code=400, detail="You are already registered for this event")
+    organizer_id = await db.scalar(
+        update(Event)
+        .where(Event.event_id == event_id, Event.registered_count < Event.max_attendees)
+        .values(registered_count=Event.registered_count + 1)
+        .returning(Event.organizer_id)
+        .execution_options(synchronize_session=False)
+    )
+    if organizer_id is None:
+        if await get_event_by_id(db, event_id) is None:
+            raise HTTPException(status_code=404, detail="Event not found")
+        return await join_waitlist(db, event_id, attendee["id"])
 
-    # Associate the attendee with the event
-    existing_attendee.event_id = event_id
+    try:
+        await db.execute(insert(EventRegistration).values(event_id=event_id, attendee_id=attendee["id"]))
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="You are already registered for this event")
+    await rollups.record_registrations(db, event_id, 1, organizer_id)
 
-    db.commit()
-    db.refresh(existing_attendee)
+    return {**attendee, "event_id": event_id, "check_in_status": False}
 
-    return {
-        "id": existing_attendee.id,  # ✅ Added id field
-        "first_name": existing_attendee.first_name,
-        "last_name": existing_attendee.last_name,
-        "email": existing_attendee.email,
-        "event_id": existing_attendee.event_id,
-        "check_in_status": existing_attendee.check_in_status
-    }
-
-# 6️. Check-in Attendee
-def check_in_attendee(db: Session, event_id: int, current_user: Attendee):
+# 6️. Check-in Attendee (Write Operation: Run via database.run_write, Which Commits)
+async def check_in_attendee(db: AsyncSession, event_id: int, current_user: Attendee):
     print(f"Checking in for event_id: {event_id}, user email: {current_user.email}")
 
-    attendee = db.query(Attendee).filter(
-        Attendee.email == current_user.email, Attendee.event_id == event_id
-    ).first()
+    attendee_id = select(Attendee.id).where(Attendee.email == current_user.email).scalar_subquery()
+    checked_in = await db.execute(
+        update(EventRegistration)
+        .where(
+            EventRegistration.event_id == event_id,
+            EventRegistration.attendee_id == attendee_id,
+            EventRegistration.check_in_status.is_(False),
+        )
+        .values(check_in_status=True, checked_in_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    if checked_in.rowcount:
+        await rollups.record_check_ins(db, event_id, 1)
+        return {"message": "Check-in successful"}
 
-    if not attendee:
+    registered = await db.scalar(
+        select(EventRegistration.check_in_status)
+        .where(EventRegistration.event_id == event_id, EventRegistration.attendee_id == attendee_id)
+    )
+    if registered is None:
         raise HTTPException(status_code=404, detail="Attendee not found for this event")
+    raise HTTPException(status_code=400, detail="Already checked in")
 
-    if attendee.check_in_status:
-        raise HTTPException(status_code=400, detail="Already checked in")
+# 7️. Get Attendees (With Optional Check-in Filter)
+ATTENDEE_RESPONSE_FIELDS = tuple(AttendeeResponse.model_fields)
+ATTENDEE_STREAM_BATCH_SIZE = 1000
 
-    attendee.check_in_status = True
-    db.commit()
-    db.refresh(attendee)
-    return {"message": "Check-in successful"}
+# Where each AttendeeResponse field lives now that registrations are their own table
+ATTENDEE_RESPONSE_COLUMNS = {
+    "id": Attendee.id,
+    "event_id": EventRegistration.event_id,
+    "first_name": Attendee.first_name,
+    "last_name": Attendee.last_name,
+    "email": Attendee.email,
+    "phone_number": Attendee.phone_number,
+    "check_in_status": EventRegistration.check_in_status,
+}
 
-# 7️. Get Attendees (With Optional Check-in Filter)
-def get_attendees(db: Session, event_id: int, check_in_status=None):
-    query = db.query(Attendee).filter(Attendee.event_id == event_id)
-    
+
+def _attendees_query(event_id: int, check_in_status, fields):
+    # Walks ix_event_registrations_event_check_in (or the primary key) in attendee order
+    query = (
+        select(*(ATTENDEE_RESPONSE_COLUMNS[field].label(field) for field in fields))
+        .select_from(EventRegistration)
+        .join(Attendee, Attendee.id == EventRegistration.attendee_id)
+        .where(EventRegistration.event_id == event_id)
+    )
     if check_in_status is not None:
-        query = query.filter(Attendee.check_in_status == check_in_status)
+        query = query.where(EventRegistration.check_in_status == check_in_status)
+    return query.order_by(EventRegistration.attendee_id)
+
+
+async def get_attendees(db: AsyncSession, event_id: int, check_in_status=None):
+    return (await db.execute(_attendees_query(event_id, check_in_status, ATTENDEE_RESPONSE_FIELDS))).all()
+
 
-    return query.all()
+async def iter_attendee_batches(
+    db: AsyncSession, event_id: int, check_in_status=None, fields=ATTENDEE_RESPONSE_FIELDS
+):
+    """Yield lists of up to ATTENDEE_STREAM_BATCH_SIZE attendee row tuples from a server-side cursor."""
+    query = _attendees_query(event_id, check_in_status, fields).execution_options(
+        yield_per=ATTENDEE_STREAM_BATCH_SIZE
+    )
+    async for partition in (await db.stream(query)).partitions():
+        yield partition
+
+
+async def iter_attendee_rows(db: AsyncSession, event_id: int, check_in_status=None, fields=ATTENDEE_RESPONSE_FIELDS):
+    """Yield attendee rows as plain dicts, fetched in batches from a server-side cursor."""
+    async for partition in iter_attendee_batches(db, event_id, check_in_status, fields):
+        for row in partition:
+            yield dict(zip(fields, row))
 
 # 8️. Bulk Check-in Attendees (Only Organizers Can Bulk Check-in)
-def bulk_check_in_attendees(db: Session, event_id: int, organizer_id: int, csv_content: str):
+BULK_CHECK_IN_CHUNK_SIZE = 500  # Stays well below SQLite's bound-parameter limit
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def get_bulk_check_in_event(db: AsyncSession, event_id: int, organizer_id: int):
     # Verify if event exists
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await get_event_snapshot(db, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
     # Ensure only the organizer can upload CSV
-    if event.organizer_id != organizer_id:
+    if event["organizer_id"] != organizer_id:
         raise HTTPException(status_code=403, detail="Only the event organizer can upload check-in CSV")
 
-    csv_reader = csv.DictReader(StringIO(csv_content))
+    return event
+
+
+async def check_in_batch(db: AsyncSession, event_id: int, rows, commit: bool = True):
+    """Check in one batch of CSV rows; returns that batch's report.
+
+    Pass ``commit=False`` to fold the batch into a larger transaction; the
+    caller then owns reporting the check-ins to ``live.counters``.
+    """
+    if not commit:
+        return await _check_in_rows(db, event_id, rows)
+    report = await run_write(db, lambda session: _check_in_rows(session, event_id, rows))
+    live.counters.add(event_id, checked_in=len(report["checked_in"]))
+    return report
+
+
+async def _check_in_rows(db: AsyncSession, event_id: int, rows):
+    emails = [row.get("email") for row in rows]
+    emails = [email for email in emails if email]
+
+    # Resolve every email with a handful of chunked IN (...) queries
+    attendees = {}
+    unique_emails = list(dict.fromkeys(emails))
+    for chunk in _chunks(unique_emails, BULK_CHECK_IN_CHUNK_SIZE):
+        matches = await db.execute(
+            select(Attendee.id, Attendee.email, EventRegistration.check_in_status)
+            .join(EventRegistration, EventRegistration.attendee_id == Attendee.id)
+            .where(EventRegistration.event_id == event_id, Attendee.email.in_(chunk))
+        )
+        for attendee_id, email, checked_in in matches:
+            attendees[email] = (attendee_id, checked_in)
 
     updated_attendees = []
     not_found_attendees = []
+    ids_to_check_in = []
 
-    for row in csv_reader:
-        email = row.get("email")
-        if not email:
+    for email in emails:
+        attendee = attendees.get(email)
+        if attendee is None:
+            not_found_attendees.append(email)
             continue
 
-        attendee = db.query(Attendee).filter(
-            Attendee.email == email, Attendee.event_id == event_id
-        ).first()
-
-        if attendee:
-            if not attendee.check_in_status:  # Avoid duplicate check-ins
-                attendee.check_in_status = True
-                updated_attendees.append(email)
-        else:
-            not_found_attendees.append(email)
+        attendee_id, checked_in = attendee
+        if not checked_in:  # Avoid duplicate check-ins
+            attendees[email] = (attendee_id, True)
+            ids_to_check_in.append(attendee_id)
+            updated_attendees.append(email)
 
-    db.commit()
+    # Flip check_in_status set-wise, all inside a single transaction
+    for chunk in _chunks(ids_to_check_in, BULK_CHECK_IN_CHUNK_SIZE):
+        await db.execute(
+            update(EventRegistration)
+            .where(EventRegistration.event_id == event_id, EventRegistration.attendee_id.in_(chunk))
+            .values(check_in_status=True, checked_in_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+    await rollups.record_check_ins(db, event_id, len(ids_to_check_in))
 
     return {
         "checked_in": updated_attendees,
         "not_found": not_found_attendees
     }
+
+
+async def bulk_check_in_attendees(db: AsyncSession, event_id: int, organizer_id: int, csv_content: str):
+    await get_bulk_check_in_event(db, event_id, organizer_id)
+
+    splitter = CSVRowSplitter()
+    rows = splitter.feed(csv_content.encode("utf-8")) + splitter.close()
+    return await check_in_batch(db, event_id, rows)
+
+# 9️. Batch Create / Update Events (Per-Item Results, Chunked Transactions)
+EVENT_BATCH_MAX_ITEMS = int(os.getenv("EVENT_BATCH_MAX_ITEMS", "5000"))
+EVENT_BATCH_CHUNK_SIZE = int(os.getenv("EVENT_BATCH_CHUNK_SIZE", "500"))
+_event_create_adapter = TypeAdapter(EventCreate)
+_event_batch_update_adapter = TypeAdapter(EventBatchUpdate)
+
+
+def _batch_result(index: int, status_code: int, event=None, detail=None):
+    return {"index": index, "status_code": status_code, "event": event, "detail": detail}
+
+
+def _validate_batch(adapter: TypeAdapter, items, results):
+    """Validate every item up front; invalid ones get a 422 result, valid ones come back as (index, model)."""
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, adapter.validate_python(item)))
+        except ValidationError as exc:
+            results[index] = _batch_result(index, 422, detail=exc.errors(include_url=False, include_context=False))
+    return valid
+
+
+def _chunk_failed(chunk, results, exc: IntegrityError):
+    # The chunk's transaction was rolled back as a whole, so none of its items were applied
+    detail = f"Rejected by the database; no item in this chunk was applied: {exc.orig}"
+    for index, _ in chunk:
+        results[index] = _batch_result(index, 409, detail=detail)
+
+
+def _batch_report(results):
+    succeeded = sum(1 for result in results if result["status_code"] < 400)
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
+
+async def create_events_batch(db: AsyncSession, items, organizer_id: int):
+    """Create many events; returns an EventBatchResult body.
+
+    Items are validated in one pass, then inserted EVENT_BATCH_CHUNK_SIZE at a
+    time with a multi-row ``INSERT ... RETURNING``, each chunk its own
+    transaction. Invalid items and chunks the database rejects are reported
+    per item without stopping the rest of the batch.
+    """
+    results = [None] * len(items)
+    valid = _validate_batch(_event_create_adapter, items, results)
+
+    created_ids = []
+    for chunk in _chunks(valid, EVENT_BATCH_CHUNK_SIZE):
+        rows = [{**event.model_dump(), "status": "scheduled", "organizer_id": organizer_id} for _, event in chunk]
+
+        async def insert_chunk(session, rows=rows):
+            # One multi-row INSERT; ids are assigned in VALUES order, so sorting the RETURNING rows by
+            # id lines them up with the items (sort_by_parameter_order would make SQLite insert row by row)
+            created = (await session.execute(insert(Event).returning(*EVENT_RESPONSE_COLUMNS), rows)).all()
+            created.sort(key=lambda row: row.event_id)
+            await rollups.record_events(session, organizer_id, [row.event_id for row in created])
+            return created
+
+        try:
+            created = await run_write(db, insert_chunk)
+        except IntegrityError as exc:
+            await db.rollback()
+            _chunk_failed(chunk, results, exc)
+            continue
+        for (index, _), row in zip(chunk, created):
+            results[index] = _batch_result(index, 201, event=event_body(row._mapping))
+            created_ids.append(row.event_id)
+
+    if created_ids:
+        invalidate_events()
+    return _batch_report(results)
+
+
+async def update_events_batch(db: AsyncSession, items, organizer_id: int):
+    """Apply many partial event updates; returns an EventBatchResult body.
+
+    Each item is an EventUpdate plus the ``event_id`` it applies to, and gets
+    the 404 / 403 the single-event endpoint would give. Each chunk's owned
+    events are updated with one executemany, in their own transaction.
+    """
+    results = [None] * len(items)
+    valid = []
+    seen = set()
+    for index, update_item in _validate_batch(_event_batch_update_adapter, items, results):
+        if update_item.event_id in seen:
+            results[index] = _batch_result(index, 409, detail="event_id appears more than once in this batch")
+            continue
+        seen.add(update_item.event_id)
+        valid.append((index, update_item))
+
+    updated_ids = []
+    for chunk in _chunks(valid, EVENT_BATCH_CHUNK_SIZE):
+        owners = dict((await db.execute(
+            select(Event.event_id, Event.organizer_id)
+            .where(Event.event_id.in_([update_item.event_id for _, update_item in chunk]))
+        )).all())
+
+        allowed = []
+        for index, update_item in chunk:
+            owner = owners.get(update_item.event_id)
+            if owner is None:
+                results[index] = _batch_result(index, 404, detail="Event not found")
+            elif owner != organizer_id:
+                results[index] = _batch_result(index, 403, detail="Not authorized to update this event")
+            else:
+                allowed.append((index, update_item))
+        if not allowed:
+            continue
+
+        ids = [update_item.event_id for _, update_item in allowed]
+        changes = [update_item.model_dump(exclude_unset=True) | {"event_id": update_item.event_id}
+                   for _, update_item in allowed]
+        changes = [change for change in changes if len(change) > 1]
+
+        async def update_chunk(session, ids=ids, changes=changes):
+            promoted = {}
+            if changes:
+                # ORM bulk UPDATE by primary key: one executemany per distinct set of changed columns
+                await session.execute(update(Event), changes)
+                raised = [change["event_id"] for change in changes if "max_attendees" in change]
+                if raised:
+                    for event_id in await session.scalars(select(Event.event_id).where(
+                        Event.event_id.in_(raised),
+                        Event.registered_count < Event.max_attendees,
+                        Event.waitlist_issued > Event.waitlist_served,
+                    )):
+                        promoted[event_id] = await promote_waitlist(session, event_id)
+            rows = {row.event_id: row for row in await session.execute(
+                select(*EVENT_RESPONSE_COLUMNS).where(Event.event_id.in_(ids))
+            )}
+            return rows, promoted
+
+        try:
+            updated, promoted = await run_write(db, update_chunk)
+        except IntegrityError as exc:
+            await db.rollback()
+            _chunk_failed(allowed, results, exc)
+            continue
+        for event_id, count in promoted.items():
+            live.counters.add(event_id, registered=count)
+        for index, update_item in allowed:
+            results[index] = _batch_result(index, 200, event=event_body(updated[update_item.event_id]._mapping))
+        updated_ids.extend(ids)
+
+    if updated_ids:
+        invalidate_events(*updated_ids)
+    return _batch_report(results)
+
+
+# 10. Waitlist (Full Events Queue Attendees; Freed Seats Go to the Queue in Order)
+# Entries carry a per-event sequence number from events.waitlist_issued, and
+# events.waitlist_served is the last one promoted. An attendee's position counts
+# the entries still queued ahead of them, so leaving the queue moves everyone
+# behind up. event_waitlist_buckets keeps how many entries each block of
+# WAITLIST_BUCKET_SIZE sequence numbers holds, so that count sums the live
+# buckets before the attendee's (queue length / 512 rows) and range-counts at
+# most 511 entries in it, rather than counting the whole queue ahead.
+WAITLIST_PROMOTION_BATCH = int(os.getenv("WAITLIST_PROMOTION_BATCH", "500"))
+
+# Built once (in Core, with bound parameters): assembling it per call costs more than running it
+_queued, _queued_mine, _waitlist_buckets = (
+    WaitlistEntry.__table__, WaitlistEntry.__table__.alias("mine"), WaitlistBucket.__table__
+)
+_mine_bucket = _queued_mine.c.sequence // bindparam("bucket_size", type_=Integer)
+_WAITLIST_POSITION = select(
+    select(func.coalesce(func.sum(_waitlist_buckets.c.entries), 0))
+    .where(_waitlist_buckets.c.event_id == bindparam("event_id"), _waitlist_buckets.c.bucket < _mine_bucket)
+    .scalar_subquery()
+    + select(func.count())
+    .select_from(_queued)
+    .where(
+        _queued.c.event_id == bindparam("event_id"),
+        _queued.c.sequence >= _mine_bucket * bindparam("bucket_size", type_=Integer),
+        _queued.c.sequence < _queued_mine.c.sequence,
+    )
+    .scalar_subquery()
+    + 1
+).where(_queued_mine.c.event_id == bindparam("event_id"))
+
+
+async def waitlist_position(db: AsyncSession, event_id: int, attendee_id):
+    """1-based place in the event's waitlist, or ``None`` when not queued.
+
+    ``attendee_id`` may be an id or a scalar subquery producing one.
+    """
+    return await db.scalar(
+        _WAITLIST_POSITION.where(_queued_mine.c.attendee_id == attendee_id),
+        {"event_id": event_id, "bucket_size": WAITLIST_BUCKET_SIZE},
+    )
+
+
+async def _count_waitlisted(db: AsyncSession, event_id: int, sequences, sign: int):
+    """Add (``sign=1``) or take away (``-1``) ``sequences`` from the event's bucket counts."""
+    deltas = {}
+    for sequence in sequences:
+        bucket = sequence // WAITLIST_BUCKET_SIZE
+        deltas[bucket] = deltas.get(bucket, 0) + sign
+    for bucket, delta in deltas.items():
+        changed = await db.execute(
+            update(WaitlistBucket)
+            .where(WaitlistBucket.event_id == event_id, WaitlistBucket.bucket == bucket)
+            .values(entries=WaitlistBucket.entries + delta)
+            .execution_options(synchronize_session=False)
+        )
+        if not changed.rowcount:
+            await db.execute(insert(WaitlistBucket).values(event_id=event_id, bucket=bucket, entries=delta))
+    if sign < 0:
+        await db.execute(
+            delete(WaitlistBucket)
+            .where(WaitlistBucket.event_id == event_id, WaitlistBucket.bucket.in_(list(deltas)),
+                   WaitlistBucket.entries <= 0)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def get_waitlist_status(db: AsyncSession, event_id: int, current_user):
+    """The current attendee's WaitlistStatus body, or ``None`` when they are not queued."""
+    attendee_id = select(Attendee.id).where(Attendee.email == current_user.email).scalar_subquery()
+    position = await waitlist_position(db, event_id, attendee_id)
+    return None if position is None else {"event_id": event_id, "status": "waitlisted", "position": position}
+
+
+async def join_waitlist(db: AsyncSession, event_id: int, attendee_id: int):
+    """Queue an attendee for a full event; asking again reports the place they already hold."""
+    registered = await db.scalar(
+        select(EventRegistration.event_id)
+        .where(EventRegistration.event_id == event_id, EventRegistration.attendee_id == attendee_id)
+    )
+    if registered is not None:
+        raise HTTPException(status_code=400, detail="You are already registered for this event")
+
+    position = await waitlist_position(db, event_id, attendee_id)
+    if position is None:
+        issued = await db.scalar(
+            update(Event)
+            .where(Event.event_id == event_id)
+            .values(waitlist_issued=Event.waitlist_issued + 1)
+            .returning(Event.waitlist_issued)
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(insert(WaitlistEntry).values(event_id=event_id, attendee_id=attendee_id, sequence=issued))
+        await _count_waitlisted(db, event_id, [issued], 1)
+        position = await waitlist_position(db, event_id, attendee_id)
+    return {"event_id": event_id, "status": "waitlisted", "position": position}
+
+
+async def promote_waitlist(db: AsyncSession, event_id: int) -> int:
+    """Register queued attendees into the event's free seats, oldest first; returns how many.
+
+    Works through the queue WAITLIST_PROMOTION_BATCH entries at a time, inside
+    the caller's transaction, so the seats never show as free to anyone else.
+    """
+    promoted = 0
+    while True:
+        free = await db.scalar(
+            select(Event.max_attendees - Event.registered_count).where(Event.event_id == event_id)
+        )
+        if not free or free <= 0:
+            return promoted
+        entries = (await db.execute(
+            select(WaitlistEntry.attendee_id, WaitlistEntry.sequence)
+            .where(WaitlistEntry.event_id == event_id)
+            .order_by(WaitlistEntry.sequence)
+            .limit(min(free, WAITLIST_PROMOTION_BATCH))
+        )).all()
+        if not entries:
+            return promoted
+
+        last_sequence = entries[-1].sequence
+        await db.execute(insert(EventRegistration).values([
+            {"event_id": event_id, "attendee_id": entry.attendee_id} for entry in entries
+        ]))
+        await db.execute(
+            delete(WaitlistEntry)
+            .where(WaitlistEntry.event_id == event_id, WaitlistEntry.sequence <= last_sequence)
+            .execution_options(synchronize_session=False)
+        )
+        await _count_waitlisted(db, event_id, [entry.sequence for entry in entries], -1)
+        await db.execute(
+            update(Event)
+            .where(Event.event_id == event_id)
+            .values(registered_count=Event.registered_count + len(entries), waitlist_served=last_sequence)
+            .execution_options(synchronize_session=False)
+        )
+        await rollups.record_registrations(db, event_id, len(entries))
+        promoted += len(entries)
+
+
+async def cancel_registration(db: AsyncSession, event_id: int, current_user):
+    """Give up a seat (promoting the next in line) or a waitlist place (write operation, via run_write).
+
+    Returns ``{"message", "registration", "checked_in", "promoted"}``; the last
+    three let the caller report the change to ``live.counters`` once committed.
+    """
+    attendee_id = select(Attendee.id).where(Attendee.email == current_user.email).scalar_subquery()
+    cancelled = (await db.execute(
+        delete(EventRegistration)
+        .where(EventRegistration.event_id == event_id, EventRegistration.attendee_id == attendee_id)
+        .returning(EventRegistration.check_in_status, EventRegistration.registered_at, EventRegistration.checked_in_at)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if cancelled is not None:
+        organizer_id = await db.scalar(
+            update(Event)
+            .where(Event.event_id == event_id)
+            .values(registered_count=Event.registered_count - 1)
+            .returning(Event.organizer_id)
+            .execution_options(synchronize_session=False)
+        )
+        await rollups.record_registrations(db, event_id, -1, organizer_id, cancelled.registered_at.date())
+        if cancelled.check_in_status:
+            await rollups.undo_check_in(db, event_id, organizer_id, cancelled.checked_in_at)
+        promoted = await promote_waitlist(db, event_id)
+        return {
+            "message": "Registration cancelled", "registration": True,
+            "checked_in": cancelled.check_in_status, "promoted": promoted,
+        }
+
+    left = await db.scalar(
+        delete(WaitlistEntry)
+        .where(WaitlistEntry.event_id == event_id, WaitlistEntry.attendee_id == attendee_id)
+        .returning(WaitlistEntry.sequence)
+        .execution_options(synchronize_session=False)
+    )
+    if left is None:
+        raise HTTPException(status_code=404, detail="Not registered or waitlisted for this event")
+    await _count_waitlisted(db, event_id, [left], -1)
+    return {"message": "Left the waitlist", "registration": False, "checked_in": False, "promoted": 0}
+
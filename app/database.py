@@ -1,38 +1,239 @@
-from sqlalchemy import create_engine
+import asyncio
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
-from passlib.context import CryptContext
+from app.profiling import attribute_to, current_stats, phase
 
-# Database Configuration
-DATABASE_URL = "sqlite:///./events.db"
+# Database Configuration (aiosqlite locally; e.g. postgresql+asyncpg://... in production)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./events.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Pool sizing for the async engine; SQLite serializes writers anyway, so these mostly matter elsewhere
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Synchronous drivers for the same databases, used by scripts, Alembic and table creation
+SYNC_DRIVERS = {"sqlite+aiosqlite": "sqlite", "postgresql+asyncpg": "postgresql+psycopg2"}
+
+
+def sync_database_url(url: str) -> str:
+    url = make_url(url)
+    return url.set(drivername=SYNC_DRIVERS.get(url.drivername, url.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+def engine_options(url: str) -> dict:
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            return {"connect_args": {"check_same_thread": False}}
+        return {
+            "connect_args": {"check_same_thread": False},
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        }
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+# SQLite tuning: "default" keeps SQLite's stock settings, "production" applies SQLITE_PRODUCTION_PRAGMAS
+# on every connection and funnels request writes through the single-writer queue below
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default")
+SQLITE_PRODUCTION_PRAGMAS = {
+    "journal_mode": "WAL",  # Readers no longer block behind writers
+    "synchronous": "NORMAL",  # Durable at checkpoints; safe with WAL
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),  # Negative means KiB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": "MEMORY",
+}
+
+
+def configure_sqlite(engine, profile: str = SQLITE_PROFILE):
+    """Apply a SQLite tuning profile to every new connection of a (sync) engine."""
+    if profile != "production":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs (used by the write queue) behave
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRODUCTION_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        mode = connection.get_execution_options().get("sqlite_begin")
+        connection.exec_driver_sql(f"BEGIN {mode}" if mode else "BEGIN")
+
+
+async_engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+# expire_on_commit=False: attributes stay readable after commit without implicit (blocking) reloads
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+SYNC_DATABASE_URL = sync_database_url(DATABASE_URL)
+engine = create_engine(SYNC_DATABASE_URL, **engine_options(SYNC_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+if make_url(DATABASE_URL).get_backend_name() == "sqlite":
+    configure_sqlite(async_engine.sync_engine)
+    configure_sqlite(engine)
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+Base = declarative_base()
 
-def get_db():
+async def get_db():
     """Dependency to get the database session."""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+# Under WAL a deferred transaction that reads and then writes fails at once with SQLITE_BUSY_SNAPSHOT
+# (busy_timeout cannot help) when another connection committed in between, so writers take the lock up front
+WRITE_TRANSACTION = {"sqlite_begin": "IMMEDIATE"}
+
+
+async def begin_write(db):
+    """Open ``db``'s next transaction as a write transaction (BEGIN IMMEDIATE under the production profile).
+
+    A read transaction the session still has open is committed first; nothing
+    is expired, and it must not hold pending changes.
+    """
+    if db.in_transaction():
+        await db.commit()
+    await db.connection(execution_options=WRITE_TRANSACTION)
+
+
+class WriteQueue:
+    """Run write operations one transaction at a time from a single task.
+
+    Operations that queue up while a transaction is open are folded into the
+    next one (a group commit), so concurrent writers share one fsync instead of
+    fighting over SQLite's write lock. Each operation runs inside a SAVEPOINT,
+    so one that raises (e.g. an HTTPException) is rolled back on its own and
+    its exception is re-raised to the caller. Its SQL is counted towards the
+    request that submitted it (see app.profiling).
+    """
+
+    def __init__(self, session_factory=None, max_batch: int = 64):
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.max_batch = max_batch
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def submit(self, operation):
+        """Run ``await operation(session)`` in the next group commit and return its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((operation, future, current_stats()))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._commit(batch)
+
+    async def _commit(self, batch):
+        outcomes = []
+        try:
+            async with self.session_factory() as db:
+                await begin_write(db)
+                for operation, future, stats in batch:
+                    try:
+                        with attribute_to(stats):
+                            async with db.begin_nested():
+                                outcomes.append((future, await operation(db), None))
+                    except Exception as exc:
+                        outcomes.append((future, None, exc))
+                await db.commit()
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for future, result, exc in outcomes:
+            if future.done():  # The caller went away
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+
+write_queue = None
+
+
+async def start_write_queue(enabled: bool = None):
+    """Start the single-writer queue; on by default with the production SQLite profile."""
+    global write_queue
+    if enabled is None:
+        enabled = SQLITE_PROFILE == "production" and make_url(DATABASE_URL).get_backend_name() == "sqlite"
+    if enabled:
+        write_queue = WriteQueue()
+        write_queue.start()
+    return write_queue
+
+
+async def stop_write_queue():
+    global write_queue
+    if write_queue is not None:
+        await write_queue.stop()
+        write_queue = None
+
+
+async def run_write(db, operation):
+    """Run a write operation and commit it, through the write queue when it is running.
+
+    ``operation`` is an ``async`` callable taking a session; it must not commit.
+    Every write in the app goes through here (or ``begin_write``), so no
+    transaction ever upgrades from reading to writing.
+    """
+    with phase("write"):
+        if write_queue is None:
+            await begin_write(db)
+            result = await operation(db)
+            await db.commit()
+            return result
+
+        await db.rollback()  # Release the request's read transaction while queued
+        return await write_queue.submit(operation)
+
 
 def init_db():
     """Initialize the database and create a test user."""
     from app.models import User  # Import models inside the function to avoid circular import
+    from app.hashing import pwd_context
 
     # Create tables
-    Base.metadata.create_all(bind=engine)  
+    Base.metadata.create_all(bind=engine)
 
     db = SessionLocal()
     test_user = db.query(User).filter(User.username == "testuser").first()
 
     if not test_user:
-        hashed_password = pwd_context.hash("testpassword")  
+        hashed_password = pwd_context.hash("testpassword")
         new_user = User(username="testuser", email="testuser@example.com", password=hashed_password)
         db.add(new_user)
         db.commit()
@@ -0,0 +1,103 @@
+"""Password hashing kept off the event loop and request workers.
+
+bcrypt costs a few hundred milliseconds of CPU per call, so hashes and
+verifications run in a dedicated, size-limited process pool. Calls beyond
+the pool's queue limit are refused straight away with a 503 instead of
+piling up behind a login storm.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+from app.metrics import Counter
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "64"))  # Running plus waiting calls
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Changing BCRYPT_ROUNDS marks existing hashes for a transparent rehash on next login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+password_hash_rejections = Counter(
+    "password_hash_rejected_total", "Password hash calls refused because the hashing pool was saturated."
+)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str):
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+class HashingPool:
+    """A process pool with an admission limit on outstanding calls.
+
+    With ``workers=0`` calls run in the shared request threadpool instead,
+    which is how the routes behaved before the pool existed.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = None
+        self._outstanding = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self._outstanding >= self.queue_limit:
+                password_hash_rejections.inc()
+                raise HTTPException(
+                    status_code=503,
+                    detail="Authentication is busy, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._outstanding += 1
+        try:
+            if self.workers == 0:
+                return await run_in_threadpool(func, *args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            with self._lock:
+                self._outstanding -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+pool = HashingPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE)
+
+
+def configure(workers: int = PASSWORD_HASH_WORKERS, queue_limit: int = PASSWORD_HASH_QUEUE):
+    """Replace the shared pool, e.g. to compare pool sizes in benchmarks."""
+    global pool
+    pool.shutdown()
+    pool = HashingPool(workers, queue_limit)
+    return pool
+
+
+async def hash_password(password: str) -> str:
+    return await pool.run(_hash, password)
+
+
+async def verify_password(password: str, hashed_password: str):
+    """Return ``(valid, new_hash)``; ``new_hash`` is set when the stored hash is outdated."""
+    return await pool.run(_verify_and_update, password, hashed_password)
@@ -0,0 +1,160 @@
+"""Idempotency keys and request coalescing for retried writes.
+
+Door scanners retry check-ins on flaky Wi-Fi. A write's response is stored under
+a key derived from the caller's bearer token, the request path and its
+Idempotency-Key header; a retry with the same key is answered from the store
+before authentication or any query runs, and one that arrives while the first
+is still in flight waits for that result instead of writing again. Requests
+without a key are coalesced while the first is in flight, so two scans of one
+badge at the same moment collapse into one write; CHECK_IN_COALESCE_SECONDS
+keeps their result for a short window after that as well (0, the default,
+leaves a later repeat to get its own answer).
+
+Responses live in a bounded in-memory TTLCache. With IDEMPOTENCY_STORE=table,
+successful responses are also written to ``idempotency_keys`` in the same
+transaction as the write itself, so a retry that reaches another worker (or
+arrives after a restart) is still replayed, and two workers racing on one key
+apply it once. Server errors are never stored.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import TTLCache
+from app.models import IdempotencyKey
+from app.rendering import RenderedJSONResponse, dumps
+
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "memory")  # memory or table
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_PURGE_INTERVAL = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL", "300"))
+CHECK_IN_COALESCE_SECONDS = float(os.getenv("CHECK_IN_COALESCE_SECONDS", "0"))
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def request_key(token: str, method: str, path: str, idempotency_key: str = None) -> str:
+    """Store key for a request; scoped to the caller so keys cannot collide across users."""
+    scope = "\n".join((token, method, path, "key" if idempotency_key else "coalesce", idempotency_key or ""))
+    return hashlib.blake2b(scope.encode(), digest_size=20).hexdigest()
+
+
+class ResponseStore:
+    """Completed responses (``(status_code, body, headers)``) plus the requests still in flight."""
+
+    def __init__(self, maxsize: int = IDEMPOTENCY_MAX_KEYS, ttl: float = IDEMPOTENCY_TTL):
+        self.responses = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight = {}
+
+    def get(self, key: str):
+        return self.responses.get(key)
+
+    async def run(self, key: str, handler, ttl: float = None):
+        """Run ``handler`` once for ``key``; returns ``(response, replayed)``.
+
+        ``handler`` returns a ``(status_code, body, headers)`` response; an
+        HTTPException below 500 is stored as its error response.
+        """
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight), True
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())  # Nobody may be waiting
+        self._inflight[key] = future
+        try:
+            try:
+                response = await handler()
+            except HTTPException as exc:
+                if exc.status_code >= 500:
+                    raise
+                response = (exc.status_code, dumps({"detail": exc.detail}).decode(), exc.headers)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if ttl != 0:
+            self.responses.set(key, response, ttl=ttl)
+        future.set_result(response)
+        return response, False
+
+    def clear(self):
+        self.responses.clear()
+
+
+store = ResponseStore()
+_last_purge = 0.0
+
+
+async def record(db: AsyncSession, key: str, body):
+    """Persist a successful response inside the write's own transaction (table store only).
+
+    A key another worker already recorded raises IntegrityError, rolling the
+    write back; ``respond`` then replays that worker's response.
+    """
+    global _last_purge
+    if IDEMPOTENCY_STORE != "table":
+        return
+    await db.execute(insert(IdempotencyKey).values(key=key, status_code=200, body=dumps(body).decode()))
+    if time.monotonic() - _last_purge > IDEMPOTENCY_PURGE_INTERVAL:
+        _last_purge = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_TTL)
+        await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+
+
+async def _load(db: AsyncSession, key: str):
+    cutoff = datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_TTL)
+    row = (await db.execute(
+        select(IdempotencyKey.status_code, IdempotencyKey.body)
+        .where(IdempotencyKey.key == key, IdempotencyKey.created_at >= cutoff)
+    )).first()
+    return None if row is None else (row.status_code, row.body, None)
+
+
+def _render(response, replayed: bool):
+    status_code, body, headers = response
+    headers = dict(headers or {})
+    if replayed:
+        headers[REPLAYED_HEADER] = "true"
+    return RenderedJSONResponse(body, status_code=status_code, headers=headers)
+
+
+async def respond(db: AsyncSession, key: str, handler, durable: bool = False, ttl: float = None):
+    """Answer a write from the store, or run ``handler`` and store its response.
+
+    ``durable`` requests (those with an Idempotency-Key) also consult and fill
+    the table store; keyless ones pass a short ``ttl`` (0: only while in flight).
+    """
+    durable = durable and IDEMPOTENCY_STORE == "table"
+    stored = store.get(key)
+    if stored is None and durable:
+        stored = await _load(db, key)
+        if stored is not None:
+            store.responses.set(key, stored)
+    if stored is not None:
+        return _render(stored, replayed=True)
+
+    async def handle():
+        try:
+            return 200, dumps(await handler()).decode(), None
+        except IntegrityError:
+            if not durable:
+                raise
+            await db.rollback()
+            winner = await _load(db, key)  # Another worker applied this key first
+            if winner is None:
+                raise
+            return winner
+
+    response, replayed = await store.run(key, handle, ttl=ttl)
+    return _render(response, replayed)
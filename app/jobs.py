@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import UploadFile
+from sqlalchemy import and_, or_, select, update
+
+from app import live
+from app.crud import check_in_batch
+from app.database import AsyncSessionLocal, begin_write
+from app.models import BulkCheckInJob
+from app.streaming import iter_upload_batches
+
+logger = logging.getLogger(__name__)
+
+BULK_JOB_WORKERS = int(os.getenv("BULK_JOB_WORKERS", "2"))
+BULK_JOB_DIR = os.getenv("BULK_JOB_DIR", "./bulk_jobs")
+# A running job whose heartbeat is older than this is taken to have lost its worker
+BULK_JOB_LEASE_SECONDS = float(os.getenv("BULK_JOB_LEASE_SECONDS", "60"))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_queue = None
+_workers = []
+
+
+def job_source_path(job_id: str) -> str:
+    os.makedirs(BULK_JOB_DIR, exist_ok=True)
+    return os.path.join(BULK_JOB_DIR, f"{job_id}.csv")
+
+
+def submit_job(job_id: str):
+    """Queue a persisted job for the bounded worker pool."""
+    _queue.put_nowait(job_id)
+
+
+def _claimable():
+    """Jobs nobody is working on: queued, or running under a lease that has run out."""
+    expired = datetime.utcnow() - timedelta(seconds=BULK_JOB_LEASE_SECONDS)
+    return or_(
+        BulkCheckInJob.status == "queued",
+        and_(
+            BulkCheckInJob.status == "running",
+            or_(BulkCheckInJob.heartbeat_at.is_(None), BulkCheckInJob.heartbeat_at < expired),
+        ),
+    )
+
+
+async def _update_claimed(db, job_id: str, **values) -> bool:
+    """Update the job if this worker still holds it; ``False`` means another worker took it over."""
+    changed = await db.execute(
+        update(BulkCheckInJob)
+        .where(BulkCheckInJob.id == job_id, BulkCheckInJob.claimed_by == WORKER_ID)
+        .values(heartbeat_at=datetime.utcnow(), **values)
+    )
+    return changed.rowcount == 1
+
+
+async def run_job(job_id: str):
+    """Process a bulk check-in job, resuming after the rows it already committed.
+
+    The job is first claimed with a conditional UPDATE, so however many
+    processes were asked to run it, one does. Each batch's check-ins, the job's
+    counters and its heartbeat are committed together, and only while the claim
+    holds: a job interrupted by a restart picks up exactly where it stopped, once
+    its lease has expired. Every transaction here writes, so each one starts with
+    ``begin_write``.
+    """
+    async with AsyncSessionLocal() as db:
+        await begin_write(db)
+        claimed = await db.execute(
+            update(BulkCheckInJob)
+            .where(BulkCheckInJob.id == job_id, _claimable())
+            .values(status="running", claimed_by=WORKER_ID, heartbeat_at=datetime.utcnow())
+        )
+        await db.commit()
+        if claimed.rowcount != 1:
+            return
+        event_id, source_path, skip = (await db.execute(
+            select(BulkCheckInJob.event_id, BulkCheckInJob.source_path, BulkCheckInJob.rows_processed)
+            .where(BulkCheckInJob.id == job_id)
+        )).one()
+        await db.commit()
+
+        try:
+            with open(source_path, "rb") as source:
+                async for rows in iter_upload_batches(UploadFile(source)):
+                    if skip >= len(rows):
+                        skip -= len(rows)
+                        continue
+                    rows, skip = rows[skip:], 0
+
+                    await begin_write(db)
+                    report = await check_in_batch(db, event_id, rows, commit=False)
+                    with_email = sum(1 for row in rows if row.get("email"))
+                    if not await _update_claimed(
+                        db, job_id,
+                        rows_processed=BulkCheckInJob.rows_processed + len(rows),
+                        rows_found=BulkCheckInJob.rows_found + with_email - len(report["not_found"]),
+                        rows_not_found=BulkCheckInJob.rows_not_found + len(report["not_found"]),
+                    ):
+                        await db.rollback()
+                        logger.warning("Bulk check-in job %s was taken over by another worker", job_id)
+                        return
+                    await db.commit()
+                    live.counters.add(event_id, checked_in=len(report["checked_in"]))
+        except UnicodeDecodeError:
+            await _fail(db, job_id, "CSV file must be UTF-8 encoded")
+            return
+        except Exception as exc:
+            logger.exception("Bulk check-in job %s failed", job_id)
+            await _fail(db, job_id, str(exc))
+            return
+
+        await begin_write(db)
+        completed = await _update_claimed(db, job_id, status="completed")
+        await db.commit()
+        if not completed:
+            return
+
+    try:
+        os.remove(source_path)
+    except OSError:
+        pass
+
+
+async def _fail(db, job_id: str, error: str):
+    await db.rollback()
+    await begin_write(db)
+    await _update_claimed(db, job_id, status="failed", error=error)
+    await db.commit()
+
+
+async def _worker():
+    while True:
+        job_id = await _queue.get()
+        try:
+            await run_job(job_id)
+        except Exception:
+            logger.exception("Bulk check-in job %s crashed", job_id)
+        finally:
+            _queue.task_done()
+
+
+async def start():
+    """Start the worker tasks and re-queue jobs that were interrupted by a restart."""
+    global _queue
+    _queue = asyncio.Queue()
+    _workers[:] = [asyncio.create_task(_worker()) for _ in range(BULK_JOB_WORKERS)]
+    return await resume_pending_jobs()
+
+
+async def resume_pending_jobs():
+    """Re-queue jobs still queued, or left running by a worker whose lease has expired.
+
+    Every process does this as it starts; the claim in ``run_job`` makes sure
+    each job still runs once.
+    """
+    async with AsyncSessionLocal() as db:
+        job_ids = (await db.scalars(
+            select(BulkCheckInJob.id).where(_claimable()).order_by(BulkCheckInJob.created_at)
+        )).all()
+    for job_id in job_ids:
+        submit_job(job_id)
+    return job_ids
+
+
+async def stop():
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
@@ -0,0 +1,156 @@
+"""Live per-event attendance counters, pushed to dashboards over Server-Sent Events.
+
+Counts for watched events are kept in memory and bumped by the write paths
+once their transaction has committed. A single broadcaster task wakes every
+LIVE_COUNTER_TICK seconds and, for each event whose counts changed, renders
+one SSE frame and hands that same frame to every watcher, so a thousand
+dashboards cost one payload per tick instead of one query each.
+"""
+import asyncio
+import json
+import os
+from collections import defaultdict
+
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal
+from app.models import Event, EventRegistration
+
+LIVE_COUNTER_TICK = float(os.getenv("LIVE_COUNTER_TICK", "1.0"))
+LIVE_KEEPALIVE_SECONDS = float(os.getenv("LIVE_KEEPALIVE_SECONDS", "15"))
+
+
+def render_frame(counts: dict) -> str:
+    return f"data: {json.dumps(counts)}\n\n"
+
+
+class Watcher:
+    """One dashboard connection.
+
+    Only the latest frame is kept, so a slow reader skips stale counts
+    instead of building up a backlog.
+    """
+
+    def __init__(self):
+        self.frame = None
+        self._ready = asyncio.Event()
+
+    def push(self, frame: str):
+        self.frame = frame
+        self._ready.set()
+
+    async def next_frame(self, timeout: float):
+        """Wait for a new frame; returns ``None`` if nothing changed within ``timeout``."""
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        self._ready.clear()
+        return self.frame
+
+
+class CounterHub:
+    """Registered / checked-in / capacity counts for the events someone is watching.
+
+    Counts are read from the database when the first watcher of an event
+    connects (concurrent first watchers share that one read) and dropped when
+    the last one leaves; unwatched events cost nothing.
+    """
+
+    def __init__(self, tick: float = LIVE_COUNTER_TICK, session_factory=None):
+        self.tick = tick
+        self.session_factory = session_factory or AsyncSessionLocal
+        self._counts = {}
+        self._watchers = defaultdict(set)
+        self._loading = {}
+        self._dirty = set()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _snapshot(self, event_id: int):
+        async with self.session_factory() as db:
+            event = (await db.execute(
+                select(Event.registered_count, Event.max_attendees).where(Event.event_id == event_id)
+            )).first()
+            if event is None:
+                return None
+            checked_in = await db.scalar(
+                select(func.count()).select_from(EventRegistration).where(
+                    EventRegistration.event_id == event_id, EventRegistration.check_in_status.is_(True)
+                )
+            )
+        return {
+            "event_id": event_id,
+            "registered": event.registered_count,
+            "checked_in": checked_in,
+            "capacity": event.max_attendees,
+        }
+
+    async def watch(self, event_id: int):
+        """Register a watcher primed with the current counts; ``None`` if the event does not exist."""
+        if event_id not in self._counts:
+            loading = self._loading.get(event_id)
+            if loading is None:
+                loading = self._loading[event_id] = asyncio.ensure_future(self._snapshot(event_id))
+                loading.add_done_callback(lambda _: self._loading.pop(event_id, None))
+            # Shielded: one watcher disconnecting must not cancel the read the others wait on
+            counts = await asyncio.shield(loading)
+            if counts is None:
+                return None
+            self._counts.setdefault(event_id, counts)
+
+        watcher = Watcher()
+        self._watchers[event_id].add(watcher)
+        watcher.push(render_frame(self._counts[event_id]))
+        return watcher
+
+    def unwatch(self, event_id: int, watcher: Watcher):
+        watchers = self._watchers.get(event_id)
+        if watchers is None:
+            return
+        watchers.discard(watcher)
+        if not watchers:
+            del self._watchers[event_id]
+            self._counts.pop(event_id, None)
+            self._dirty.discard(event_id)
+
+    def add(self, event_id: int, registered: int = 0, checked_in: int = 0):
+        """Apply committed changes; a no-op for events nobody is watching."""
+        counts = self._counts.get(event_id)
+        if counts is None or not (registered or checked_in):
+            return
+        counts["registered"] += registered
+        counts["checked_in"] += checked_in
+        self._dirty.add(event_id)
+
+    def set_capacity(self, event_id: int, capacity: int):
+        counts = self._counts.get(event_id)
+        if counts is None or counts["capacity"] == capacity:
+            return
+        counts["capacity"] = capacity
+        self._dirty.add(event_id)
+
+    def flush(self):
+        """Send one frame per changed event to all of its watchers."""
+        dirty, self._dirty = self._dirty, set()
+        for event_id in dirty:
+            frame = render_frame(self._counts[event_id])
+            for watcher in self._watchers.get(event_id, ()):
+                watcher.push(frame)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            self.flush()
+
+
+counters = CounterHub()
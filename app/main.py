@@ -1,10 +1,36 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from app import database, hashing, jobs, live, metrics, profiling, scheduler
 from app.database import engine, Base
-from app.routes import auth, events
+from app.rendering import FastJSONResponse
+from app.routes import auth, events, organizers
 
 Base.metadata.create_all(bind=engine)
+profiling.instrument()  # Per-request SQL counts and timings
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await database.start_write_queue()  # Only with SQLITE_PROFILE=production
+    await jobs.start()  # Also picks up bulk check-ins interrupted by a restart
+    live.counters.start()
+    scheduler.start()  # Moves event statuses along; STATUS_SCHEDULER_INTERVAL=0 turns it off
+    yield
+    await scheduler.stop()
+    await live.counters.stop()
+    await jobs.stop()
+    await database.stop_write_queue()
+    hashing.pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(profiling.ProfilingMiddleware)  # Histograms at /metrics, Server-Timing, opt-in X-Profile
 
 app.include_router(auth.router)
 app.include_router(events.router)
+app.include_router(organizers.router)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(metrics.render_latest(), media_type=metrics.CONTENT_TYPE)
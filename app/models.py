@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Boolean, Index, DDL, false, func
+from sqlalchemy import event as sa_event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -27,11 +28,69 @@ class Event(Base):
     end_time = Column(DateTime, nullable=False)
     location = Column(String, nullable=False)
     max_attendees = Column(Integer, nullable=False)
+    registered_count = Column(Integer, default=0, server_default="0", nullable=False)  # Kept in step by register_attendee
+    # Waitlist sequence numbers: the last one handed out and the last one promoted to a registration
+    waitlist_issued = Column(Integer, default=0, server_default="0", nullable=False)
+    waitlist_served = Column(Integer, default=0, server_default="0", nullable=False)
     status = Column(String, default="scheduled")
     organizer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     organizer = relationship("User", back_populates="events")
-    attendees = relationship("Attendee", back_populates="event")
+    # Read-only: registrations go through crud.register_attendee, which keeps registered_count in step
+    attendees = relationship("Attendee", secondary="event_registrations", back_populates="events", viewonly=True)
+
+    __table_args__ = (
+        # Keyset pagination walks (start_time, event_id); the filtered listings use the prefixed variants
+        Index("ix_events_start_time_event_id", "start_time", "event_id"),
+        Index("ix_events_status_start_time", "status", "start_time", "event_id"),
+        Index("ix_events_location_start_time", "location", "start_time", "event_id"),
+        # Overlap filters elsewhere; SQLite answers them from the events_window R*Tree instead
+        Index("ix_events_end_time_start_time", "end_time", "start_time").ddl_if(
+            callable_=lambda ddl, target, bind, **kw: bind.dialect.name != "sqlite"
+        ),
+    )
+
+
+# Full-Text Index Over Events (SQLite FTS5, External Content Kept in Step by Triggers)
+# Existing databases get the same objects from the Alembic migration
+EVENTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+    "name, description, location, content='events', content_rowid='event_id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts(rowid, name, description, location) "
+    "VALUES (new.event_id, new.name, new.description, new.location); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, name, description, location) "
+    "VALUES ('delete', old.event_id, old.name, old.description, old.location); END",
+    # Only text edits reindex; registered_count bumps on every registration must not
+    "CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF name, description, location ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, name, description, location) "
+    "VALUES ('delete', old.event_id, old.name, old.description, old.location); "
+    "INSERT INTO events_fts(rowid, name, description, location) "
+    "VALUES (new.event_id, new.name, new.description, new.location); END",
+)
+for statement in EVENTS_FTS_DDL:
+    sa_event.listen(Event.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+# Time-Window Index Over Events (SQLite R*Tree of [start, end] in Epoch Seconds)
+# The R*Tree stores 32-bit floats rounded outwards, so it yields a superset that
+# callers re-check against events.start_time / end_time
+EVENTS_WINDOW_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_window USING rtree(id, starts, ends)",
+    "CREATE TRIGGER IF NOT EXISTS events_window_insert AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_window(id, starts, ends) "
+    "VALUES (new.event_id, strftime('%s', new.start_time), strftime('%s', new.end_time)); END",
+    "CREATE TRIGGER IF NOT EXISTS events_window_delete AFTER DELETE ON events BEGIN "
+    "DELETE FROM events_window WHERE id = old.event_id; END",
+    "CREATE TRIGGER IF NOT EXISTS events_window_update AFTER UPDATE OF start_time, end_time ON events BEGIN "
+    "UPDATE events_window SET starts = strftime('%s', new.start_time), ends = strftime('%s', new.end_time) "
+    "WHERE id = new.event_id; END",
+)
+for statement in EVENTS_WINDOW_DDL:
+    # DDL() applies %-formatting, so escape strftime's %s
+    sa_event.listen(Event.__table__, "after_create", DDL(statement.replace("%", "%%")).execute_if(dialect="sqlite"))
 
 
 # Attendee Model (Fixed)
@@ -44,7 +103,121 @@ class Attendee(Base):
     email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)
     phone_number = Column(String, nullable=True)
-    event_id = Column(Integer, ForeignKey("events.event_id"), nullable=True)
-    check_in_status = Column(Boolean, default=False)
 
-    event = relationship("Event", back_populates="attendees")
+    events = relationship("Event", secondary="event_registrations", back_populates="attendees", viewonly=True)
+
+
+# Event Registration Model (Attendee <-> Event, With Per-Event Check-in)
+class EventRegistration(Base):
+    __tablename__ = "event_registrations"
+
+    event_id = Column(Integer, ForeignKey("events.event_id"), primary_key=True)
+    attendee_id = Column(Integer, ForeignKey("attendees.id"), primary_key=True)
+    check_in_status = Column(Boolean, default=False, server_default=false(), nullable=False)
+    registered_at = Column(DateTime, server_default=func.now(), nullable=False)
+    checked_in_at = Column(DateTime, nullable=True)  # Dates check-ins in the rollups; unset before they were kept
+
+    __table_args__ = (
+        # Per-event listings filtered on check-in, ordered by attendee, are a single range scan
+        Index("ix_event_registrations_event_check_in", "event_id", "check_in_status", "attendee_id"),
+        Index("ix_event_registrations_attendee", "attendee_id"),
+    )
+
+
+# Waitlist Entry Model (Attendees Queued for a Full Event, Promoted in Sequence Order)
+class WaitlistEntry(Base):
+    __tablename__ = "event_waitlist"
+
+    event_id = Column(Integer, ForeignKey("events.event_id"), primary_key=True)
+    attendee_id = Column(Integer, ForeignKey("attendees.id"), primary_key=True)
+    sequence = Column(Integer, nullable=False)  # From events.waitlist_issued; orders the queue
+    joined_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Promotion takes the lowest sequences of one event, and a position counts those below one in
+        # its bucket: range scans
+        Index("ix_event_waitlist_event_sequence", "event_id", "sequence", unique=True),
+    )
+
+
+# Waitlist Entries per Block of WAITLIST_BUCKET_SIZE Sequence Numbers (Kept in Step by app.crud)
+WAITLIST_BUCKET_SIZE = 512  # Stored buckets depend on it: changing it means rebuilding the table
+
+
+class WaitlistBucket(Base):
+    __tablename__ = "event_waitlist_buckets"
+
+    event_id = Column(Integer, ForeignKey("events.event_id"), primary_key=True)
+    bucket = Column(Integer, primary_key=True)  # sequence // WAITLIST_BUCKET_SIZE; empty buckets are deleted
+    entries = Column(Integer, nullable=False)
+
+
+# Analytics Rollups (Kept in Step by the Write Paths via app.rollups; rebuild_stats.py Recomputes Them)
+class EventStats(Base):
+    __tablename__ = "event_stats"
+
+    event_id = Column(Integer, ForeignKey("events.event_id"), primary_key=True)
+    organizer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    registrations = Column(Integer, default=0, server_default="0", nullable=False)
+    check_ins = Column(Integer, default=0, server_default="0", nullable=False)
+
+    __table_args__ = (
+        # An organizer's per-event stats, paged by event id
+        Index("ix_event_stats_organizer_event", "organizer_id", "event_id"),
+    )
+
+
+class OrganizerStats(Base):
+    __tablename__ = "organizer_stats"
+
+    organizer_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    events = Column(Integer, default=0, server_default="0", nullable=False)
+    registrations = Column(Integer, default=0, server_default="0", nullable=False)
+    check_ins = Column(Integer, default=0, server_default="0", nullable=False)
+
+
+class OrganizerDailyStats(Base):
+    __tablename__ = "organizer_daily_stats"
+
+    organizer_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC; registrations by registered_at, check-ins by checked_in_at
+    registrations = Column(Integer, default=0, server_default="0", nullable=False)
+    check_ins = Column(Integer, default=0, server_default="0", nullable=False)
+
+
+# Bulk Check-in Job Model (Background CSV Check-ins)
+class BulkCheckInJob(Base):
+    __tablename__ = "bulk_check_in_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.event_id"), nullable=False, index=True)
+    organizer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(String, default="queued", index=True)  # queued, running, completed, failed
+    claimed_by = Column(String, nullable=True)  # Worker running the job (see app.jobs.WORKER_ID)
+    heartbeat_at = Column(DateTime, nullable=True)  # Renewed with every batch; a stale one frees the job
+    source_path = Column(String, nullable=False)  # Spooled copy of the uploaded CSV
+    rows_processed = Column(Integer, default=0, nullable=False)
+    rows_found = Column(Integer, default=0, nullable=False)
+    rows_not_found = Column(Integer, default=0, nullable=False)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Stored Responses for Idempotency-Key Retries (IDEMPOTENCY_STORE=table, see app.idempotency)
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)  # Hash of the caller's token, the request path and the key
+    status_code = Column(Integer, nullable=False)
+    body = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+# Token Versions (Bumping a Principal's Version Revokes Every Token Issued Before; see app.routes.auth)
+class TokenVersion(Base):
+    __tablename__ = "token_versions"
+
+    role = Column(String, primary_key=True)  # "organizer" or "attendee"; ids repeat across the two tables
+    principal_id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, server_default="0", nullable=False)  # No row: version 0
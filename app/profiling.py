@@ -0,0 +1,305 @@
+"""Per-request timing: wall time, SQL statements and response serialization.
+
+ProfilingMiddleware keeps a RequestStats for each HTTP request in a context
+variable. SQLAlchemy cursor events (on every Engine) add each statement's count
+and duration to it, ProfiledRoute adds how long the response took to validate
+and render after the endpoint returned, and ``phase()`` blocks add their own
+timings. At the end of the request the numbers go into histograms labelled by
+route template, served at /metrics, and a Server-Timing header.
+
+Statements a request repeats PROFILING_N_PLUS_ONE_THRESHOLD times or more are
+logged as a likely N+1 query; set-based statements (expanded ``IN (...)``
+lists, as in chunked batches) are exempt.
+
+With REQUEST_PROFILING_ENABLED=true, a request carrying the X-Profile header is
+run under cProfile (or pyinstrument, with REQUEST_PROFILER=pyinstrument) and
+answered with the profile report instead of its body. Profilers see the whole
+event loop, so concurrent requests show up in the report too.
+"""
+import cProfile
+import inspect
+import io
+import logging
+import os
+import pstats
+import re
+import time
+from collections import Counter as StatementCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+REQUEST_PROFILING_ENABLED = os.getenv("REQUEST_PROFILING_ENABLED", "false").lower() == "true"
+REQUEST_PROFILING_HEADER = os.getenv("REQUEST_PROFILING_HEADER", "X-Profile").lower().encode()
+REQUEST_PROFILER = os.getenv("REQUEST_PROFILER", "cprofile")  # cprofile or pyinstrument
+REQUEST_PROFILE_LINES = int(os.getenv("REQUEST_PROFILE_LINES", "60"))
+PROFILING_N_PLUS_ONE_THRESHOLD = int(os.getenv("PROFILING_N_PLUS_ONE_THRESHOLD", "10"))
+
+request_seconds = Histogram(
+    "http_request_duration_seconds", "Wall time per request, until the response was sent.",
+    ("method", "route", "status"),
+)
+request_sql_statements = Histogram(
+    "http_request_sql_statements", "SQL statements executed per request.",
+    ("method", "route"), buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500),
+)
+request_sql_seconds = Histogram(
+    "http_request_sql_seconds", "Time per request spent executing SQL.", ("method", "route")
+)
+request_serialization_seconds = Histogram(
+    "http_request_serialization_seconds", "Time per request spent validating and rendering the response body.",
+    ("method", "route"),
+)
+n_plus_one_requests = Counter(
+    "http_request_n_plus_one_total", "Requests that repeated one SQL statement PROFILING_N_PLUS_ONE_THRESHOLD times.",
+    ("method", "route"),
+)
+
+# A parenthesized list of two or more bound parameters: ?, $1 or %(name)s placeholders
+EXPANDED_LIST = re.compile(r"\(\s*(?:\?|\$\d+|%\(\w+\)s)(?:\s*,\s*(?:\?|\$\d+|%\(\w+\)s))+\s*\)")
+
+_current = ContextVar("request_stats", default=None)
+_profiling = False
+
+
+class RequestStats:
+    __slots__ = ("sql_count", "sql_seconds", "statements", "phases", "endpoint_returned")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.statements = StatementCounter()  # Only statements that are not set-based
+        self.phases = {}
+        self.endpoint_returned = None
+
+    def add_phase(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+def current_stats():
+    """The RequestStats of the request being handled, or ``None`` outside a request."""
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str):
+    """Time a block of the current request under ``name``; reported in Server-Timing."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_phase(name, time.perf_counter() - started)
+
+
+@contextmanager
+def attribute_to(stats):
+    """Count the block's SQL and phases towards ``stats`` (a request's RequestStats, or ``None``)."""
+    token = _current.set(stats)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+# SQL Instrumentation (Every Engine; Only Statements Run on Behalf of a Request Are Counted)
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profiling_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("profiling_started")
+    if stats is None or not started:
+        return
+    stats.sql_count += 1
+    stats.sql_seconds += time.perf_counter() - started.pop()
+    if not EXPANDED_LIST.search(statement):
+        stats.statements[statement] += 1
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection is not None and exception_context.connection.info.get("profiling_started")
+    if started:
+        started.pop()
+
+
+def instrument():
+    """Attach the SQL listeners to every Engine (idempotent)."""
+    for name, listener in (
+        ("before_cursor_execute", _before_cursor_execute),
+        ("after_cursor_execute", _after_cursor_execute),
+        ("handle_error", _handle_error),
+    ):
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+
+
+# Serialization Timing (Between the Endpoint Returning and the Response Being Built)
+def _mark_endpoint_returned():
+    stats = _current.get()
+    if stats is not None:
+        stats.endpoint_returned = time.perf_counter()
+
+
+def _timed_endpoint(endpoint):
+    if inspect.iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def timed(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_returned()
+    else:
+        @wraps(endpoint)
+        def timed(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_returned()
+    return timed
+
+
+class ProfiledRoute(APIRoute):
+    """Route class that times response serialization separately from the endpoint."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request):
+            response = await handler(request)
+            stats = _current.get()
+            if stats is not None and stats.endpoint_returned is not None:
+                stats.add_phase("serialize", time.perf_counter() - stats.endpoint_returned)
+            return response
+
+        return profiled_handler
+
+
+# Middleware
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "<unmatched>"
+
+
+def server_timing(stats: RequestStats, elapsed: float) -> str:
+    entries = [f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.sql_count} queries"']
+    entries.extend(f"{name};dur={seconds * 1000:.2f}" for name, seconds in stats.phases.items())
+    entries.append(f"total;dur={elapsed * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def _record(scope, stats: RequestStats, status: int, elapsed: float):
+    method, route = scope["method"], _route_label(scope)
+    request_seconds.observe(elapsed, method=method, route=route, status=str(status))
+    request_sql_statements.observe(stats.sql_count, method=method, route=route)
+    request_sql_seconds.observe(stats.sql_seconds, method=method, route=route)
+    if "serialize" in stats.phases:
+        request_serialization_seconds.observe(stats.phases["serialize"], method=method, route=route)
+
+    repeated = [(count, statement) for statement, count in stats.statements.items()
+                if count >= PROFILING_N_PLUS_ONE_THRESHOLD]
+    if repeated:
+        n_plus_one_requests.inc(method=method, route=route)
+        for count, statement in repeated:
+            logger.warning(
+                "Possible N+1 query in %s %s: %d executions of %s", method, route, count, " ".join(statement.split())
+            )
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if REQUEST_PROFILING_ENABLED and not _profiling and any(
+            name == REQUEST_PROFILING_HEADER for name, _ in scope["headers"]
+        ):
+            await self._profile(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing = server_timing(stats, time.perf_counter() - started).encode("latin-1")
+                message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", timing)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            _record(scope, stats, status, time.perf_counter() - started)
+
+    async def _profile(self, scope, receive, send):
+        """Run one request under a profiler and answer with the report."""
+        global _profiling
+        _profiling = True
+        status = 500
+
+        async def discard_response(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        try:
+            if REQUEST_PROFILER == "pyinstrument":
+                try:
+                    from pyinstrument import Profiler
+                except ImportError as exc:
+                    raise RuntimeError("REQUEST_PROFILER=pyinstrument needs the 'pyinstrument' package installed") from exc
+                profiler = Profiler(async_mode="enabled")
+                profiler.start()
+                try:
+                    await self.app(scope, receive, discard_response)
+                finally:
+                    profiler.stop()
+                body, media_type = profiler.output_html().encode(), b"text/html; charset=utf-8"
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, discard_response)
+                finally:
+                    profiler.disable()
+                report = io.StringIO()
+                pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(REQUEST_PROFILE_LINES)
+                body, media_type = report.getvalue().encode(), b"text/plain; charset=utf-8"
+        finally:
+            _profiling = False
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", media_type),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profiled-status", str(status).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,208 @@
+"""Rate limits and admission control for the endpoints a ticket drop hammers.
+
+``admission(route)`` is a route dependency. It first takes a token from the
+caller's buckets: one per client IP and, where the route has one, one per token
+subject. A caller with an empty bucket is answered 429 with a Retry-After
+header. Admitted requests then pass a global concurrency gate. Past
+ADMISSION_MAX_INFLIGHT guarded requests in flight, new ones are shed with 429
+before they reach bcrypt or the write path, rather than queueing until they
+time out. ``admission_requests_total`` counts accepted, rate-limited and shed
+requests per route.
+
+Limits are ``capacity/seconds`` specs, e.g. RATE_LIMIT_LOGIN_PER_IP=20/60 (a
+burst of 20, refilled at 20 per minute); ``0`` turns a limit off. Buckets live
+in worker memory by default. RATE_LIMIT_BACKEND=redis shares them between
+workers, as fixed-window counters (INCR/EXPIRE need no server-side
+scripting). ``local-redis`` runs that code path against an in-process stand-in.
+"""
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request
+
+from app.cache import LocalRedis, TTLCache
+from app.metrics import Counter
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "64"))  # 0 turns the gate off
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+admission_requests = Counter(
+    "admission_requests_total", "Guarded requests by route and outcome (accepted, rate_limited or shed).",
+    ("route", "outcome"),
+)
+
+
+@dataclass(frozen=True)
+class Limit:
+    capacity: int
+    period: float  # Seconds to refill an empty bucket
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+def parse_limit(spec: str):
+    """``"20/60"`` -> Limit(20, 60.0); ``"0"`` or ``""`` -> ``None`` (unlimited)."""
+    capacity, _, period = spec.partition("/")
+    if not capacity.strip() or int(capacity) <= 0:
+        return None
+    return Limit(int(capacity), float(period or 60))
+
+
+def _limit(name: str, default: str):
+    return parse_limit(os.getenv(name, default))
+
+
+# Per route: bucket kind ("ip" or "subject") -> Limit
+LIMITS = {
+    "login": {"ip": _limit("RATE_LIMIT_LOGIN_PER_IP", "20/60")},
+    "signup": {"ip": _limit("RATE_LIMIT_SIGNUP_PER_IP", "10/60")},
+    "event_register": {
+        "ip": _limit("RATE_LIMIT_EVENT_REGISTER_PER_IP", "300/60"),  # Venues share an address behind NAT
+        "subject": _limit("RATE_LIMIT_EVENT_REGISTER_PER_SUBJECT", "10/60"),
+    },
+}
+
+
+class MemoryBuckets:
+    """Token buckets in a bounded in-process map; each worker limits on its own."""
+
+    def __init__(self, maxsize: int = 100_000):
+        self._buckets = TTLCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit) -> float:
+        """Take a token; returns 0 when admitted, else the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key) or (limit.capacity, now)
+            tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+            admitted = tokens >= 1
+            if admitted:
+                tokens -= 1
+            self._buckets.set(key, (tokens, now), ttl=limit.period)  # A full bucket needs no entry
+        return 0.0 if admitted else (1 - tokens) / limit.rate
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class SharedBuckets:
+    """Fixed-window counters over a redis-py style client, shared by every worker.
+
+    Each window of ``limit.period`` seconds admits ``limit.capacity`` requests;
+    INCR is atomic on the server, so workers never admit more between them.
+    """
+
+    def __init__(self, client, prefix: str = "event-api:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    def take(self, key: str, limit: Limit) -> float:
+        now = time.time()
+        window = int(now // limit.period)
+        name = f"{self.prefix}{key}:{window}"
+        count = int(self.client.incr(name))
+        if count == 1:
+            self.client.expire(name, math.ceil(limit.period) + 1)
+        return 0.0 if count <= limit.capacity else (window + 1) * limit.period - now
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def build_buckets(name: str, url: str = None):
+    """Create a bucket store: ``memory`` (default), ``redis`` (needs the redis package) or ``local-redis``."""
+    if name == "memory":
+        return MemoryBuckets()
+    if name == "local-redis":
+        return SharedBuckets(LocalRedis())
+    if name == "redis":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("The redis rate-limit backend needs the 'redis' package installed") from exc
+        return SharedBuckets(redis.Redis.from_url(url or "redis://localhost:6379/0"))
+    raise ValueError(f"Unknown rate-limit backend: {name}")
+
+
+buckets = build_buckets(os.getenv("RATE_LIMIT_BACKEND", "memory"), url=os.getenv("RATE_LIMIT_URL"))
+
+
+class ConcurrencyGate:
+    """Counts guarded requests in flight; refuses entry past ``limit`` (0 = no limit)."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+    def try_enter(self) -> bool:
+        with self._lock:
+            if self.limit and self.inflight >= self.limit:
+                return False
+            self.inflight += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self.inflight -= 1
+
+
+gate = ConcurrencyGate(ADMISSION_MAX_INFLIGHT)
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _too_many(detail: str, retry_after: float):
+    return HTTPException(
+        status_code=429, detail=detail, headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+def admission(route: str, subject=None):
+    """Dependency guarding ``route``: rate limits, then the concurrency gate.
+
+    ``subject(request)`` returns the caller's verified token subject, or
+    ``None`` (no subject bucket is used then).
+    """
+    limits = LIMITS[route]
+
+    async def admit(request: Request):
+        if RATE_LIMIT_ENABLED:
+            keys = {"ip": client_ip(request)}
+            if subject is not None and limits.get("subject") is not None:
+                keys["subject"] = subject(request)
+            for kind, identity in keys.items():
+                limit = limits.get(kind)
+                if limit is None or identity is None:
+                    continue
+                retry_after = buckets.take(f"{route}:{kind}:{identity}", limit)
+                if retry_after:
+                    admission_requests.inc(route=route, outcome="rate_limited")
+                    raise _too_many("Too many requests, please retry later", retry_after)
+
+        if not gate.try_enter():
+            admission_requests.inc(route=route, outcome="shed")
+            raise _too_many("Server is busy, please retry shortly", ADMISSION_RETRY_AFTER)
+        admission_requests.inc(route=route, outcome="accepted")
+        try:
+            yield
+        finally:
+            gate.leave()
+
+    return admit
@@ -0,0 +1,45 @@
+"""JSON rendering for rows we read from our own tables.
+
+Listing endpoints build plain dicts from the selected columns and render them
+here instead of returning them through a response_model: the values come
+straight from typed columns, so the per-row Pydantic validation (including
+EmailStr checks) and ``jsonable_encoder`` pass FastAPI would run buys nothing.
+
+``dumps`` uses orjson when it is installed and pydantic-core's serializer
+otherwise (JSON_RENDERER=auto, orjson or pydantic); both emit datetimes as ISO
+8601, like ``jsonable_encoder``.
+"""
+import os
+
+from fastapi.responses import JSONResponse, Response
+from pydantic_core import to_json
+
+JSON_RENDERER = os.getenv("JSON_RENDERER", "auto")
+
+
+def _load_dumps(name: str):
+    if name in ("auto", "orjson"):
+        try:
+            import orjson
+        except ImportError as exc:
+            if name == "orjson":
+                raise RuntimeError("JSON_RENDERER=orjson needs the 'orjson' package installed") from exc
+        else:
+            return orjson.dumps
+    return to_json
+
+
+dumps = _load_dumps(JSON_RENDERER)  # obj -> compact UTF-8 JSON bytes
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with ``dumps``."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class RenderedJSONResponse(Response):
+    """A response for a body that is already JSON text (e.g. from the event cache)."""
+
+    media_type = "application/json"
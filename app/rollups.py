@@ -0,0 +1,186 @@
+"""Per-event and per-organizer analytics rollups.
+
+The register, cancel, promotion, check-in and event-creation write paths call
+the ``record_*`` functions inside their own transactions, so the rollups move
+in step with the rows they summarize. ``/organizers/me/stats`` then reads one
+totals row plus a bounded range of daily rows, however many events and
+attendees the organizer has.
+
+``rebuild_statements()`` recomputes all three tables from events and
+registrations in one set-based pass (see ``rebuild_stats.py``); use it after a
+bulk import or to check the incremental counts against the source rows.
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Integer, cast, delete, func, insert, literal, select, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Event, EventRegistration, EventStats, OrganizerDailyStats, OrganizerStats
+
+
+def today() -> date:
+    return datetime.utcnow().date()  # Matches registered_at / checked_in_at, which are UTC
+
+
+async def _bump(db: AsyncSession, model, key: dict, deltas: dict):
+    """Add ``deltas`` to the rollup row at ``key``, creating it when missing."""
+    table = model.__table__
+    changed = await db.execute(
+        update(table)
+        .where(*(table.c[name] == value for name, value in key.items()))
+        .values({name: table.c[name] + delta for name, delta in deltas.items()})
+    )
+    if not changed.rowcount:
+        await db.execute(insert(table).values(**key, **deltas))
+
+
+async def organizer_of(db: AsyncSession, event_id: int):
+    return await db.scalar(select(Event.organizer_id).where(Event.event_id == event_id))
+
+
+async def record_events(db: AsyncSession, organizer_id: int, event_ids):
+    """New events: a zeroed stats row each, counted towards their organizer.
+
+    A row left over from a deleted event whose id is reused is reset, not
+    collided with.
+    """
+    if not event_ids:
+        return
+    dialect_insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert  # Both upsert alike
+    statement = dialect_insert(EventStats)
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[EventStats.event_id],
+            set_={"organizer_id": statement.excluded.organizer_id, "registrations": 0, "check_ins": 0},
+        ),
+        [
+            {"event_id": event_id, "organizer_id": organizer_id, "registrations": 0, "check_ins": 0}
+            for event_id in event_ids
+        ],
+    )
+    await _bump(db, OrganizerStats, {"organizer_id": organizer_id}, {"events": len(event_ids)})
+
+
+async def _record(db: AsyncSession, event_id: int, organizer_id: int, field: str, count: int, day: date = None):
+    if not count:
+        return
+    if organizer_id is None:
+        organizer_id = await organizer_of(db, event_id)
+    await _bump(db, EventStats, {"event_id": event_id, "organizer_id": organizer_id}, {field: count})
+    await _bump(db, OrganizerStats, {"organizer_id": organizer_id}, {field: count})
+    if day is not None:
+        await _bump(db, OrganizerDailyStats, {"organizer_id": organizer_id, "day": day}, {field: count})
+
+
+async def record_registrations(db: AsyncSession, event_id: int, count: int, organizer_id: int = None, day: date = None):
+    """``count`` registrations made (or, negative, cancelled) on ``day`` (default: today)."""
+    await _record(db, event_id, organizer_id, "registrations", count, day or today())
+
+
+async def record_check_ins(db: AsyncSession, event_id: int, count: int, organizer_id: int = None, day: date = None):
+    """``count`` check-ins made (or, negative, undone) on ``day`` (default: today)."""
+    await _record(db, event_id, organizer_id, "check_ins", count, day or today())
+
+
+async def undo_check_in(db: AsyncSession, event_id: int, organizer_id: int, checked_in_at):
+    """Take back one check-in, off the day it was made (check-ins from before dates were kept only count in totals)."""
+    if checked_in_at is None:
+        await _record(db, event_id, organizer_id, "check_ins", -1)
+    else:
+        await record_check_ins(db, event_id, -1, organizer_id, checked_in_at.date())
+
+
+# Reads
+def _rate(part: int, whole: int):
+    return round(part / whole, 4) if whole else None
+
+
+async def get_organizer_stats(db: AsyncSession, organizer_id: int, days: int):
+    """Totals plus the last ``days`` days (oldest first, days without activity omitted)."""
+    totals = (await db.execute(
+        select(OrganizerStats.events, OrganizerStats.registrations, OrganizerStats.check_ins)
+        .where(OrganizerStats.organizer_id == organizer_id)
+    )).first()
+    events, registrations, check_ins = totals or (0, 0, 0)
+    daily = (await db.execute(
+        select(OrganizerDailyStats.day, OrganizerDailyStats.registrations, OrganizerDailyStats.check_ins)
+        .where(OrganizerDailyStats.organizer_id == organizer_id, OrganizerDailyStats.day > today() - timedelta(days=days))
+        .order_by(OrganizerDailyStats.day)
+    )).all()
+    return {
+        "organizer_id": organizer_id,
+        "events": events,
+        "registrations": registrations,
+        "check_ins": check_ins,
+        "check_in_rate": _rate(check_ins, registrations),
+        "daily": [
+            {"day": day.isoformat(), "registrations": day_registrations, "check_ins": day_check_ins}
+            for day, day_registrations, day_check_ins in daily
+        ],
+    }
+
+
+async def get_event_stats_page(db: AsyncSession, organizer_id: int, limit: int, after: int = None):
+    """One page of an organizer's per-event stats, in event id order; ``after`` is the last id seen."""
+    query = (
+        select(EventStats.event_id, Event.name, Event.max_attendees, EventStats.registrations, EventStats.check_ins)
+        .join(Event, Event.event_id == EventStats.event_id)
+        .where(EventStats.organizer_id == organizer_id)
+        .order_by(EventStats.event_id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        query = query.where(EventStats.event_id > after)
+    rows = (await db.execute(query)).all()
+    items = [
+        {
+            "event_id": event_id, "name": name, "max_attendees": max_attendees,
+            "registrations": registrations, "check_ins": check_ins,
+            "registration_rate": _rate(registrations, max_attendees), "check_in_rate": _rate(check_ins, registrations),
+        }
+        for event_id, name, max_attendees, registrations, check_ins in rows[:limit]
+    ]
+    return {"items": items, "next_cursor": items[-1]["event_id"] if len(rows) > limit else None}
+
+
+# Rebuild (One Transaction; Each Table Is Filled by a Single INSERT ... SELECT)
+def rebuild_statements():
+    registrations = func.count(EventRegistration.attendee_id)
+    check_ins = func.coalesce(func.sum(cast(EventRegistration.check_in_status, Integer)), 0)
+    per_event = (
+        select(Event.event_id, Event.organizer_id, registrations, check_ins)
+        .select_from(Event)
+        .outerjoin(EventRegistration, EventRegistration.event_id == Event.event_id)
+        .group_by(Event.event_id, Event.organizer_id)
+    )
+    per_organizer = (
+        select(
+            EventStats.organizer_id, func.count(), func.sum(EventStats.registrations), func.sum(EventStats.check_ins)
+        )
+        .group_by(EventStats.organizer_id)
+    )
+    activity = union_all(
+        select(
+            Event.organizer_id, func.date(EventRegistration.registered_at).label("day"),
+            literal(1).label("registrations"), literal(0).label("check_ins"),
+        ).join(Event, Event.event_id == EventRegistration.event_id),
+        select(
+            Event.organizer_id, func.date(EventRegistration.checked_in_at).label("day"),
+            literal(0).label("registrations"), literal(1).label("check_ins"),
+        ).join(Event, Event.event_id == EventRegistration.event_id)
+        .where(EventRegistration.check_in_status.is_(True), EventRegistration.checked_in_at.is_not(None)),
+    ).subquery()
+    per_day = (
+        select(activity.c.organizer_id, activity.c.day, func.sum(activity.c.registrations), func.sum(activity.c.check_ins))
+        .group_by(activity.c.organizer_id, activity.c.day)
+    )
+    return [
+        delete(OrganizerDailyStats),
+        delete(OrganizerStats),
+        delete(EventStats),
+        insert(EventStats).from_select(["event_id", "organizer_id", "registrations", "check_ins"], per_event),
+        insert(OrganizerStats).from_select(["organizer_id", "events", "registrations", "check_ins"], per_organizer),
+        insert(OrganizerDailyStats).from_select(["organizer_id", "day", "registrations", "check_ins"], per_day),
+    ]
+
@@ -1,38 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr
-from app.database import get_db
-from app.models import User, Attendee  # Import both user types
+from app.cache import TTLCache
+from app.database import get_db, run_write
+from app.hashing import hash_password, verify_password
+from app.metrics import Counter
+from app.models import User, Attendee, TokenVersion  # Import both user types
+from app.profiling import ProfiledRoute, phase
+from app.ratelimit import admission
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=ProfiledRoute)
 
 # Load environment variables
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
-# Password hashing setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -40,26 +36,154 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_user_by_email(db: Session, email: str):
-    """Fetch user (Organizer or Attendee) by email."""
-    user = db.query(User).filter(User.email == email).first()
-    if user:
-        return user
-    return db.query(Attendee).filter(Attendee.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str, role: str = None):
+    """Fetch user (Organizer or Attendee) by email, probing only `role`'s table when known."""
+    if role != "attendee":
+        user = await db.scalar(select(User).where(User.email == email))
+        if user or role == "organizer":
+            return user
+    return await db.scalar(select(Attendee).where(Attendee.email == email))
+
+
+def role_of(user) -> str:
+    return "organizer" if isinstance(user, User) else "attendee"
+
+
+ROLES = ("organizer", "attendee")
+
+
+# Verified principals. Tokens from /auth/login carry the principal's id, role and token
+# version as claims, so only the (cached) version is checked per request; tokens without
+# a version claim are resolved by email through the principal cache instead.
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    role: str
+
+
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+principal_cache = TTLCache(maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")), ttl=PRINCIPAL_CACHE_TTL)
+
+principal_cache_requests = Counter(
+    "principal_cache_requests_total", "Principal cache lookups by result.", ["result"]
+)
+principal_lookup_seconds = Counter(
+    "principal_lookup_seconds_total", "Time spent loading principals from the database on cache misses."
+)
+principal_saved_seconds = Counter(
+    "principal_cache_saved_seconds_total", "Estimated database time saved by principal cache hits."
+)
+
+# Other workers see a revocation once their cached version expires
+TOKEN_VERSION_CACHE_TTL = float(os.getenv("TOKEN_VERSION_CACHE_TTL", str(PRINCIPAL_CACHE_TTL)))
+token_version_cache = TTLCache(maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")), ttl=TOKEN_VERSION_CACHE_TTL)
+
+token_version_requests = Counter(
+    "token_version_cache_requests_total", "Token version cache lookups by result.", ["result"]
+)
+
+
+def invalidate_principal(email: str):
+    """Drop cached principals for `email`; call whenever a user or attendee changes."""
+    for role in ("organizer", "attendee", None):
+        principal_cache.delete((role, email))
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+@event.listens_for(Attendee, "after_update")
+@event.listens_for(Attendee, "after_delete")
+def _invalidate_changed_principal(mapper, connection, target):
+    state = inspect(target)
+    if state.deleted or any(
+        state.attrs[name].history.has_changes() for name in ("id", "email", "password")
+    ):
+        invalidate_principal(target.email)
+        email_history = state.attrs.email.history
+        for previous_email in email_history.deleted or ():
+            invalidate_principal(previous_email)
+        for principal_id in {target.id, *(state.attrs.id.history.deleted or ())}:
+            _bump_token_version(connection, role_of(target), principal_id)
+
+
+def _bump_token_version(connection, role: str, principal_id: int):
+    """Revoke every token issued to the principal so far, in the flush that changed it."""
+    table = TokenVersion.__table__
+    changed = connection.execute(
+        update(table)
+        .where(table.c.role == role, table.c.principal_id == principal_id)
+        .values(version=table.c.version + 1)
+    )
+    if not changed.rowcount:
+        connection.execute(insert(table).values(role=role, principal_id=principal_id, version=1))
+    token_version_cache.delete((role, principal_id))
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def token_version(db: AsyncSession, role: str, principal_id: int) -> int:
+    key = (role, principal_id)
+    version = token_version_cache.get(key)
+    if version is not None:
+        token_version_requests.inc(result="hit")
+        return version
+
+    token_version_requests.inc(result="miss")
+    version = await db.scalar(
+        select(TokenVersion.version).where(TokenVersion.role == role, TokenVersion.principal_id == principal_id)
+    ) or 0
+    token_version_cache.set(key, version)
+    return version
+
+
+async def principal_from_claims(db: AsyncSession, claims: dict):
+    """The principal a token's claims name, or ``None`` once its version has been revoked."""
+    principal_id, role, version = claims.get("id"), claims.get("role"), claims.get("ver")
+    if role not in ROLES or not isinstance(principal_id, int) or not isinstance(version, int):
+        return None
+    if await token_version(db, role, principal_id) != version:
+        return None
+    return Principal(id=principal_id, email=claims["sub"], role=role)
+
+
+async def load_principal(db: AsyncSession, email: str, role: str = None):
+    key = (role, email)
+    principal = principal_cache.get(key)
+    if principal is not None:
+        principal_cache_requests.inc(result="hit")
+        misses = principal_cache_requests.value(result="miss")
+        if misses:
+            principal_saved_seconds.inc(principal_lookup_seconds.value() / misses)
+        return principal
+
+    principal_cache_requests.inc(result="miss")
+    started = time.perf_counter()
+    user = await get_user_by_email(db, email, role)
+    principal_lookup_seconds.inc(time.perf_counter() - started)
+    if user is None:
+        return None
+
+    principal = Principal(id=user.id, email=user.email, role=role_of(user))
+    principal_cache.set(key, principal)
+    return principal
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with phase("jwt"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        user = get_user_by_email(db, email)
+        with phase("principal"):
+            if "ver" in payload:
+                user = await principal_from_claims(db, payload)
+            else:  # Issued before tokens carried claims
+                user = await load_principal(db, email, payload.get("role"))
         if user is None:
             raise credentials_exception
         return user
@@ -67,6 +191,34 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         raise credentials_exception
 
 
+def ensure_role(principal: Principal, role: str, detail: str = None) -> Principal:
+    if principal.role != role:
+        raise HTTPException(status_code=403, detail=detail or f"Only {role}s can do this")
+    return principal
+
+
+def require_role(role: str, detail: str = None):
+    """Dependency for the current principal, answering 403 unless it has ``role`` (read from its claims)."""
+    async def dependency(current_user: Principal = Depends(get_current_user)) -> Principal:
+        return ensure_role(current_user, role, detail)
+    return dependency
+
+
+require_organizer = require_role("organizer")
+require_attendee = require_role("attendee")
+
+
+def token_subject(request: Request):
+    """The verified ``sub`` of the request's bearer token, or ``None``; keys per-user rate limits."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+
 # Use Pydantic for structured input
 class RegisterUserRequest(BaseModel):
     first_name: str
@@ -79,13 +231,14 @@ class RegisterUserRequest(BaseModel):
         use_enum_values = True
 
 
-@router.post("/register")
-def register_user(user: RegisterUserRequest, db: Session = Depends(get_db)):
-    existing_user = get_user_by_email(db, user.email)
+@router.post("/register", dependencies=[Depends(admission("signup"))])
+async def register_user(user: RegisterUserRequest, db: AsyncSession = Depends(get_db)):
+    existing_user = await get_user_by_email(db, user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = get_password_hash(user.password)
+    await db.rollback()  # Hand the pooled connection back while bcrypt runs
+    hashed_password = await hash_password(user.password)
 
     if user.role == "organizer":
         new_user = User(
@@ -100,31 +253,43 @@ def register_user(user: RegisterUserRequest, db: Session = Depends(get_db)):
             email=user.email,
             password=hashed_password,  # Store hashed password
             phone_number="",
-            check_in_status=False,
         )
     else:
         raise HTTPException(status_code=400, detail="Invalid role. Choose 'organizer' or 'attendee'.")
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    async def add_user(session):
+        session.add(new_user)
+
+    await run_write(db, add_user)
 
     return {"message": f"User registered successfully as {user.role}"}
 
 
-@router.post("/login")
-def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = get_user_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.password):  # password check
+@router.post("/login", dependencies=[Depends(admission("login"))])
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await get_user_by_email(db, form_data.username)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+
+    user_id, email, hashed_password, role = user.id, user.email, user.password, role_of(user)
+    version = await token_version(db, role, user_id)
+    await db.rollback()  # Hand the pooled connection back while bcrypt runs
+
+    valid, new_hash = await verify_password(form_data.password, hashed_password)  # password check
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    role = "organizer" if isinstance(user, User) else "attendee"
-    access_token = create_access_token(data={"sub": user.email, "role": role})
+    if new_hash:  # Stored hash predates the current cost settings; same password, so tokens stay valid
+        model = type(user)
+        await run_write(db, lambda session: session.execute(
+            update(model).where(model.id == user_id).values(password=new_hash)
+        ))
+
+    access_token = create_access_token(data={"sub": email, "id": user_id, "role": role, "ver": version})
     
     return {"access_token": access_token, "token_type": "bearer", "role": role}
 
 
 @router.get("/me")
-def get_logged_in_user(current_user = Depends(get_current_user)):
-    role = "organizer" if isinstance(current_user, User) else "attendee"
-    return {"id": current_user.id, "email": current_user.email, "role": role}
+async def get_logged_in_user(current_user: Principal = Depends(get_current_user)):
+    return {"id": current_user.id, "email": current_user.email, "role": current_user.role}
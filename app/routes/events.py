@@ -1,85 +1,207 @@
-import csv
-from io import StringIO
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Event, User, Attendee
-from app.schemas import EventCreate, EventResponse, EventUpdate, AttendeeCreate, AttendeeResponse
+import json
+import shutil
+import uuid
+from io import BytesIO
+from fastapi import APIRouter, Body, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal, get_db, run_write
+from app import idempotency, jobs, live
+from app.models import Event, User, Attendee, BulkCheckInJob
+from app.schemas import (
+    EventBatchResult, EventCreate, EventPage, EventResponse, EventUpdate, AttendeeCreate, AttendeeResponse, BulkCheckInJobResponse,
+    WaitlistStatus
+)
 from app.crud import (
-    bulk_check_in_attendees, create_event, get_events, get_event_by_id, update_event, 
-    register_attendee, check_in_attendee, get_attendees
+    ATTENDEE_RESPONSE_COLUMNS, ATTENDEE_RESPONSE_FIELDS, DEFAULT_PAGE_SIZE, EVENT_BATCH_MAX_ITEMS, MAX_PAGE_SIZE, check_in_batch, create_event,
+    create_events_batch, update_events_batch, get_bulk_check_in_event,
+    get_events_page, get_event_snapshot, to_utc_naive, update_event, register_attendee, check_in_attendee, get_attendees,
+    iter_attendee_batches, iter_attendee_rows, cancel_registration, get_waitlist_status
+)
+from app.profiling import ProfiledRoute
+from app.rendering import FastJSONResponse, RenderedJSONResponse
+from app.ratelimit import admission
+from app.routes.auth import (
+    Principal, ensure_role, get_current_user, oauth2_scheme, require_attendee, require_role, token_subject
 )
-from app.routes.auth import get_current_user
-from typing import List, Optional
+from app.streaming import arrow_available, iter_arrow, iter_csv, iter_json_array, iter_ndjson, iter_upload_batches
+from datetime import datetime
+from typing import Any, List, Optional
 
-router = APIRouter(prefix="/events", tags=["Events"])
+router = APIRouter(prefix="/events", tags=["Events"], route_class=ProfiledRoute)
 
 # 1️. Create Event (Only Organizers Can Create Events)
 @router.post("/", response_model=EventResponse)
-def create_new_event(
+async def create_new_event(
     event: EventCreate, 
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db), 
+    current_user: Principal = Depends(require_role("organizer", "Only organizers can create events"))
 ):
-    if current_user.role != "organizer":
-        raise HTTPException(status_code=403, detail="Only organizers can create events")
-    
-    return create_event(db, event, current_user.id)
+    return await create_event(db, event, current_user.id)
 
 # 2️. Update Event (Only Event Organizer Can Update)
 @router.put("/{event_id}", response_model=EventResponse)
-def update_event_details(
+async def update_event_details(
     event_id: int,
     event_update: EventUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_role("organizer", "Not authorized to update this event"))
 ):
-    db_event = get_event_by_id(db, event_id)
+    db_event = await get_event_snapshot(db, event_id)
     
     if not db_event:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    if db_event.organizer_id != current_user.id:
+    if db_event["organizer_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to update this event")
 
-    return update_event(db, db_event, event_update)
+    updated = await update_event(db, event_id, event_update)
+    if updated is None:  # Deleted since the snapshot was read
+        raise HTTPException(status_code=404, detail="Event not found")
+    live.counters.set_capacity(event_id, updated.max_attendees)
+    return updated
 
-# 3️. Register Attendee (Anyone Can Register)
-@router.post("/{event_id}/register", response_model=AttendeeResponse)
-def register_for_event(
+# 3️. Register Attendee (Attendees Only; a Full Event Answers 202 with a Waitlist Place)
+@router.post(
+    "/{event_id}/register", response_model=AttendeeResponse,
+    responses={202: {"model": WaitlistStatus, "description": "Event is full; the attendee was waitlisted"}},
+    dependencies=[Depends(admission("event_register", subject=token_subject))],
+)
+async def register_for_event(
     event_id: int, 
-    db: Session = Depends(get_db),
-    current_user: Attendee = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_role("attendee", "Only attendees can register for events"))
 ):
-    return register_attendee(db, event_id, current_user)
+    registration = await run_write(db, lambda session: register_attendee(session, event_id, current_user))
+    if "position" in registration:
+        return FastJSONResponse(registration, status_code=202)
+    live.counters.add(event_id, registered=1)
+    return registration
 
-# 4️. Check-in Attendee (Only Registered Attendees Can Check-in)
+# 4️. Check-in Attendee (Only Registered Attendees Can Check-in; Retries Are Answered from the Idempotency Store)
 @router.post("/{event_id}/check-in")
-def check_in(
-    event_id: int, 
-    db: Session = Depends(get_db), 
-    current_user: Attendee = Depends(get_current_user)
+async def check_in(
+    event_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme),  # Authenticated below, so a replayed retry skips the lookup
+    idempotency_key: Optional[str] = Header(None, max_length=idempotency.IDEMPOTENCY_KEY_MAX_LENGTH)
 ):
-    return check_in_attendee(db, event_id, current_user)
+    key = idempotency.request_key(token, request.method, request.url.path, idempotency_key)
+
+    async def handle():
+        current_user = ensure_role(await get_current_user(token, db), "attendee", "Only attendees can check in")
+
+        async def operation(session):
+            result = await check_in_attendee(session, event_id, current_user)
+            if idempotency_key:
+                await idempotency.record(session, key, result)
+            return result
+
+        result = await run_write(db, operation)
+        live.counters.add(event_id, checked_in=1)
+        return result
+
+    return await idempotency.respond(
+        db, key, handle, durable=idempotency_key is not None,
+        ttl=None if idempotency_key else idempotency.CHECK_IN_COALESCE_SECONDS,
+    )
 
-# 5️. List Events (With Filters)
-@router.get("/", response_model=List[EventResponse])
-def list_all_events(
-    db: Session = Depends(get_db),
+# 5️. List Events (With Filters, Time Windows and Search, Cursor-Paginated, Cached with ETags)
+def _etag_response(request: Request, body: str, etag: str) -> Response:
+    """Send the cached, already rendered body, or 304 when the client already holds it."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers={"ETag": etag})
+    return RenderedJSONResponse(body, headers={"ETag": etag})
+
+
+@router.get("/", response_model=EventPage)
+async def list_all_events(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     status: Optional[str] = None,
     location: Optional[str] = None,
-    date: Optional[str] = None
+    date: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=200),  # Ranked prefix search over name, description and location
+    start: Optional[datetime] = None,  # Events still running after this time...
+    end: Optional[datetime] = None,  # ...that have started by this one
+    now: bool = False  # Shorthand for start=end=<current UTC time>: events under way right now
 ):
-    return get_events(db, status=status, location=location, date=date)
+    if now:
+        if start is not None or end is not None:
+            raise HTTPException(status_code=400, detail="now cannot be combined with start or end")
+        start = end = datetime.utcnow().replace(microsecond=0)  # Per-second, so the page cache still helps
+    start = start and to_utc_naive(start)
+    end = end and to_utc_naive(end)
+    if start is not None and end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+
+    entry = await get_events_page(
+        db, status=status, location=location, date=date, limit=limit, cursor=cursor, q=q, start=start, end=end
+    )
+    return _etag_response(request, entry["body"], entry["etag"])
+
+
+@router.get("/{event_id}", response_model=EventResponse)
+async def get_event(event_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    entry = await get_event_snapshot(db, event_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return _etag_response(request, entry["body"], entry["etag"])
+
+# 6️. List Attendees (With Filters, Optionally Streamed)
+STREAM_FORMATS = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
 
-# 6️. List Attendees (With Filters)
 @router.get("/{event_id}/attendees", response_model=List[AttendeeResponse])
-def list_event_attendees(
+async def list_event_attendees(
     event_id: int, 
-    db: Session = Depends(get_db),
-    check_in_status: Optional[bool] = None
+    db: AsyncSession = Depends(get_db),
+    check_in_status: Optional[bool] = None,
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$"),  # Stream rows instead of buffering
+    fields: Optional[str] = None  # Comma-separated projection, e.g. "email,check_in_status"
 ):
-    return get_attendees(db, event_id, check_in_status)
+    if format is None and fields is None:
+        rows = await get_attendees(db, event_id, check_in_status)
+        return FastJSONResponse([dict(zip(ATTENDEE_RESPONSE_FIELDS, row)) for row in rows])
+
+    selected = _attendee_fields(fields, ATTENDEE_RESPONSE_FIELDS)
+    format = format or "json"
+    render = iter_ndjson if format == "ndjson" else iter_json_array
+    return StreamingResponse(
+        render(_stream_attendee_rows(event_id, check_in_status, selected)),
+        media_type=STREAM_FORMATS[format],
+    )
+
+
+def _attendee_fields(fields: Optional[str], default):
+    """Parse a comma-separated ``fields`` projection (``default`` when absent)."""
+    if fields is None:
+        return default
+    selected = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in selected if field not in ATTENDEE_RESPONSE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown attendee fields: {', '.join(unknown)}")
+    if not selected:
+        raise HTTPException(status_code=400, detail="fields must name at least one attendee field")
+    return selected
+
+
+async def _stream_attendee_rows(event_id: int, check_in_status: Optional[bool], fields):
+    # The request's session is closed before a streaming body is sent, so use our own
+    async with AsyncSessionLocal() as db:
+        async for row in iter_attendee_rows(db, event_id, check_in_status, fields):
+            yield row
+
+
+async def _stream_attendee_batches(event_id: int, check_in_status: Optional[bool], fields):
+    async with AsyncSessionLocal() as db:
+        async for batch in iter_attendee_batches(db, event_id, check_in_status, fields):
+            yield batch
 
 
 
@@ -88,15 +210,238 @@ def list_event_attendees(
 async def bulk_check_in(
     event_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)  # Ensure user is authenticated
+    progress: bool = False,  # Stream one NDJSON progress line per batch
+    background: bool = False,  # Queue as a job and answer 202 straight away
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_role("organizer", "Only the event organizer can upload check-in CSV"))
 ):
+    """Check in the attendees an uploaded CSV lists, committing each batch as it is read.
+
+    Rows can therefore be partially applied: when the upload turns out not to
+    be UTF-8 part-way through, the batches before the bad bytes stay checked in,
+    and the 400 reports them (``rows`` read, ``checked_in`` and ``not_found``)
+    next to its ``detail``, as the progress stream's error line does.
+    """
     # Validate CSV file format
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only CSV files are allowed")
 
-    # Read file content
-    content = await file.read()
-    decoded_content = content.decode("utf-8")
+    await get_bulk_check_in_event(db, event_id, current_user.id)
+
+    if background:
+        return await _queue_bulk_check_in_job(db, event_id, current_user.id, file)
+
+    if progress:
+        return StreamingResponse(
+            _bulk_check_in_progress(event_id, _detach_upload(file)),
+            media_type="application/x-ndjson",
+        )
+
+    report, rows_read = {"checked_in": [], "not_found": []}, 0
+    try:
+        async for rows in iter_upload_batches(file):
+            batch = await check_in_batch(db, event_id, rows)
+            rows_read += len(rows)
+            report["checked_in"].extend(batch["checked_in"])
+            report["not_found"].extend(batch["not_found"])
+    except UnicodeDecodeError:
+        # Earlier batches are already committed: say what was applied
+        return JSONResponse(
+            status_code=400, content={"detail": "CSV file must be UTF-8 encoded", "rows": rows_read, **report}
+        )
+
+    return report
+
+
+async def _queue_bulk_check_in_job(db: AsyncSession, event_id: int, organizer_id: int, file: UploadFile):
+    job_id = uuid.uuid4().hex
+    source_path = jobs.job_source_path(job_id)
+    with open(source_path, "wb") as spool:
+        await run_in_threadpool(shutil.copyfileobj, file.file, spool)
+
+    job = BulkCheckInJob(
+        id=job_id, event_id=event_id, organizer_id=organizer_id, status="queued", source_path=source_path
+    )
+
+    async def add_job(session):
+        session.add(job)
+        await session.flush()
+        await session.refresh(job)
+
+    await run_write(db, add_job)
+    jobs.submit_job(job_id)
+
+    return JSONResponse(
+        status_code=202,
+        content=BulkCheckInJobResponse.model_validate(job).model_dump(mode="json"),
+        headers={"Location": f"/events/{event_id}/bulk-check-in/{job_id}"},
+    )
+
+
+def _detach_upload(file: UploadFile) -> UploadFile:
+    """Take over the spooled upload so it outlives the request's form cleanup.
+
+    FastAPI closes uploaded files once the endpoint returns, before a streaming
+    body is sent, so the streaming generator keeps its own handle and closes it.
+    """
+    detached = UploadFile(file.file, filename=file.filename)
+    file.file = BytesIO()
+    return detached
+
+
+async def _bulk_check_in_progress(event_id: int, file: UploadFile):
+    totals = {"rows": 0, "checked_in": 0, "not_found": 0}
+    try:
+        async with AsyncSessionLocal() as db:
+            batch_number = 0
+            async for rows in iter_upload_batches(file):
+                batch_number += 1
+                batch = await check_in_batch(db, event_id, rows)
+                totals["rows"] += len(rows)
+                totals["checked_in"] += len(batch["checked_in"])
+                totals["not_found"] += len(batch["not_found"])
+                yield json.dumps({"batch": batch_number, "rows": len(rows), **batch}) + "\n"
+    except UnicodeDecodeError:
+        yield json.dumps({"error": "CSV file must be UTF-8 encoded", **totals}) + "\n"
+        return
+    finally:
+        await file.close()
+
+    yield json.dumps({"done": True, **totals}) + "\n"
+
+
+# 8️. Bulk Check-in Job Status (Only the Organizer Who Queued It)
+@router.get("/{event_id}/bulk-check-in/{job_id}", response_model=BulkCheckInJobResponse)
+async def bulk_check_in_job_status(
+    event_id: int,
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_role("organizer", "Not authorized to view this job"))
+):
+    job = await db.get(BulkCheckInJob, job_id)
+    if not job or job.event_id != event_id:
+        raise HTTPException(status_code=404, detail="Bulk check-in job not found")
+
+    if job.organizer_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this job")
+
+    return job
+
+
+# 9️. Live Check-in Counters (Server-Sent Events, Pushed at Most Once per Tick)
+@router.get("/{event_id}/live")
+async def live_event_counters(event_id: int):
+    watcher = await live.counters.watch(event_id)
+    if watcher is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    return StreamingResponse(
+        _live_frames(event_id, watcher),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _live_frames(event_id: int, watcher: live.Watcher):
+    try:
+        while True:
+            frame = await watcher.next_frame(live.LIVE_KEEPALIVE_SECONDS)
+            yield frame if frame is not None else ": keepalive\n\n"
+    finally:
+        live.counters.unwatch(event_id, watcher)
+
+
+# 10. Batch Create / Update Events (Per-Item Results; Partial Failures Don't Stop the Batch)
+def _check_batch_size(items: list):
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one item")
+    if len(items) > EVENT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch is limited to {EVENT_BATCH_MAX_ITEMS} items")
+
+
+@router.post("/batch", response_model=EventBatchResult)
+async def create_events_in_batch(
+    items: List[Any] = Body(...),  # EventCreate objects, validated one by one
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_role("organizer", "Only organizers can create events"))
+):
+    _check_batch_size(items)
+
+    return FastJSONResponse(await create_events_batch(db, items, current_user.id))
+
+
+@router.patch("/batch", response_model=EventBatchResult)
+async def update_events_in_batch(
+    items: List[Any] = Body(...),  # EventUpdate objects, each with the event_id it applies to
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_role("organizer", "Only organizers can update events"))
+):
+    _check_batch_size(items)
+
+    report = await update_events_batch(db, items, current_user.id)
+    for result in report["results"]:
+        if result["event"] is not None:
+            live.counters.set_capacity(result["event"]["event_id"], result["event"]["max_attendees"])
+    return FastJSONResponse(report)
+
+
+# 11. Cancel Registration / Waitlist Place, and Waitlist Position (Attendees Poll This Instead of Re-registering)
+@router.delete("/{event_id}/register")
+async def cancel_event_registration(
+    event_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_attendee)
+):
+    outcome = await run_write(db, lambda session: cancel_registration(session, event_id, current_user))
+    if outcome["registration"]:
+        live.counters.add(event_id, registered=outcome["promoted"] - 1, checked_in=-int(outcome["checked_in"]))
+    return {"message": outcome["message"]}
+
+
+@router.get("/{event_id}/waitlist", response_model=WaitlistStatus)
+async def get_waitlist_position(
+    event_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_attendee)
+):
+    waitlisted = await get_waitlist_status(db, event_id, current_user)
+    if waitlisted is None:
+        raise HTTPException(status_code=404, detail="Not on the waitlist for this event")
+    return waitlisted
+
+
+# 12. Export Attendees (Only the Organizer; CSV or Arrow IPC, Streamed from a Server-Side Cursor)
+# The default CSV columns match Events.csv, so an export feeds straight back into bulk check-in
+EXPORT_DEFAULT_FIELDS = ("email", "event_id")
+EXPORT_FORMATS = {"csv": "text/csv; charset=utf-8", "arrow": "application/vnd.apache.arrow.stream"}
+
+
+@router.get("/{event_id}/attendees/export")
+async def export_event_attendees(
+    event_id: int,
+    format: str = Query("csv", pattern="^(csv|arrow)$"),
+    check_in_status: Optional[bool] = None,
+    fields: Optional[str] = None,  # Comma-separated columns, e.g. "email,event_id,first_name,last_name"
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_role("organizer", "Only the event organizer can export attendees"))
+):
+    event = await get_event_snapshot(db, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event["organizer_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="Only the event organizer can export attendees")
+
+    selected = _attendee_fields(fields, EXPORT_DEFAULT_FIELDS)
+    if format == "arrow" and not arrow_available():
+        raise HTTPException(status_code=501, detail="Arrow exports need the 'pyarrow' package on the server")
 
-    return bulk_check_in_attendees(db, event_id, current_user.id, decoded_content)
+    batches = _stream_attendee_batches(event_id, check_in_status, selected)
+    if format == "arrow":
+        body = iter_arrow(batches, {field: ATTENDEE_RESPONSE_COLUMNS[field].type.python_type for field in selected})
+    else:
+        body = iter_csv(batches, selected)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="event-{event_id}-attendees.{format}"'},
+    )
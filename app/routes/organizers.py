@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database import get_db
+from app.profiling import ProfiledRoute
+from app.rollups import get_event_stats_page, get_organizer_stats
+from app.routes.auth import Principal, require_organizer
+from app.schemas import EventStatsPage, OrganizerStatsResponse
+
+router = APIRouter(prefix="/organizers", tags=["Organizers"], route_class=ProfiledRoute)
+
+STATS_DEFAULT_DAYS = 30
+STATS_MAX_DAYS = 366
+STATS_DEFAULT_PAGE_SIZE = 50
+STATS_MAX_PAGE_SIZE = 500
+
+
+# 1️. Organizer Totals and Daily Registrations / Check-ins (From the Rollups; Constant Time)
+@router.get("/me/stats", response_model=OrganizerStatsResponse)
+async def get_my_stats(
+    days: int = Query(STATS_DEFAULT_DAYS, ge=1, le=STATS_MAX_DAYS),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_organizer)
+):
+    return await get_organizer_stats(db, current_user.id, days)
+
+
+# 2️. Per-Event Registration and Check-in Rates (Paged by Event ID)
+@router.get("/me/stats/events", response_model=EventStatsPage)
+async def get_my_event_stats(
+    limit: int = Query(STATS_DEFAULT_PAGE_SIZE, ge=1, le=STATS_MAX_PAGE_SIZE),
+    cursor: Optional[int] = None,  # next_cursor of the previous page
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_organizer)
+):
+    return await get_event_stats_page(db, current_user.id, limit, cursor)
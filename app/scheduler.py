@@ -0,0 +1,87 @@
+"""Keep ``Event.status`` in step with the clock.
+
+A background task moves events scheduled -> ongoing -> completed every
+STATUS_SCHEDULER_INTERVAL seconds (0 disables it). Each transition is applied
+in batches of STATUS_BATCH_SIZE rows, each its own short write transaction,
+found through the (status, start_time) index. Canceled events are left alone.
+Event times are naive and compared against UTC.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app.crud import invalidate_events
+from app.database import AsyncSessionLocal, run_write
+from app.models import Event
+
+logger = logging.getLogger(__name__)
+
+STATUS_SCHEDULER_INTERVAL = float(os.getenv("STATUS_SCHEDULER_INTERVAL", "60"))
+STATUS_BATCH_SIZE = int(os.getenv("STATUS_BATCH_SIZE", "500"))
+
+_task = None
+
+
+def transitions(now: datetime):
+    """(new status, condition) pairs; ``start_time < now`` on the second keeps it an index range."""
+    return (
+        ("ongoing", (Event.status == "scheduled", Event.start_time <= now, Event.end_time > now)),
+        ("completed", (Event.status.in_(("scheduled", "ongoing")), Event.start_time < now, Event.end_time <= now)),
+    )
+
+
+async def _advance_batch(db, status: str, condition, batch_size: int):
+    batch = select(Event.event_id).where(*condition).limit(batch_size)
+    changed = await db.scalars(
+        update(Event).where(Event.event_id.in_(batch)).values(status=status)
+        .returning(Event.event_id).execution_options(synchronize_session=False)
+    )
+    return changed.all()
+
+
+async def advance_statuses(now: datetime = None, batch_size: int = None):
+    """Apply every due status transition; returns how many events moved to each status."""
+    now = now or datetime.utcnow()
+    batch_size = batch_size or STATUS_BATCH_SIZE
+    moved = {}
+    for status, condition in transitions(now):
+        moved[status] = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                changed = await run_write(db, lambda session: _advance_batch(session, status, condition, batch_size))
+            if changed:
+                invalidate_events(*changed)
+                moved[status] += len(changed)
+            if len(changed) < batch_size:
+                break
+    return moved
+
+
+async def _run(interval: float):
+    while True:
+        try:
+            moved = await advance_statuses()
+            if any(moved.values()):
+                logger.info("Event statuses advanced: %s", moved)
+        except Exception:
+            logger.exception("Event status update failed")
+        await asyncio.sleep(interval)
+
+
+def start(interval: float = None):
+    global _task
+    interval = STATUS_SCHEDULER_INTERVAL if interval is None else interval
+    if interval > 0:
+        _task = asyncio.create_task(_run(interval))
+    return _task
+
+
+async def stop():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
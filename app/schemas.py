@@ -1,7 +1,7 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Any, List, Optional
 
 # Event Status Enum
 class EventStatus(str, Enum):
@@ -26,6 +26,11 @@ class EventResponse(EventCreate):
 
     model_config = ConfigDict(from_attributes=True)  # Updated for Pydantic v2
 
+# Paginated Event Listing Schema
+class EventPage(BaseModel):
+    items: List[EventResponse]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch the next page
+
 # New: Event Update Schema
 class EventUpdate(BaseModel):
     name: Optional[str] = None
@@ -36,6 +41,23 @@ class EventUpdate(BaseModel):
     max_attendees: Optional[int] = None
     status: Optional[EventStatus] = None
 
+# Batch Event Update Item: an EventUpdate naming the event it applies to
+class EventBatchUpdate(EventUpdate):
+    event_id: int
+
+# Per-Item Outcome of a Batch Create / Update
+class EventBatchItemResult(BaseModel):
+    index: int  # Position of the item in the request array
+    status_code: int  # What the single-event endpoint would have answered
+    event: Optional[EventResponse] = None
+    detail: Optional[Any] = None  # Error message, or the validation errors for a 422
+
+# Batch Create / Update Response Schema
+class EventBatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[EventBatchItemResult]
+
 # Attendee Creation Schema (Fixed: Added Password)
 class AttendeeCreate(BaseModel):
     first_name: str
@@ -55,3 +77,50 @@ class AttendeeResponse(BaseModel):
     check_in_status: bool
 
     model_config = ConfigDict(from_attributes=True)  # Updated for Pydantic v2
+
+# Waitlist Place (Answered with 202 When a Registration Finds the Event Full)
+class WaitlistStatus(BaseModel):
+    event_id: int
+    status: str = "waitlisted"
+    position: int  # 1 = next to be promoted when a seat frees up
+
+# Organizer Analytics (Answered from the Rollup Tables)
+class DailyStats(BaseModel):
+    day: str  # UTC date, YYYY-MM-DD
+    registrations: int
+    check_ins: int
+
+class OrganizerStatsResponse(BaseModel):
+    organizer_id: int
+    events: int
+    registrations: int
+    check_ins: int
+    check_in_rate: Optional[float] = None  # check_ins / registrations
+    daily: List[DailyStats]
+
+class EventStatsResponse(BaseModel):
+    event_id: int
+    name: str
+    max_attendees: int
+    registrations: int
+    check_ins: int
+    registration_rate: Optional[float] = None  # registrations / max_attendees
+    check_in_rate: Optional[float] = None  # check_ins / registrations
+
+class EventStatsPage(BaseModel):
+    items: List[EventStatsResponse]
+    next_cursor: Optional[int] = None
+
+# Bulk Check-in Job Status Schema
+class BulkCheckInJobResponse(BaseModel):
+    job_id: str = Field(validation_alias="id")
+    event_id: int
+    status: str
+    rows_processed: int
+    rows_found: int
+    rows_not_found: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
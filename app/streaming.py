@@ -0,0 +1,149 @@
+import codecs
+import csv
+from io import BytesIO, StringIO
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
+
+from fastapi import UploadFile
+
+from app.rendering import dumps
+
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes pulled from an upload per read
+CSV_BATCH_SIZE = 1000  # Rows handed to the database per batch, and rendered per export chunk
+
+
+class CSVRowSplitter:
+    """Incrementally turn CSV bytes into dict rows keyed by the header line.
+
+    Bytes are decoded with an incremental ``utf-8-sig`` decoder, so a leading BOM
+    (as written by Excel, see ``Events.csv``) is dropped and multi-byte characters
+    split across chunks are handled. Only complete records are parsed: a newline
+    counts as a record boundary when it is preceded by an even number of quotes,
+    which keeps quoted fields with embedded newlines intact.
+    """
+
+    def __init__(self, encoding: str = "utf-8-sig"):
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ""
+        self._header = None
+
+    def feed(self, chunk: bytes) -> List[Dict[str, str]]:
+        self._buffer += self._decoder.decode(chunk)
+
+        cut = self._buffer.rfind("\n")
+        while cut != -1 and self._buffer.count('"', 0, cut) % 2:
+            cut = self._buffer.rfind("\n", 0, cut)
+        if cut == -1:
+            return []
+
+        complete, self._buffer = self._buffer[:cut + 1], self._buffer[cut + 1:]
+        return self._parse(complete)
+
+    def close(self) -> List[Dict[str, str]]:
+        remaining = self._buffer + self._decoder.decode(b"", final=True)
+        self._buffer = ""
+        return self._parse(remaining)
+
+    def _parse(self, text: str) -> List[Dict[str, str]]:
+        rows = []
+        for values in csv.reader(StringIO(text, newline="")):
+            if self._header is None:
+                self._header = values
+                continue
+            if values:
+                rows.append(dict(zip(self._header, values)))
+        return rows
+
+
+def _batched(rows: List[Dict[str, str]], pending: List[Dict[str, str]], batch_size: int):
+    pending.extend(rows)
+    while len(pending) >= batch_size:
+        yield pending[:batch_size]
+        del pending[:batch_size]
+
+
+async def iter_upload_batches(
+    file: UploadFile, batch_size: Optional[int] = None, chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> AsyncIterator[List[Dict[str, str]]]:
+    """Yield fixed-size batches of CSV rows while reading an upload chunk by chunk."""
+    batch_size = batch_size or CSV_BATCH_SIZE
+    splitter = CSVRowSplitter()
+    pending = []
+    while chunk := await file.read(chunk_size):
+        for batch in _batched(splitter.feed(chunk), pending, batch_size):
+            yield batch
+    for batch in _batched(splitter.close(), pending, batch_size):
+        yield batch
+    if pending:
+        yield pending
+
+
+
+async def iter_json_array(rows: AsyncIterable[dict]) -> AsyncIterator[str]:
+    """Render rows as one JSON array, piece by piece."""
+    separator = "["
+    async for row in rows:
+        yield separator + dumps(row).decode()
+        separator = ","
+    yield "[]" if separator == "[" else "]"
+
+
+async def iter_ndjson(rows: AsyncIterable[dict]) -> AsyncIterator[str]:
+    async for row in rows:
+        yield dumps(row).decode() + "\n"
+
+
+async def iter_csv(batches: AsyncIterable[list], fields) -> AsyncIterator[bytes]:
+    """Render batches of row tuples as CSV laid out like ``Events.csv``: UTF-8 with a BOM, CRLF line endings.
+
+    One chunk goes out per batch, so memory does not grow with the row count.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer, lineterminator="\r\n")
+    buffer.write("\ufeff")
+    writer.writerow(fields)
+    async for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+ARROW_TYPES = {int: "int64", str: "string", bool: "bool_", float: "float64"}
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def iter_arrow(batches: AsyncIterable[list], columns: Dict[str, type]) -> AsyncIterator[bytes]:
+    """Render batches of row tuples as an Arrow IPC stream, one record batch each.
+
+    ``columns`` maps each field, in row order, to its Python type. Needs the
+    pyarrow package.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError as exc:
+        raise RuntimeError("Arrow exports need the 'pyarrow' package installed") from exc
+
+    schema = pa.schema([(field, getattr(pa, ARROW_TYPES[kind])()) for field, kind in columns.items()])
+    sink = BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    async for batch in batches:
+        arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        yield drain()
+    writer.close()  # Writes the schema too, if no batch did
+    yield drain()
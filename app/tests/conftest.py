@@ -0,0 +1,147 @@
+import os
+import tempfile
+
+# The auth module reads its settings from the environment at import time
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")  # Keep hashing cheap in tests
+os.environ.setdefault("STATUS_SCHEDULER_INTERVAL", "0")  # Tests drive scheduler.advance_statuses themselves
+
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import (
+    AsyncSessionLocal, Base, SessionLocal, async_engine as default_async_engine, configure_sqlite,
+    engine as default_engine
+)
+from app.crud import event_cache, search_mode_cache
+from app.idempotency import store as idempotency_store
+from app.main import app
+from app.ratelimit import buckets as rate_limit_buckets
+from app.models import User, Event, Attendee, EventRegistration, TokenVersion
+from app.routes.auth import create_access_token, principal_cache, token_version_cache
+
+
+@pytest.fixture()
+def db_engine():
+    """Point every session at a throwaway SQLite file for the duration of a test.
+
+    The app's async sessions and the synchronous sessions tests use for seeding
+    and assertions share the same file.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{tmp}/test.db", connect_args={"check_same_thread": False}
+        )
+        # NullPool: TestClient and asyncio.run() drive the app from different event loops
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/test.db", poolclass=NullPool)
+        configure_sqlite(async_engine.sync_engine)  # Honour SQLITE_PROFILE like the real engine
+        Base.metadata.create_all(bind=engine)
+        SessionLocal.configure(bind=engine)
+        AsyncSessionLocal.configure(bind=async_engine)
+        principal_cache.clear()
+        token_version_cache.clear()
+        event_cache.clear()
+        search_mode_cache.clear()
+        idempotency_store.clear()
+        rate_limit_buckets.clear()
+        try:
+            yield engine
+        finally:
+            SessionLocal.configure(bind=default_engine)
+            AsyncSessionLocal.configure(bind=default_async_engine)
+            engine.dispose()
+
+
+@pytest.fixture()
+def app_engine(db_engine):
+    """The (sync facade of the) engine behind the app's async sessions, for SQL event hooks."""
+    return AsyncSessionLocal.kw["bind"].sync_engine
+
+
+@pytest.fixture()
+def db(db_engine):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture()
+def client(db_engine):
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture()
+def organizer(db):
+    user = User(username="Olive Organizer", email="organizer@example.com", password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture()
+def event(db, organizer):
+    start = datetime(2025, 3, 10, 9, 0)
+    new_event = Event(
+        name="Tech Conference",
+        description="Annual tech meetup",
+        start_time=start,
+        end_time=start + timedelta(hours=9),
+        location="New York",
+        max_attendees=100,
+        organizer_id=organizer.id,
+    )
+    db.add(new_event)
+    db.commit()
+    db.refresh(new_event)
+    return new_event
+
+
+@pytest.fixture()
+def headers_for(db_engine):
+    """Build a bearer header for a principal without going through bcrypt.
+
+    Tokens carry the claims /auth/login issues (id, role and current token
+    version); ``legacy=True`` mints the older email-only form instead.
+    """
+    def _headers_for(email, role, legacy=False):
+        claims = {"sub": email, "role": role}
+        if not legacy:
+            model = User if role == "organizer" else Attendee
+            with SessionLocal() as session:
+                principal_id = session.scalar(select(model.id).where(model.email == email))
+                if principal_id is None:
+                    raise LookupError(f"No {role} with email {email}")
+                version = session.scalar(select(TokenVersion.version).where(
+                    TokenVersion.role == role, TokenVersion.principal_id == principal_id
+                ))
+            claims.update(id=principal_id, ver=version or 0)
+        token = create_access_token(data=claims)
+        return {"Authorization": f"Bearer {token}"}
+    return _headers_for
+
+
+@pytest.fixture()
+def make_attendees(db):
+    def _make_attendees(count, event_id=None, prefix="guest"):
+        attendees = [
+            Attendee(first_name="Guest", last_name=str(i), email=f"{prefix}{i}@example.com", password="x")
+            for i in range(count)
+        ]
+        db.add_all(attendees)
+        db.flush()
+        if event_id is not None:
+            db.add_all(EventRegistration(event_id=event_id, attendee_id=attendee.id) for attendee in attendees)
+            db.get(Event, event_id).registered_count += count
+        db.commit()
+        return attendees
+    return _make_attendees
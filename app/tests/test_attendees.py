@@ -0,0 +1,162 @@
+import asyncio
+import json
+
+import httpx
+
+from app import database, streaming
+from app.main import app
+from app.models import Event, EventRegistration
+
+
+def test_list_attendees_streams_json_array(client, db, event, make_attendees):
+    make_attendees(3, event_id=event.event_id)
+    make_attendees(1, prefix="elsewhere")
+
+    buffered = client.get(f"/events/{event.event_id}/attendees").json()
+    streamed = client.get(f"/events/{event.event_id}/attendees", params={"format": "json"})
+
+    assert streamed.headers["content-type"] == "application/json"
+    assert streamed.json() == buffered
+    assert len(buffered) == 3
+
+
+def test_list_attendees_streams_ndjson_projection(client, db, event, make_attendees):
+    guests = make_attendees(2, event_id=event.event_id)
+    db.query(EventRegistration).filter(EventRegistration.attendee_id == guests[1].id).update({"check_in_status": True})
+    db.commit()
+
+    response = client.get(
+        f"/events/{event.event_id}/attendees",
+        params={"format": "ndjson", "fields": "email,check_in_status", "check_in_status": True},
+    )
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"email": "guest1@example.com", "check_in_status": True}
+    ]
+
+
+def test_list_attendees_rejects_unknown_fields(client, event):
+    response = client.get(f"/events/{event.event_id}/attendees", params={"fields": "email,password"})
+    assert response.status_code == 400
+    assert client.get(f"/events/{event.event_id}/attendees", params={"format": "json"}).json() == []
+
+
+def test_register_then_check_in(client, db, event, make_attendees, headers_for):
+    make_attendees(1)
+    headers = headers_for("guest0@example.com", "attendee")
+
+    response = client.post(f"/events/{event.event_id}/register", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["event_id"] == event.event_id
+
+    assert client.post(f"/events/{event.event_id}/register", headers=headers).status_code == 400
+    assert client.post(f"/events/{event.event_id}/check-in", headers=headers).json() == {"message": "Check-in successful"}
+    assert client.post(f"/events/{event.event_id}/check-in", headers=headers).status_code == 400
+
+
+def test_concurrent_registrations_never_oversell(db_engine, db, event, make_attendees, headers_for):
+    event.max_attendees = 5
+    db.commit()
+    make_attendees(40)
+
+    async def register_all():
+        await database.start_write_queue()
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(*(
+                    client.post(
+                        f"/events/{event.event_id}/register",
+                        headers=headers_for(f"guest{i}@example.com", "attendee"),
+                    )
+                    for i in range(40)
+                ))
+        finally:
+            await database.stop_write_queue()
+
+    responses = asyncio.run(register_all())
+
+    assert sorted(response.status_code for response in responses) == [200] * 5 + [202] * 35
+    assert sorted(response.json()["position"] for response in responses if response.status_code == 202) == list(
+        range(1, 36)
+    )
+    db.expire_all()
+    assert db.get(Event, event.event_id).registered_count == 5
+    assert db.query(EventRegistration).filter(EventRegistration.event_id == event.event_id).count() == 5
+
+
+def test_attendee_can_register_for_several_events(client, db, event, organizer, make_attendees, headers_for):
+    other = Event(
+        name="Meetup", description="", start_time=event.start_time, end_time=event.end_time,
+        location="Boston", max_attendees=2, organizer_id=organizer.id,
+    )
+    db.add(other)
+    db.commit()
+    make_attendees(1, event_id=event.event_id)
+    headers = headers_for("guest0@example.com", "attendee")
+
+    assert client.post(f"/events/{other.event_id}/register", headers=headers).status_code == 200
+    assert client.post(f"/events/{other.event_id}/register", headers=headers).json() == {
+        "detail": "You are already registered for this event"
+    }
+    assert client.post("/events/999/register", headers=headers).status_code == 404
+    assert client.post(f"/events/{other.event_id}/check-in", headers=headers).status_code == 200
+
+    db.expire_all()
+    assert db.get(Event, event.event_id).registered_count == 1
+    assert db.get(Event, other.event_id).registered_count == 1
+    assert [row["check_in_status"] for row in client.get(f"/events/{event.event_id}/attendees").json()] == [False]
+    assert [row["check_in_status"] for row in client.get(f"/events/{other.event_id}/attendees").json()] == [True]
+
+
+def test_export_csv_matches_events_csv_and_round_trips(client, db, event, make_attendees, headers_for):
+    make_attendees(3, event_id=event.event_id)
+    organizer = headers_for("organizer@example.com", "organizer")
+
+    response = client.get(f"/events/{event.event_id}/attendees/export", headers=organizer)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.content == (
+        "﻿email,event_id\r\n"
+        + "".join(f"guest{i}@example.com,{event.event_id}\r\n" for i in range(3))
+    ).encode()
+
+    checked_in = client.post(
+        f"/events/{event.event_id}/bulk-check-in", headers=organizer,
+        files={"file": ("export.csv", response.content, "text/csv")},
+    )
+    assert checked_in.json() == {"checked_in": [f"guest{i}@example.com" for i in range(3)], "not_found": []}
+
+    wider = client.get(
+        f"/events/{event.event_id}/attendees/export", headers=organizer,
+        params={"fields": "email,last_name,check_in_status", "check_in_status": True},
+    )
+    assert wider.text.splitlines()[:2] == ["﻿email,last_name,check_in_status", "guest0@example.com,0,True"]
+
+
+def test_export_is_for_the_organizer_only(client, event, make_attendees, headers_for):
+    make_attendees(1, event_id=event.event_id)
+    response = client.get(
+        f"/events/{event.event_id}/attendees/export", headers=headers_for("guest0@example.com", "attendee")
+    )
+    assert response.status_code == 403
+
+
+def test_export_arrow(client, event, make_attendees, headers_for):
+    make_attendees(3, event_id=event.event_id)
+    response = client.get(
+        f"/events/{event.event_id}/attendees/export", params={"format": "arrow", "fields": "id,email,check_in_status"},
+        headers=headers_for("organizer@example.com", "organizer"),
+    )
+    if not streaming.arrow_available():
+        assert response.status_code == 501
+        return
+
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == ["id", "email", "check_in_status"]
+    assert table.column("email").to_pylist() == [f"guest{i}@example.com" for i in range(3)]
+    assert table.column("check_in_status").to_pylist() == [False] * 3
@@ -0,0 +1,122 @@
+from passlib.context import CryptContext
+from sqlalchemy import event as sa_event
+
+from app import hashing
+from app.models import Attendee
+from app.routes import auth
+
+
+def count_queries(engine):
+    statements = []
+    def record(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+    sa_event.listen(engine, "before_cursor_execute", record)
+    return statements
+
+
+def test_me_reports_attendee_role_from_cached_principal(client, app_engine, make_attendees, headers_for):
+    make_attendees(1)
+    headers = headers_for("guest0@example.com", "attendee", legacy=True)  # Email-only tokens use the principal cache
+    statements = count_queries(app_engine)
+
+    first = client.get("/auth/me", headers=headers)
+    lookups = len(statements)
+    second = client.get("/auth/me", headers=headers)
+
+    assert first.json() == second.json() == {"id": 1, "email": "guest0@example.com", "role": "attendee"}
+    assert lookups == 1  # The role claim skips the users table probe
+    assert len(statements) == lookups  # The second request is served from the cache
+    assert auth.principal_cache_requests.value(result="hit") >= 1
+    assert "principal_cache_requests_total" in client.get("/metrics").text
+
+
+def test_changing_an_attendee_invalidates_the_cached_principal(client, db, make_attendees, headers_for):
+    make_attendees(1)
+    assert client.get("/auth/me", headers=headers_for("guest0@example.com", "attendee", legacy=True)).status_code == 200
+
+    attendee = db.query(Attendee).one()
+    attendee.email = "renamed@example.com"
+    db.commit()
+
+    for email, expected in (("guest0@example.com", 401), ("renamed@example.com", 200)):
+        assert client.get("/auth/me", headers=headers_for(email, "attendee", legacy=True)).status_code == expected
+
+
+def register(client, email, role="attendee"):
+    return client.post("/auth/register", json={
+        "first_name": "Ada", "last_name": "Lovelace", "email": email, "password": "s3cret", "role": role,
+    })
+
+
+def test_register_and_login_hash_in_the_process_pool(client):
+    assert register(client, "ada@example.com").status_code == 200
+
+    response = client.post("/auth/login", data={"username": "ada@example.com", "password": "s3cret"})
+    assert response.status_code == 200
+    assert response.json()["role"] == "attendee"
+
+    response = client.post("/auth/login", data={"username": "ada@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+
+def test_login_rehashes_outdated_password_hash(client, db):
+    outdated = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("s3cret")
+    db.add(Attendee(first_name="Ada", last_name="Lovelace", email="ada@example.com", password=outdated))
+    db.commit()
+
+    response = client.post("/auth/login", data={"username": "ada@example.com", "password": "s3cret"})
+
+    assert response.status_code == 200
+    db.expire_all()
+    stored = db.query(Attendee).one().password
+    assert stored != outdated and not hashing.pwd_context.needs_update(stored)
+    token = response.json()["access_token"]
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {token}"}).status_code == 200  # Not revoked
+
+
+def test_saturated_hashing_pool_sheds_with_503(client):
+    hashing.configure(workers=0, queue_limit=0)
+    try:
+        response = register(client, "ada@example.com")
+    finally:
+        hashing.configure()
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def login(client, email, password="s3cret"):
+    token = client.post("/auth/login", data={"username": email, "password": password}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_claims_token_authorizes_without_a_principal_lookup(client, app_engine, event):
+    assert register(client, "ada@example.com").status_code == 200
+    headers = login(client, "ada@example.com")
+    statements = count_queries(app_engine)
+
+    first = client.get("/auth/me", headers=headers)
+    assert statements == []  # Login cached the token version
+    auth.token_version_cache.clear()
+    second = client.get("/auth/me", headers=headers)
+
+    assert first.json() == second.json() == {"id": 1, "email": "ada@example.com", "role": "attendee"}
+    assert len(statements) == 1 and "token_versions" in statements[0]  # Only the version, never the principal
+
+    # Attendee 1 shares its id with the event's organizer; the role claim still keeps it out
+    response = client.put(f"/events/{event.event_id}", json={"name": "Hijacked"}, headers=headers)
+    assert response.status_code == 403
+
+
+def test_changing_a_password_revokes_issued_tokens(client, db):
+    assert register(client, "ada@example.com").status_code == 200
+    headers = login(client, "ada@example.com")
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    attendee = db.query(Attendee).one()
+    attendee.password = hashing.pwd_context.hash("n3w-secret")
+    db.commit()
+
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    assert client.get("/auth/me", headers=login(client, "ada@example.com", "n3w-secret")).status_code == 200
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from app import jobs
+from app.models import Attendee, BulkCheckInJob, EventRegistration, User
+from app.streaming import CSVRowSplitter
+
+
+def upload(client, event_id, headers, csv_text):
+    files = {"file": ("checkin.csv", csv_text.encode("utf-8"), "text/csv")}
+    return client.post(f"/events/{event_id}/bulk-check-in", files=files, headers=headers)
+
+
+def test_bulk_check_in_reports_checked_in_and_not_found(client, db, event, organizer, headers_for, make_attendees):
+    guests = make_attendees(3, event_id=event.event_id)
+    db.query(EventRegistration).filter(EventRegistration.attendee_id == guests[2].id).update({"check_in_status": True})
+    db.commit()
+
+    csv_text = "email,event_id\nguest0@example.com,1\nguest1@example.com,1\nguest0@example.com,1\n" \
+               "guest2@example.com,1\nstranger@example.com,1\n,1\n"
+    response = upload(client, event.event_id, headers_for(organizer.email, "organizer"), csv_text)
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "checked_in": ["guest0@example.com", "guest1@example.com"],
+        "not_found": ["stranger@example.com"],
+    }
+    db.expire_all()
+    assert db.query(EventRegistration).filter(EventRegistration.check_in_status.is_(True)).count() == 3
+
+
+def test_bulk_check_in_spans_multiple_chunks(client, db, event, organizer, headers_for, make_attendees):
+    make_attendees(1200, event_id=event.event_id)
+
+    csv_text = "email\n" + "".join(f"guest{i}@example.com\n" for i in range(1200))
+    response = upload(client, event.event_id, headers_for(organizer.email, "organizer"), csv_text)
+
+    assert response.status_code == 200
+    assert len(response.json()["checked_in"]) == 1200
+    db.expire_all()
+    assert db.query(EventRegistration).filter(EventRegistration.check_in_status.is_(False)).count() == 0
+
+
+def test_bulk_check_in_requires_event_organizer(client, db, event, organizer, headers_for):
+    other = User(username="Other Organizer", email="other@example.com", password="x")
+    db.add(other)
+    db.commit()
+
+    response = upload(client, event.event_id, headers_for(other.email, "organizer"), "email\n")
+    assert response.status_code == 403
+
+    response = upload(client, 999, headers_for(organizer.email, "organizer"), "email\n")
+    assert response.status_code == 404
+
+
+def test_bulk_check_in_streams_ndjson_progress(client, db, event, organizer, headers_for, make_attendees, monkeypatch):
+    monkeypatch.setattr("app.streaming.CSV_BATCH_SIZE", 2)
+    make_attendees(3, event_id=event.event_id)
+
+    csv_text = "﻿email,event_id\r\n" + "".join(f"guest{i}@example.com,1\r\n" for i in range(4))
+    files = {"file": ("checkin.csv", csv_text.encode("utf-8"), "text/csv")}
+    response = client.post(
+        f"/events/{event.event_id}/bulk-check-in?progress=true",
+        files=files, headers=headers_for(organizer.email, "organizer"),
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {"batch": 1, "rows": 2, "checked_in": ["guest0@example.com", "guest1@example.com"], "not_found": []},
+        {"batch": 2, "rows": 2, "checked_in": ["guest2@example.com"], "not_found": ["guest3@example.com"]},
+        {"done": True, "rows": 4, "checked_in": 3, "not_found": 1},
+    ]
+
+
+def test_csv_row_splitter_handles_bom_split_characters_and_quoted_newlines():
+    payload = '﻿email,note\r\nzoë@example.com,"multi\nline, quoted"\r\nlast@example.com,plain'.encode("utf-8")
+    splitter = CSVRowSplitter()
+
+    rows = []
+    for i in range(len(payload)):  # One byte at a time splits every multi-byte character
+        rows.extend(splitter.feed(payload[i:i + 1]))
+    rows.extend(splitter.close())
+
+    assert rows == [
+        {"email": "zoë@example.com", "note": "multi\nline, quoted"},
+        {"email": "last@example.com", "note": "plain"},
+    ]
+
+
+def test_bulk_check_in_background_job_reports_progress(client, db, event, organizer, headers_for, make_attendees,
+                                                       monkeypatch, tmp_path):
+    monkeypatch.setattr(jobs, "BULK_JOB_DIR", str(tmp_path))
+    make_attendees(2, event_id=event.event_id)
+    headers = headers_for(organizer.email, "organizer")
+
+    csv_text = "email\nguest0@example.com\nguest1@example.com\nnobody@example.com\n"
+    files = {"file": ("checkin.csv", csv_text.encode("utf-8"), "text/csv")}
+    response = client.post(f"/events/{event.event_id}/bulk-check-in?background=true", files=files, headers=headers)
+
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["location"] == f"/events/{event.event_id}/bulk-check-in/{job_id}"
+
+    for _ in range(100):
+        status = client.get(response.headers["location"], headers=headers).json()
+        if status["status"] in ("completed", "failed"):
+            break
+        time.sleep(0.05)
+
+    assert status["status"] == "completed"
+    assert (status["rows_processed"], status["rows_found"], status["rows_not_found"]) == (3, 2, 1)
+    assert not os.listdir(tmp_path)
+
+
+def test_bulk_check_in_job_resumes_after_committed_rows(db, event, organizer, make_attendees, monkeypatch, tmp_path):
+    monkeypatch.setattr("app.streaming.CSV_BATCH_SIZE", 2)
+    make_attendees(4, event_id=event.event_id)
+    source = tmp_path / "job.csv"
+    source.write_text("email\n" + "".join(f"guest{i}@example.com\n" for i in range(4)))
+    # Simulate a restart after the first batch was committed
+    db.add(BulkCheckInJob(
+        id="resume-me", event_id=event.event_id, organizer_id=organizer.id, status="running",
+        source_path=str(source), rows_processed=2, rows_found=2, rows_not_found=0,
+    ))
+    db.commit()
+
+    asyncio.run(jobs.run_job("resume-me"))
+
+    db.expire_all()
+    job = db.get(BulkCheckInJob, "resume-me")
+    assert (job.status, job.rows_processed, job.rows_found) == ("completed", 4, 4)
+    checked_in = {
+        email for (email,) in db.query(Attendee.email)
+        .join(EventRegistration, EventRegistration.attendee_id == Attendee.id)
+        .filter(EventRegistration.check_in_status.is_(True))
+    }
+    assert checked_in == {"guest2@example.com", "guest3@example.com"}
+
+
+def test_bulk_check_in_job_runs_once_however_many_workers_pick_it_up(db, event, organizer, make_attendees, tmp_path):
+    make_attendees(3, event_id=event.event_id)
+    source = tmp_path / "job.csv"
+    source.write_text("email\n" + "".join(f"guest{i}@example.com\n" for i in range(3)))
+    db.add_all([
+        BulkCheckInJob(id="queued", event_id=event.event_id, organizer_id=organizer.id, source_path=str(source)),
+        BulkCheckInJob(  # Another process is working on this one
+            id="leased", event_id=event.event_id, organizer_id=organizer.id, status="running",
+            claimed_by="elsewhere", heartbeat_at=datetime.utcnow(), source_path=str(source),
+        ),
+    ])
+    db.commit()
+
+    async def run_all():
+        await asyncio.gather(*(jobs.run_job("queued") for _ in range(3)))  # e.g. every worker's startup resume
+        await jobs.run_job("leased")
+    asyncio.run(run_all())
+
+    db.expire_all()
+    queued, leased = db.get(BulkCheckInJob, "queued"), db.get(BulkCheckInJob, "leased")
+    assert (queued.status, queued.rows_processed, queued.rows_found) == ("completed", 3, 3)
+    assert queued.claimed_by == jobs.WORKER_ID
+    assert (leased.status, leased.rows_processed, leased.claimed_by) == ("running", 0, "elsewhere")
+    assert [job_id for (job_id,) in db.query(BulkCheckInJob.id).filter(jobs._claimable())] == []
+
+    leased.heartbeat_at = datetime.utcnow() - timedelta(seconds=jobs.BULK_JOB_LEASE_SECONDS + 1)
+    db.commit()
+    assert [job_id for (job_id,) in db.query(BulkCheckInJob.id).filter(jobs._claimable())] == ["leased"]
+
+
+def test_bulk_check_in_reports_rows_applied_before_a_bad_byte(client, db, event, organizer, headers_for,
+                                                              make_attendees, monkeypatch):
+    monkeypatch.setattr("app.streaming.CSV_BATCH_SIZE", 2)
+    make_attendees(3, event_id=event.event_id)
+    # The first batch is complete within the first upload chunk; the bad byte comes in a later one
+    payload = b"email,note\nguest0@example.com,\nstranger@example.com,\nguest2@example.com," + b"x" * 70_000 + b"\xff\n"
+    files = {"file": ("checkin.csv", payload, "text/csv")}
+    response = client.post(
+        f"/events/{event.event_id}/bulk-check-in", files=files, headers=headers_for(organizer.email, "organizer")
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": "CSV file must be UTF-8 encoded", "rows": 2,
+        "checked_in": ["guest0@example.com"], "not_found": ["stranger@example.com"],
+    }
+    db.expire_all()
+    assert db.query(EventRegistration).filter(EventRegistration.check_in_status.is_(True)).count() == 1
@@ -0,0 +1,75 @@
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base, WriteQueue, configure_sqlite, run_write
+from app.models import Attendee
+
+
+def test_production_profile_group_commits_and_isolates_failures(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/queue.db")
+        configure_sqlite(engine.sync_engine, "production")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            journal_mode = (await connection.exec_driver_sql("PRAGMA journal_mode")).scalar()
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+
+        def add(email, fail=False):
+            async def operation(db):
+                db.add(Attendee(first_name="A", last_name="B", email=email, password="x"))
+                await db.flush()
+                if fail:
+                    raise HTTPException(status_code=400, detail="rejected")
+                return email
+            return operation
+
+        queue = WriteQueue(Session)
+        queue.start()
+        results = await asyncio.gather(
+            queue.submit(add("one@example.com")),
+            queue.submit(add("bad@example.com", fail=True)),
+            queue.submit(add("two@example.com")),
+            return_exceptions=True,
+        )
+        await queue.stop()
+
+        async with Session() as db:
+            stored = set((await db.scalars(select(Attendee.email))).all())
+        await engine.dispose()
+        return journal_mode, results, stored
+
+    journal_mode, results, stored = asyncio.run(scenario())
+
+    assert journal_mode == "wal"
+    assert results[0] == "one@example.com" and results[2] == "two@example.com"
+    assert isinstance(results[1], HTTPException)
+    assert stored == {"one@example.com", "two@example.com"}
+
+
+def test_write_after_a_stale_read_does_not_hit_busy_snapshot(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/snapshot.db")
+        configure_sqlite(engine.sync_engine, "production")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def operation(db):
+            db.add(Attendee(first_name="A", last_name="B", email="mine@example.com", password="x"))
+
+        try:
+            async with Session() as request_db, Session() as other_db:
+                await request_db.scalar(select(Attendee.id))  # e.g. authentication opens a read transaction
+                other_db.add(Attendee(first_name="A", last_name="B", email="other@example.com", password="x"))
+                await other_db.commit()  # Another writer commits after that snapshot was taken
+                await run_write(request_db, operation)  # Would fail at once with "database is locked"
+
+            async with Session() as db:
+                return set((await db.scalars(select(Attendee.email))).all())
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(scenario()) == {"other@example.com", "mine@example.com"}
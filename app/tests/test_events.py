@@ -0,0 +1,333 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event as sa_event
+
+from app import crud, scheduler
+from app.cache import build_backend
+from app.database import AsyncSessionLocal
+from app.models import Event, User
+
+
+def add_events(db, organizer_id, count, location="New York"):
+    start = datetime(2025, 3, 10, 9, 0)
+    db.add_all([
+        Event(
+            name=f"Session {i}", description="Talk", start_time=start + timedelta(hours=i // 2),
+            end_time=start + timedelta(hours=i // 2 + 1), location=location, max_attendees=10,
+            status="scheduled", organizer_id=organizer_id,
+        )
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def test_list_events_walks_pages_with_cursor(client, db, organizer):
+    add_events(db, organizer.id, 7)  # Pairs of events share a start_time
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/events/", params=params).json()
+        seen.extend(item["event_id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == list(range(1, 8))
+
+
+def test_list_events_filters_and_rejects_bad_cursor(client, db, organizer):
+    add_events(db, organizer.id, 2, location="Boston")
+    add_events(db, organizer.id, 1, location="Paris")
+
+    page = client.get("/events/", params={"location": "Paris"}).json()
+    assert [item["location"] for item in page["items"]] == ["Paris"]
+    assert page["next_cursor"] is None
+
+    assert client.get("/events/", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/events/", params={"limit": 1000}).status_code == 422
+
+
+@pytest.mark.parametrize("backend", ["memory", "local-redis"])
+def test_event_reads_are_cached_with_etags_and_invalidated_by_writes(
+    backend, client, app_engine, organizer, headers_for, monkeypatch
+):
+    monkeypatch.setattr(crud, "event_cache", build_backend(backend))
+    headers = headers_for(organizer.email, "organizer")
+    created = client.post("/events/", headers=headers, json={
+        "name": "Launch", "description": "Party", "start_time": "2025-05-01T18:00:00",
+        "end_time": "2025-05-01T22:00:00", "location": "Berlin", "max_attendees": 50,
+    }).json()
+    event_url = f"/events/{created['event_id']}"
+
+    listing = client.get("/events/")
+    detail = client.get(event_url)
+    assert detail.json() == created
+    assert [item["name"] for item in listing.json()["items"]] == ["Launch"]
+
+    selects = []
+    sa_event.listen(app_engine, "before_cursor_execute", lambda *args: selects.append(args[2]))
+    assert client.get(event_url, headers={"If-None-Match": detail.headers["etag"]}).status_code == 304
+    assert client.get("/events/", headers={"If-None-Match": listing.headers["etag"]}).status_code == 304
+    assert client.get(event_url).json() == created
+    assert not [sql for sql in selects if "FROM events" in sql]
+
+    assert client.put(event_url, headers=headers, json={"name": "Launch Party"}).json()["name"] == "Launch Party"
+
+    refreshed = client.get(event_url, headers={"If-None-Match": detail.headers["etag"]})
+    assert refreshed.status_code == 200
+    assert refreshed.json() == {**created, "name": "Launch Party"}
+    assert refreshed.headers["etag"] != detail.headers["etag"]
+    relisted = client.get("/events/", headers={"If-None-Match": listing.headers["etag"]})
+    assert [item["name"] for item in relisted.json()["items"]] == ["Launch Party"]
+
+    assert client.get("/events/999").status_code == 404
+
+
+def test_memory_cache_version_counters_stay_bounded_without_reusing_versions():
+    cache = build_backend("memory", maxsize=16)
+    cache.max_counters = 3
+    seen = {}
+    for round_number in range(5):
+        for event_id in range(10):  # More invalidated ids than counters are kept for
+            key = f"events:{event_id}:version"
+            versions = seen.setdefault(key, [cache.counter(key)])
+            cache.incr(key)
+            versions.append(cache.counter(key))
+
+    assert len(cache._counters) == 3
+    assert all(versions == sorted(set(versions)) for versions in seen.values())  # Strictly increasing per key
+
+
+def search(client, **params):
+    return client.get("/events/", params=params).json()
+
+
+@pytest.mark.parametrize("backend", ["auto", "like"])
+def test_search_matches_word_prefixes_and_combines_with_filters(backend, client, db, organizer, monkeypatch):
+    monkeypatch.setattr(crud, "EVENT_SEARCH_BACKEND", backend)
+    start = datetime(2025, 3, 10, 9, 0)
+    db.add_all([
+        Event(name=name, description=description, start_time=start, end_time=start + timedelta(hours=1),
+              location=location, max_attendees=10, status="scheduled", organizer_id=organizer.id)
+        for name, description, location in [
+            ("Python Conference", "Talks and sprints", "Berlin"),
+            ("Data Meetup", "Lightning talks on python tooling", "Berlin"),
+            ("Gardening Club", "Tomatoes", "Berlin"),
+            ("Python Workshop", "Hands-on", "Paris"),
+        ]
+    ])
+    db.commit()
+
+    names = [item["name"] for item in search(client, q="pyth")["items"]]
+    assert sorted(names) == ["Data Meetup", "Python Conference", "Python Workshop"]
+    if backend == "auto":
+        assert names[-1] == "Data Meetup"  # A description hit ranks below name hits
+
+    assert [item["name"] for item in search(client, q="python conf")["items"]] == ["Python Conference"]
+    assert [item["name"] for item in search(client, q="python", location="Paris")["items"]] == ["Python Workshop"]
+    assert search(client, q="  zzz ")["items"] == []
+    assert client.get("/events/", params={"q": "%%"}).status_code == 400
+
+
+def test_search_pages_through_ranked_results_and_follows_edits(client, db, organizer, headers_for):
+    add_events(db, organizer.id, 5)
+    for event in db.query(Event):
+        event.description = "Keynote " * event.event_id  # More mentions rank higher
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        page = search(client, q="keynote", limit=2, **({"cursor": cursor} if cursor else {}))
+        seen.extend(item["event_id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [5, 4, 3, 2, 1]
+    assert client.get("/events/", params={"q": "keynote", "cursor": crud.encode_cursor(datetime.now(), 1)}).status_code == 400
+
+    headers = headers_for(organizer.email, "organizer")
+    assert client.put("/events/1", headers=headers, json={"name": "Closing Ceremony"}).status_code == 200
+    assert [item["event_id"] for item in search(client, q="closing")["items"]] == [1]
+    assert search(client, q="session 0")["items"] == []
+
+
+def test_broad_search_pages_in_start_time_order_with_scoped_cursors(client, db, organizer, monkeypatch):
+    monkeypatch.setattr(crud, "EVENT_SEARCH_RANK_LIMIT", 3)  # Five matches: too many to rank
+    add_events(db, organizer.id, 5)
+    for event in db.query(Event):
+        event.description = "Keynote " * event.event_id  # Ranking would put event 5 first
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        page = search(client, q="keynote", limit=2, **({"cursor": cursor} if cursor else {}))
+        seen.extend(item["event_id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [1, 2, 3, 4, 5]
+
+    first = search(client, q="keynote", limit=2)["next_cursor"]
+    assert client.get("/events/", params={"q": "keynote", "limit": 2, "cursor": first}).status_code == 200
+    assert client.get("/events/", params={"q": "session", "limit": 2, "cursor": first}).status_code == 400
+    assert client.get(
+        "/events/", params={"q": "keynote", "location": "Oslo", "limit": 2, "cursor": first}
+    ).status_code == 400
+
+
+def test_ranked_and_listed_searches_match_the_same_events(client, db, organizer, monkeypatch):
+    start = datetime(2025, 3, 10, 9, 0)
+    db.add_all([
+        Event(name=name, description=description, start_time=start, end_time=start + timedelta(hours=1),
+              location="Berlin", max_attendees=10, status="scheduled", organizer_id=organizer.id)
+        for name, description in [
+            ("Art Fair", "Paintings"), ("Startup Night", "Pitches"), ("Party at the park", "Music"),
+            ("Smart homes", "Gadgets"), ("Gallery", "Art walk"),
+        ]
+    ])
+    db.commit()
+
+    ranked = {item["name"] for item in search(client, q="art")["items"]}
+    monkeypatch.setattr(crud, "EVENT_SEARCH_RANK_LIMIT", 1)  # Now too many matches to rank
+    listed = {item["name"] for item in search(client, q="art")["items"]}
+
+    assert ranked == listed == {"Art Fair", "Gallery"}  # Word prefixes in both modes, never substrings
+
+
+def add_timed_events(db, organizer_id, spans):
+    """Events from (start, end) hour offsets relative to 2025-03-10 00:00."""
+    base = datetime(2025, 3, 10)
+    db.add_all([
+        Event(name=f"Span {i}", description="", start_time=base + timedelta(hours=start),
+              end_time=base + timedelta(hours=end), location="Oslo", max_attendees=10,
+              status="scheduled", organizer_id=organizer_id)
+        for i, (start, end) in enumerate(spans)
+    ])
+    db.commit()
+
+
+@pytest.mark.parametrize("window_index", ["auto", "none"])
+def test_time_window_filters_select_overlapping_events(window_index, client, db, organizer, monkeypatch):
+    monkeypatch.setattr(crud, "EVENT_WINDOW_INDEX", window_index)
+    add_timed_events(db, organizer.id, [(0, 2), (1, 30), (10, 12), (12, 14), (48, 50)])
+
+    def names(**params):
+        return [item["name"] for item in search(client, **params)["items"]]
+
+    assert names(start="2025-03-10T11:00:00", end="2025-03-10T11:00:00") == ["Span 1", "Span 2"]
+    assert names(start="2025-03-10T11:00:00+01:00", end="2025-03-10T11:00:00+01:00") == ["Span 1", "Span 2"]
+    assert names(start="2025-03-10T12:00:00", end="2025-03-10T13:00:00") == ["Span 1", "Span 3"]
+    assert names(start="2025-03-11T12:00:00") == ["Span 4"]
+    assert names(end="2025-03-10T00:30:00") == ["Span 0"]
+    assert client.get("/events/", params={"now": True}).status_code == 200
+    assert client.get("/events/", params={"now": True, "start": "2025-03-10T00:00:00"}).status_code == 400
+    assert client.get("/events/", params={"start": "2025-03-11T00:00:00", "end": "2025-03-10T00:00:00"}).status_code == 400
+    assert client.get("/events/", params={"date": "March"}).status_code == 400
+
+
+def test_scheduler_advances_statuses_in_batches(db_engine, db, organizer):
+    add_timed_events(db, organizer.id, [(0, 1), (0, 2), (0, 3), (5, 20), (6, 20), (30, 31)])
+    db.query(Event).filter(Event.name == "Span 1").update({"status": "canceled"})
+    db.commit()
+
+    async def ongoing_names():
+        async with AsyncSessionLocal() as session:
+            page = json.loads((await crud.get_events_page(session, status="ongoing"))["body"])
+            return [item["name"] for item in page["items"]]
+
+    async def scenario():
+        before = await ongoing_names()  # Cached before the statuses move
+        moved = await scheduler.advance_statuses(now=datetime(2025, 3, 10, 10), batch_size=1)
+        return before, moved, await ongoing_names()
+
+    before, moved, after = asyncio.run(scenario())
+
+    assert (before, moved, after) == ([], {"ongoing": 2, "completed": 2}, ["Span 3", "Span 4"])
+    db.expire_all()
+    assert [event.status for event in db.query(Event).order_by(Event.event_id)] == [
+        "completed", "canceled", "completed", "ongoing", "ongoing", "scheduled"
+    ]
+    assert asyncio.run(scheduler.advance_statuses(now=datetime(2025, 3, 11, 8))) == {"ongoing": 0, "completed": 3}
+
+
+def session(i, **overrides):
+    return {
+        "name": f"Session {i}", "description": "Talk", "start_time": f"2025-06-01T{9 + i % 8:02d}:00:00",
+        "end_time": f"2025-06-01T{10 + i % 8:02d}:00:00", "location": "Hall A", "max_attendees": 50, **overrides,
+    }
+
+
+def test_batch_create_reports_each_item_and_inserts_in_chunks(
+    client, app_engine, organizer, headers_for, make_attendees, monkeypatch
+):
+    monkeypatch.setattr(crud, "EVENT_BATCH_CHUNK_SIZE", 4)
+    headers = headers_for(organizer.email, "organizer")
+    items = [session(i) for i in range(10)]
+    items[3] = session(3, max_attendees="lots")
+    items[7] = "not an object"
+
+    inserts = []
+    sa_event.listen(app_engine, "before_cursor_execute", lambda *args: inserts.append(args[2]))
+    response = client.post("/events/batch", headers=headers, json=items)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["succeeded"], report["failed"]) == (8, 2)
+    assert [result["status_code"] for result in report["results"]] == [201] * 3 + [422] + [201] * 3 + [422] + [201] * 2
+    assert report["results"][3]["detail"][0]["loc"] == ["max_attendees"]
+    created = [result["event"] for result in report["results"] if result["event"]]
+    assert [event["name"] for event in created] == [f"Session {i}" for i in (0, 1, 2, 4, 5, 6, 8, 9)]
+    assert len([sql for sql in inserts if sql.startswith("INSERT INTO events ")]) == 2  # Eight valid items in chunks of four, one multi-row INSERT ... RETURNING each
+
+    listed = client.get("/events/", params={"location": "Hall A"}).json()["items"]
+    assert sorted(event["event_id"] for event in listed) == sorted(event["event_id"] for event in created)
+
+    make_attendees(1)
+    attendee = headers_for("guest0@example.com", "attendee")
+    assert client.post("/events/batch", headers=attendee, json=items).status_code == 403
+    assert client.post("/events/batch", headers=headers, json=[]).status_code == 400
+    monkeypatch.setattr("app.routes.events.EVENT_BATCH_MAX_ITEMS", 5)
+    assert client.post("/events/batch", headers=headers, json=items).status_code == 413
+
+
+def test_batch_update_checks_ownership_per_item(client, db, organizer, headers_for):
+    other = User(username="Otto", email="otto@example.com", password="x")
+    db.add(other)
+    db.commit()
+    add_events(db, organizer.id, 3)
+    add_events(db, other.id, 1)
+    headers = headers_for(organizer.email, "organizer")
+    assert client.get("/events/1").json()["max_attendees"] == 10  # Cached, so the update must invalidate it
+
+    response = client.patch("/events/batch", headers=headers, json=[
+        {"event_id": 1, "max_attendees": 25},
+        {"event_id": 2, "name": "Renamed", "status": "canceled"},
+        {"event_id": 4, "name": "Not mine"},
+        {"event_id": 99, "name": "Missing"},
+        {"event_id": 1, "name": "Twice"},
+        {"event_id": 3, "status": "postponed"},
+        {"name": "No id"},
+    ])
+
+    report = response.json()
+    assert [result["status_code"] for result in report["results"]] == [200, 200, 403, 404, 409, 422, 422]
+    assert (report["succeeded"], report["failed"]) == (2, 5)
+    assert report["results"][0]["event"]["max_attendees"] == 25
+    assert report["results"][1]["event"]["name"] == "Renamed"
+    assert client.get("/events/1").json()["max_attendees"] == 25
+    assert client.get("/events/2").json()["status"] == "canceled"
+    assert client.get("/events/4").json()["name"] == "Session 0"
+
+
+def test_update_of_an_event_deleted_mid_request_is_not_found(client, db, organizer, headers_for, monkeypatch):
+    async def stale_snapshot(db, event_id):  # As if the event was deleted after the ownership check
+        return {"event_id": event_id, "organizer_id": organizer.id}
+
+    monkeypatch.setattr("app.routes.events.get_event_snapshot", stale_snapshot)
+    response = client.put("/events/99", headers=headers_for(organizer.email, "organizer"), json={"max_attendees": 5})
+
+    assert response.status_code == 404 and response.json()["detail"] == "Event not found"
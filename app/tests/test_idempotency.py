@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+from sqlalchemy import event as sa_event
+
+from app import database, idempotency
+from app.main import app
+from app.models import EventRegistration, IdempotencyKey
+
+
+def test_keyed_check_in_retry_is_replayed_without_queries(client, db, event, make_attendees, headers_for):
+    make_attendees(1, event_id=event.event_id)
+    headers = {**headers_for("guest0@example.com", "attendee"), "Idempotency-Key": "scan-1"}
+
+    first = client.post(f"/events/{event.event_id}/check-in", headers=headers)
+    retry = client.post(f"/events/{event.event_id}/check-in", headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json() == {"message": "Check-in successful"}
+    assert "idempotent-replayed" not in first.headers
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert 'desc="0 queries"' in retry.headers["server-timing"]
+
+    # A new key is a new request: the attendee is already in
+    headers["Idempotency-Key"] = "scan-2"
+    assert client.post(f"/events/{event.event_id}/check-in", headers=headers).json() == {"detail": "Already checked in"}
+
+
+def test_concurrent_check_ins_collapse_into_one_write(db_engine, app_engine, db, event, make_attendees, headers_for):
+    make_attendees(1, event_id=event.event_id)
+    headers = headers_for("guest0@example.com", "attendee")
+    updates = []
+
+    def count_updates(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE"):
+            updates.append(statement)
+
+    async def scan_twice():
+        await database.start_write_queue()
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(*(
+                    client.post(f"/events/{event.event_id}/check-in", headers=headers) for _ in range(2)
+                ))
+        finally:
+            await database.stop_write_queue()
+
+    sa_event.listen(app_engine, "before_cursor_execute", count_updates)
+    try:
+        responses = asyncio.run(scan_twice())
+    finally:
+        sa_event.remove(app_engine, "before_cursor_execute", count_updates)
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert sorted(response.headers.get("idempotent-replayed", "false") for response in responses) == ["false", "true"]
+    assert len([statement for statement in updates if "event_registrations" in statement]) == 1
+    db.expire_all()
+    assert db.query(EventRegistration).one().check_in_status is True
+
+
+def test_table_store_replays_after_memory_is_lost(client, db, event, make_attendees, headers_for, monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_STORE", "table")
+    make_attendees(1, event_id=event.event_id)
+    headers = {**headers_for("guest0@example.com", "attendee"), "Idempotency-Key": "scan-1"}
+
+    assert client.post(f"/events/{event.event_id}/check-in", headers=headers).status_code == 200
+    assert db.query(IdempotencyKey).count() == 1
+
+    idempotency.store.clear()  # As after a restart, or on another worker
+    retry = client.post(f"/events/{event.event_id}/check-in", headers=headers)
+
+    assert retry.status_code == 200
+    assert retry.json() == {"message": "Check-in successful"}
+    assert retry.headers["idempotent-replayed"] == "true"
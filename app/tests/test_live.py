@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import httpx
+from sqlalchemy import event as sa_event
+
+from app import live
+from app.main import app
+from app.models import EventRegistration
+from app.routes.events import _live_frames
+
+
+def parse(frame):
+    assert frame.startswith("data: ") and frame.endswith("\n\n")
+    return json.loads(frame[len("data: "):])
+
+
+def test_watchers_share_one_snapshot_and_one_frame_per_tick(app_engine, db, event, make_attendees):
+    guests = make_attendees(3, event_id=event.event_id)
+    db.query(EventRegistration).filter(EventRegistration.attendee_id == guests[0].id).update({"check_in_status": True})
+    db.commit()
+
+    selects = []
+    sa_event.listen(app_engine, "before_cursor_execute", lambda *args: selects.append(args[2]))
+
+    async def scenario():
+        hub = live.CounterHub()
+        watchers = await asyncio.gather(*(hub.watch(event.event_id) for _ in range(1000)))
+        initial = {watcher.frame for watcher in watchers}
+
+        for _ in range(5):
+            hub.add(event.event_id, checked_in=1)
+        hub.add(event.event_id, registered=1)
+        hub.flush()
+        frames = [await watcher.next_frame(timeout=0) for watcher in watchers]
+
+        hub.flush()  # Nothing changed since the last tick
+        idle = await watchers[0].next_frame(timeout=0)
+
+        for watcher in watchers:
+            hub.unwatch(event.event_id, watcher)
+        return initial, frames, idle, hub
+
+    initial, frames, idle, hub = asyncio.run(scenario())
+
+    assert len([sql for sql in selects if sql.lstrip().upper().startswith("SELECT")]) == 2
+    assert [parse(frame) for frame in initial] == [
+        {"event_id": event.event_id, "registered": 3, "checked_in": 1, "capacity": 100}
+    ]
+    assert all(frame is frames[0] for frame in frames)  # Rendered once, shared by every watcher
+    assert parse(frames[0]) == {"event_id": event.event_id, "registered": 4, "checked_in": 6, "capacity": 100}
+    assert idle is None
+    assert not hub._counts and not hub._watchers
+
+
+def test_register_and_check_in_update_live_counts(db_engine, event, make_attendees, headers_for):
+    make_attendees(1)
+    headers = headers_for("guest0@example.com", "attendee")
+
+    async def scenario():
+        watcher = await live.counters.watch(event.event_id)
+        frames = _live_frames(event.event_id, watcher)
+        try:
+            first = await anext(frames)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                assert (await client.post(f"/events/{event.event_id}/register", headers=headers)).status_code == 200
+                assert (await client.post(f"/events/{event.event_id}/check-in", headers=headers)).status_code == 200
+                assert (await client.post(f"/events/{event.event_id}/check-in", headers=headers)).status_code == 400
+                missing = await client.get("/events/999/live")
+            live.counters.flush()
+            return first, await anext(frames), missing
+        finally:
+            await frames.aclose()  # Unwatches, as a client disconnect would
+
+    first, updated, missing = asyncio.run(scenario())
+
+    assert parse(first)["registered"] == 0
+    assert parse(updated) == {"event_id": event.event_id, "registered": 1, "checked_in": 1, "capacity": 100}
+    assert missing.status_code == 404
+    assert event.event_id not in live.counters._counts
@@ -0,0 +1,23 @@
+from benchmarks.load_test import compare, summarize
+
+
+def test_baseline_comparison_flags_throughput_and_p95_regressions():
+    baseline = {"results": {"asgi": {
+        "list_events": summarize([0.010] * 90 + [0.020] * 10, {200: 100}, 1.0),
+        "check_in": summarize([0.030] * 100, {200: 100}, 1.0),
+    }}}
+    results = {"results": {
+        "asgi": {
+            "list_events": summarize([0.011] * 85 + [0.030] * 5, {200: 85, 400: 5}, 1.0),  # Slower tail, fewer req/s
+            "check_in": summarize([0.031] * 95, {200: 95}, 1.0),  # Within the threshold
+            "login": summarize([0.300] * 3, {200: 3}, 1.0),  # Not in the baseline
+        },
+        "uvicorn": {"check_in": summarize([0.050] * 10, {200: 10}, 1.0)},
+    }}
+
+    assert results["results"]["asgi"]["list_events"]["errors"] == 5
+    assert compare(results, baseline, threshold=0.2) == ["asgi list_events: p95 30.0ms, baseline 20.0ms"]
+    assert compare(results, baseline, threshold=0.05) == [
+        "asgi list_events: 90.0 req/s, baseline 100.0",
+        "asgi list_events: p95 30.0ms, baseline 20.0ms",
+    ]
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from app.models import EventStats, OrganizerDailyStats, OrganizerStats
+from app.rollups import rebuild_statements
+
+
+def _snapshot(db):
+    db.expire_all()
+    return (
+        sorted((row.event_id, row.organizer_id, row.registrations, row.check_ins) for row in db.query(EventStats)),
+        sorted((row.organizer_id, row.events, row.registrations, row.check_ins) for row in db.query(OrganizerStats)),
+        sorted((row.organizer_id, row.day, row.registrations, row.check_ins) for row in db.query(OrganizerDailyStats)),
+    )
+
+
+def test_stats_follow_writes_and_match_a_rebuild(client, db, organizer, make_attendees, headers_for):
+    headers = headers_for("organizer@example.com", "organizer")
+    event_ids = [
+        client.post("/events/", headers=headers, json={
+            "name": name, "description": "Party", "start_time": "2025-05-01T18:00:00",
+            "end_time": "2025-05-01T22:00:00", "location": "Berlin", "max_attendees": 4,
+        }).json()["event_id"]
+        for name in ("Launch", "Afterparty")
+    ]
+    make_attendees(3)
+    guests = [headers_for(f"guest{i}@example.com", "attendee") for i in range(3)]
+    for guest in guests:
+        assert client.post(f"/events/{event_ids[0]}/register", headers=guest).status_code == 200
+    for guest in guests[:2]:
+        assert client.post(f"/events/{event_ids[0]}/check-in", headers=guest).status_code == 200
+    assert client.delete(f"/events/{event_ids[0]}/register", headers=guests[1]).status_code == 200
+    assert client.post(f"/events/{event_ids[1]}/register", headers=guests[0]).status_code == 200
+
+    stats = client.get("/organizers/me/stats", headers=headers).json()
+    assert stats == {
+        "organizer_id": organizer.id, "events": 2, "registrations": 3, "check_ins": 1, "check_in_rate": 0.3333,
+        "daily": [{"day": datetime.utcnow().date().isoformat(), "registrations": 3, "check_ins": 1}],
+    }
+
+    first = client.get("/organizers/me/stats/events", params={"limit": 1}, headers=headers).json()
+    assert first["items"] == [{
+        "event_id": event_ids[0], "name": "Launch", "max_attendees": 4,
+        "registrations": 2, "check_ins": 1, "registration_rate": 0.5, "check_in_rate": 0.5,
+    }]
+    second = client.get(
+        "/organizers/me/stats/events", params={"limit": 1, "cursor": first["next_cursor"]}, headers=headers
+    ).json()
+    assert [item["event_id"] for item in second["items"]] == [event_ids[1]]
+    assert second["next_cursor"] is None
+
+    incremental = _snapshot(db)
+    for statement in rebuild_statements():
+        db.execute(statement)
+    db.commit()
+    assert _snapshot(db) == incremental
+
+
+def test_stats_are_for_organizers_only(client, event, make_attendees, headers_for):
+    make_attendees(1)
+    response = client.get("/organizers/me/stats", headers=headers_for("guest0@example.com", "attendee"))
+    assert response.status_code == 403
+
+
+def test_leftover_stats_row_does_not_block_a_reused_event_id(client, db, organizer, headers_for):
+    db.add(EventStats(event_id=1, organizer_id=organizer.id, registrations=7, check_ins=3))  # e.g. after clean_db.py
+    db.commit()
+
+    response = client.post("/events/", headers=headers_for("organizer@example.com", "organizer"), json={
+        "name": "Launch", "description": "Party", "start_time": "2025-05-01T18:00:00",
+        "end_time": "2025-05-01T22:00:00", "location": "Berlin", "max_attendees": 4,
+    })
+
+    assert response.status_code == 200 and response.json()["event_id"] == 1
+    db.expire_all()
+    assert (db.get(EventStats, 1).registrations, db.get(EventStats, 1).check_ins) == (0, 0)
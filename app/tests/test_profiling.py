@@ -0,0 +1,75 @@
+import logging
+from datetime import datetime
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app import profiling
+from app.database import get_db
+from app.models import Attendee, Event
+
+
+def test_requests_report_sql_counts_and_timings(client, event, make_attendees, headers_for):
+    make_attendees(1)
+    labels = {"method": "POST", "route": "/events/{event_id}/register"}
+    before = profiling.request_sql_statements.count(**labels)
+    response = client.post(f"/events/{event.event_id}/register", headers=headers_for("guest0@example.com", "attendee"))
+
+    assert response.status_code == 200
+    timing = dict(entry.split(";", 1) for entry in response.headers["server-timing"].split(", "))
+    assert set(timing) >= {"db", "jwt", "principal", "write", "serialize", "total"}
+    queries = int(timing["db"].split('desc="')[1].split(" ")[0])
+    assert queries >= 3  # Principal lookup, attendee lookup, seat update and insert; counted via the write queue too
+
+    assert profiling.request_sql_statements.count(**labels) == before + 1
+    assert profiling.request_serialization_seconds.count(**labels) >= 1
+    assert profiling.request_seconds.count(**labels, status="200") >= 1
+    exposition = client.get("/metrics").text
+    assert 'http_request_sql_statements_bucket{method="POST",route="/events/{event_id}/register",le="+Inf"}' in exposition
+
+
+def test_repeated_statements_are_flagged_as_n_plus_one(db_engine, db, organizer, make_attendees, caplog):
+    start = datetime(2025, 3, 10, 9, 0)
+    db.add_all(
+        Event(name=f"E{i}", description="", start_time=start, end_time=start, location="X", max_attendees=1,
+              organizer_id=organizer.id)
+        for i in range(12)
+    )
+    db.commit()
+    make_attendees(24)
+
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+    @app.get("/loop")
+    async def loop(db=Depends(get_db)):
+        return [(await db.execute(select(Event.name).where(Event.event_id == i))).scalar() for i in range(1, 13)]
+
+    @app.get("/chunked")
+    async def chunked(db=Depends(get_db)):
+        ids = list(range(1, 25))
+        return [len((await db.scalars(select(Attendee.id).where(Attendee.id.in_(ids[i:i + 2])))).all())
+                for i in range(0, 24, 2)]
+
+    client = TestClient(app)
+    before = profiling.n_plus_one_requests.value(method="GET", route="/loop")
+    with caplog.at_level(logging.WARNING, logger="app.profiling"):
+        assert client.get("/chunked").json() == [2] * 12  # Set-based chunks are not N+1
+        assert not caplog.records
+        assert len(client.get("/loop").json()) == 12
+
+    assert profiling.n_plus_one_requests.value(method="GET", route="/loop") == before + 1
+    assert "Possible N+1 query in GET /loop: 12 executions of SELECT events.name" in caplog.records[0].getMessage()
+
+
+def test_profile_header_returns_a_report_only_when_enabled(client, event, monkeypatch):
+    plain = client.get("/events/", headers={"X-Profile": "1"})
+    assert plain.headers["content-type"] == "application/json"
+
+    monkeypatch.setattr(profiling, "REQUEST_PROFILING_ENABLED", True)
+    profiled = client.get(f"/events/{event.event_id}", headers={"X-Profile": "1"})
+
+    assert profiled.headers["x-profiled-status"] == "200"
+    assert profiled.headers["content-type"].startswith("text/plain")
+    assert "function calls" in profiled.text and "get_event_snapshot" in profiled.text
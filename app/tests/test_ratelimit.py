@@ -0,0 +1,58 @@
+import time
+
+from app import ratelimit
+from app.cache import LocalRedis
+from app.ratelimit import Limit, SharedBuckets, admission_requests, parse_limit
+
+
+def test_login_is_limited_per_client_ip(client, monkeypatch):
+    monkeypatch.setitem(ratelimit.LIMITS["login"], "ip", Limit(2, 60))
+    limited_before = admission_requests.value(route="login", outcome="rate_limited")
+    credentials = {"username": "nobody@example.com", "password": "wrong"}
+
+    assert [client.post("/auth/login", data=credentials).status_code for _ in range(2)] == [401, 401]
+    response = client.post("/auth/login", data=credentials)
+
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["retry-after"]) <= 30
+    assert admission_requests.value(route="login", outcome="rate_limited") == limited_before + 1
+
+
+def test_event_registration_is_limited_per_token_subject(client, db, event, make_attendees, headers_for, monkeypatch):
+    monkeypatch.setitem(ratelimit.LIMITS["event_register"], "subject", Limit(1, 60))
+    make_attendees(2)
+    first, second = headers_for("guest0@example.com", "attendee"), headers_for("guest1@example.com", "attendee")
+
+    assert client.post(f"/events/{event.event_id}/register", headers=first).status_code == 200
+    assert client.post(f"/events/{event.event_id}/register", headers=first).status_code == 429
+    assert client.post(f"/events/{event.event_id}/register", headers=second).status_code == 200
+
+
+def test_gate_sheds_when_full(client, monkeypatch):
+    monkeypatch.setattr(ratelimit, "gate", ratelimit.ConcurrencyGate(1))
+    shed_before = admission_requests.value(route="signup", outcome="shed")
+    assert ratelimit.gate.try_enter()  # A request already in flight
+
+    response = client.post("/auth/register", json={
+        "first_name": "Ann", "last_name": "Lee", "email": "ann@example.com", "password": "pw", "role": "attendee",
+    })
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == str(ratelimit.ADMISSION_RETRY_AFTER)
+    assert admission_requests.value(route="signup", outcome="shed") == shed_before + 1
+    ratelimit.gate.leave()
+    assert ratelimit.gate.inflight == 0
+
+
+def test_shared_buckets_count_fixed_windows(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(ratelimit.time, "time", lambda: now[0])
+    shared = SharedBuckets(LocalRedis())
+    limit = parse_limit("2/10")
+
+    assert [shared.take("login:ip:1.2.3.4", limit) for _ in range(3)] == [0.0, 0.0, 10.0]
+    now[0] += 4.5
+    assert shared.take("login:ip:1.2.3.4", limit) == 5.5
+    now[0] += 6
+    assert shared.take("login:ip:1.2.3.4", limit) == 0.0
+    assert parse_limit("0") is None
@@ -0,0 +1,24 @@
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app import rendering
+
+
+@pytest.mark.parametrize("renderer", ["auto", "pydantic"])
+def test_rendered_rows_match_the_validated_response_encoding(renderer, client, event, make_attendees):
+    dumps = rendering._load_dumps(renderer)
+    row = {"start_time": datetime(2025, 3, 10, 9, 0), "end_time": datetime(2025, 3, 10, 9, 0, 0, 250),
+           "description": None, "check_in_status": False, "name": "Café"}
+    assert json.loads(dumps(row)) == json.loads(json.dumps(jsonable_encoder(row)))
+
+    make_attendees(2, event_id=event.event_id)
+    attendees = client.get(f"/events/{event.event_id}/attendees").json()
+    assert attendees == [
+        {"id": i + 1, "event_id": event.event_id, "first_name": "Guest", "last_name": str(i),
+         "email": f"guest{i}@example.com", "phone_number": None, "check_in_status": False}
+        for i in range(2)
+    ]
+    assert client.get(f"/events/{event.event_id}").json()["start_time"] == "2025-03-10T09:00:00"
@@ -0,0 +1,102 @@
+from sqlalchemy import func
+
+from app.models import Event, EventRegistration, WaitlistBucket, WaitlistEntry
+
+
+def test_full_event_waitlists_and_cancellation_promotes(client, db, event, make_attendees, headers_for):
+    event.max_attendees = 1
+    db.commit()
+    attendees = make_attendees(3)
+    guests = [headers_for(f"guest{i}@example.com", "attendee") for i in range(3)]
+    register = f"/events/{event.event_id}/register"
+
+    assert client.post(register, headers=guests[0]).status_code == 200
+    second = client.post(register, headers=guests[1])
+    assert second.status_code == 202
+    assert second.json() == {"event_id": event.event_id, "status": "waitlisted", "position": 1}
+    assert client.post(register, headers=guests[2]).json()["position"] == 2
+    assert client.post(register, headers=guests[2]).json()["position"] == 2  # Asking again keeps the place
+    assert client.post(register, headers=guests[0]).json() == {"detail": "You are already registered for this event"}
+
+    assert client.delete(register, headers=guests[0]).json() == {"message": "Registration cancelled"}
+
+    db.expire_all()
+    assert db.get(Event, event.event_id).registered_count == 1
+    assert [row.attendee_id for row in db.query(EventRegistration)] == [attendees[1].id]
+    assert client.get(f"/events/{event.event_id}/waitlist", headers=guests[1]).status_code == 404
+    assert client.get(f"/events/{event.event_id}/waitlist", headers=guests[2]).json()["position"] == 1
+    assert client.post(f"/events/{event.event_id}/check-in", headers=guests[1]).status_code == 200
+
+    assert client.delete(register, headers=guests[2]).json() == {"message": "Left the waitlist"}
+    assert client.delete(register, headers=guests[2]).status_code == 404
+    db.expire_all()
+    assert db.query(WaitlistEntry).count() == 0
+
+
+def test_raising_capacity_promotes_in_queue_order(client, db, event, organizer, make_attendees, headers_for, monkeypatch):
+    monkeypatch.setattr("app.crud.WAITLIST_PROMOTION_BATCH", 2)  # Several batches in one transaction
+    event.max_attendees = 0
+    db.commit()
+    attendees = make_attendees(6)
+    for i in range(6):
+        assert client.post(
+            f"/events/{event.event_id}/register", headers=headers_for(f"guest{i}@example.com", "attendee")
+        ).json()["position"] == i + 1
+
+    response = client.put(
+        f"/events/{event.event_id}", json={"max_attendees": 5},
+        headers=headers_for("organizer@example.com", "organizer"),
+    )
+    assert response.status_code == 200
+
+    db.expire_all()
+    assert db.get(Event, event.event_id).registered_count == 5
+    assert {row.attendee_id for row in db.query(EventRegistration)} == {attendee.id for attendee in attendees[:5]}
+    assert [entry.attendee_id for entry in db.query(WaitlistEntry)] == [attendees[5].id]
+    assert client.get(
+        f"/events/{event.event_id}/waitlist", headers=headers_for("guest5@example.com", "attendee")
+    ).json()["position"] == 1
+
+
+def test_leaving_the_waitlist_moves_everyone_behind_up(client, db, event, make_attendees, headers_for):
+    event.max_attendees = 0
+    db.commit()
+    make_attendees(4)
+    guests = [headers_for(f"guest{i}@example.com", "attendee") for i in range(4)]
+    register = f"/events/{event.event_id}/register"
+    for guest in guests[:3]:
+        client.post(register, headers=guest)
+
+    assert client.delete(register, headers=guests[1]).json() == {"message": "Left the waitlist"}
+
+    assert client.get(f"/events/{event.event_id}/waitlist", headers=guests[0]).json()["position"] == 1
+    assert client.get(f"/events/{event.event_id}/waitlist", headers=guests[2]).json()["position"] == 2
+    assert client.post(register, headers=guests[3]).json()["position"] == 3
+
+
+def test_positions_stay_exact_across_waitlist_buckets(client, db, event, make_attendees, headers_for, monkeypatch):
+    monkeypatch.setattr("app.crud.WAITLIST_BUCKET_SIZE", 2)
+    event.max_attendees = 0
+    db.commit()
+    make_attendees(8)
+    guests = [headers_for(f"guest{i}@example.com", "attendee") for i in range(8)]
+    register = f"/events/{event.event_id}/register"
+    for guest in guests:
+        client.post(register, headers=guest)
+
+    for leaving in (2, 3, 6):  # Empties the bucket of sequences 3 and 4
+        client.delete(register, headers=guests[leaving])
+    response = client.put(
+        f"/events/{event.event_id}", json={"max_attendees": 1}, headers=headers_for("organizer@example.com", "organizer")
+    )
+    assert response.status_code == 200  # guest0 is promoted
+
+    positions = [
+        client.get(f"/events/{event.event_id}/waitlist", headers=guests[i]).json()["position"] for i in (1, 4, 5, 7)
+    ]
+    assert positions == [1, 2, 3, 4]
+    db.expire_all()
+    stored = {(row.bucket, row.entries) for row in db.query(WaitlistBucket)}
+    assert stored == set(
+        db.query(WaitlistEntry.sequence.op("/")(2), func.count()).group_by(WaitlistEntry.sequence.op("/")(2)).all()
+    )
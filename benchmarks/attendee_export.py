@@ -0,0 +1,98 @@
+"""Throughput and peak memory of the attendee export, against the JSON attendee list.
+
+    python -m benchmarks.attendee_export [--attendees 100000]
+
+Seeds one event with --attendees registrations and downloads its attendee list
+straight from the ASGI app: the buffered JSON list, the streamed JSON array,
+and the CSV and Arrow exports (Arrow only when pyarrow is installed). Body
+chunks are counted and dropped as they arrive (httpx's ASGI transport would
+buffer them), so the peak Python memory tracemalloc reports on a second run is
+the server's own.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+from benchmarks.common import seed_attendees, seed_events, seed_organizer, temp_database
+from app.main import app
+from app.routes.auth import create_access_token
+from app.streaming import arrow_available
+
+
+async def download(event_id, path, params):
+    """Run one GET through the app, dropping the body as it is sent; returns ``(seconds, bytes)``."""
+    token = create_access_token({"sub": "organizer@bench.example.com", "role": "organizer"})
+    path = f"/events/{event_id}/{path}"
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": urlencode(params).encode(),
+        "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    requested = False
+    finished = asyncio.Event()
+    response = {"status": None, "size": 0}
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["size"] += len(message.get("body", b""))
+            if not message.get("more_body"):
+                finished.set()
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    assert response["status"] == 200, response["status"]
+    return time.perf_counter() - started, response["size"]
+
+
+def measure(event_id, path, params):
+    seconds, size = asyncio.run(download(event_id, path, params))
+    tracemalloc.start()
+    asyncio.run(download(event_id, path, params))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attendees", type=int, default=100_000)
+    args = parser.parse_args()
+
+    scenarios = {
+        "json (buffered)": ("attendees", {}),
+        "json (streamed)": ("attendees", {"format": "json"}),
+        "csv export": ("attendees/export", {"format": "csv"}),
+        "csv export, wide": ("attendees/export", {"format": "csv", "fields": "email,event_id,first_name,last_name"}),
+    }
+    if arrow_available():
+        scenarios["arrow export"] = ("attendees/export", {"format": "arrow", "fields": "id,email,check_in_status"})
+
+    with temp_database(bind_app=True) as Session:
+        with Session() as db:
+            organizer_id = seed_organizer(db)
+            (event_id,) = seed_events(db, organizer_id, 1)
+            seed_attendees(db, args.attendees, event_id=event_id)
+
+        for name, (path, params) in scenarios.items():
+            seconds, size, peak = measure(event_id, path, params)
+            print(
+                f"{name:>18}  {args.attendees:>8} rows  {seconds:7.2f}s  {args.attendees / seconds:>10,.0f} rows/s  "
+                f"{size / 1e6:7.1f} MB  peak {peak / 1e6:7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
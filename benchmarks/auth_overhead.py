@@ -0,0 +1,85 @@
+"""Per-request cost of authenticating a bearer token, by token kind and cache state.
+
+    python -m benchmarks.auth_overhead [--requests 20000] [--principals 1000] [--attendees 10000]
+
+Calls ``get_current_user`` directly for tokens spread over --principals
+attendees (out of --attendees seeded): tokens that only name the user (resolved
+by email through the principal cache) against the claim tokens /auth/login
+issues (id, role and token version, checked against the token-version cache).
+"cold" clears the cache before every call, so each one queries the database. A
+single session is reused, as a pooled connection would be, so the numbers are
+the lookups' own cost. "jwt only" is the signature check every scenario pays.
+"""
+import argparse
+import asyncio
+import time
+
+from jose import jwt
+from sqlalchemy import event
+
+from benchmarks.common import seed_attendees, temp_database
+from app.models import Attendee
+from app.routes import auth
+
+
+async def run(Session, tokens, requests, authenticate, clear=None):
+    """Authenticate ``requests`` tokens in turn; returns ``(seconds, queries)``."""
+    queries = []
+    engine = Session.async_session.kw["bind"].sync_engine
+    record = lambda *args: queries.append(1)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        async with Session.async_session() as db:
+            for token in tokens:  # Warm the caches (and the connection)
+                await authenticate(token, db)
+            del queries[:]
+            started = time.perf_counter()
+            for i in range(requests):
+                if clear is not None:
+                    clear()
+                await authenticate(tokens[i % len(tokens)], db)
+            return time.perf_counter() - started, len(queries)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+async def decode_only(token, db):
+    return jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--principals", type=int, default=1_000, help="distinct callers the requests cycle over")
+    parser.add_argument("--attendees", type=int, default=10_000, help="attendees in the table")
+    args = parser.parse_args()
+
+    with temp_database() as Session:
+        with Session() as db:
+            seed_attendees(db, args.attendees)
+            attendees = db.query(Attendee.id, Attendee.email).order_by(Attendee.id).limit(args.principals).all()
+
+        email_tokens = [auth.create_access_token({"sub": email, "role": "attendee"}) for _, email in attendees]
+        claim_tokens = [
+            auth.create_access_token({"sub": email, "id": attendee_id, "role": "attendee", "ver": 0})
+            for attendee_id, email in attendees
+        ]
+        scenarios = {
+            "jwt only": (email_tokens, decode_only, None),
+            "email lookup, cold": (email_tokens, auth.get_current_user, auth.principal_cache.clear),
+            "email lookup, cached": (email_tokens, auth.get_current_user, None),
+            "claims, cold version": (claim_tokens, auth.get_current_user, auth.token_version_cache.clear),
+            "claims, cached version": (claim_tokens, auth.get_current_user, None),
+        }
+        for name, (tokens, authenticate, clear) in scenarios.items():
+            auth.principal_cache.clear()
+            auth.token_version_cache.clear()
+            seconds, queries = asyncio.run(run(Session, tokens, args.requests, authenticate, clear))
+            print(
+                f"{name:>22}  {args.requests:>7} requests  {seconds / args.requests * 1e6:8.1f} us/request  "
+                f"{queries / args.requests:5.2f} queries/request"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Rows-per-second benchmark for the set-based bulk check-in engine.
+
+    python -m benchmarks.bulk_check_in [--sizes 1000 10000 100000] [--legacy]
+
+`--legacy` also times the previous one-SELECT-per-row loop for comparison.
+"""
+import argparse
+import asyncio
+
+from app.crud import bulk_check_in_attendees
+from app.models import Attendee, EventRegistration
+from benchmarks.common import temp_database, seed_organizer, seed_events, seed_attendees, timer
+
+
+def legacy_bulk_check_in(db, event_id, emails):
+    """The original per-row implementation, kept here only as a baseline."""
+    for email in emails:
+        registration = db.query(EventRegistration).join(Attendee, Attendee.id == EventRegistration.attendee_id).filter(
+            Attendee.email == email, EventRegistration.event_id == event_id
+        ).first()
+        if registration and not registration.check_in_status:
+            registration.check_in_status = True
+    db.commit()
+
+
+def run(size, legacy=False):
+    results = {}
+    with temp_database() as Session:
+        with Session() as db:
+            organizer_id = seed_organizer(db)
+            (event_id,) = seed_events(db, organizer_id, 1)
+            emails = seed_attendees(db, size, event_id=event_id)
+            # Roughly 10% of the scanned rows are unknown to the event
+            unknown = [f"walk-in{i}@bench.example.com" for i in range(size // 10)]
+            csv_content = "email,event_id\n" + "".join(
+                f"{email},{event_id}\n" for email in emails + unknown
+            )
+
+            async def set_based():
+                async with Session.async_session() as async_db:
+                    return await bulk_check_in_attendees(async_db, event_id, organizer_id, csv_content)
+
+            with timer() as elapsed:
+                report = asyncio.run(set_based())
+            assert len(report["checked_in"]) == size
+            results["set_based"] = elapsed["elapsed"]
+
+            if legacy:
+                db.query(EventRegistration).update({EventRegistration.check_in_status: False})
+                db.commit()
+                with timer() as elapsed:
+                    legacy_bulk_check_in(db, event_id, emails + unknown)
+                results["legacy"] = elapsed["elapsed"]
+
+    rows = size + size // 10
+    for name, seconds in results.items():
+        print(f"{name:>10} {rows:>8} rows  {seconds:8.3f}s  {rows / seconds:>12,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--legacy", action="store_true", help="also time the per-row baseline")
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, legacy=args.legacy)
+
+
+if __name__ == "__main__":
+    main()
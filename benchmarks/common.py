@@ -0,0 +1,126 @@
+"""Shared helpers for the benchmark scripts: throwaway databases and synthetic data."""
+import os
+
+# Benchmarks run without a .env file; these only matter for in-process token handling
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, literal, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database import (
+    AsyncSessionLocal, Base, SessionLocal, async_engine as default_async_engine, configure_sqlite,
+    engine as default_engine
+)
+from app.models import User, Event, Attendee, EventRegistration
+
+SEED_CHUNK_SIZE = 10_000
+
+
+@contextmanager
+def temp_database(bind_app=False, profile="default"):
+    """Yield a sync sessionmaker (for seeding) bound to a fresh SQLite file that is deleted afterwards.
+
+    The async sessionmaker for the same file is available as ``Session.async_session``
+    and its path as ``Session.path``.
+    With ``bind_app=True`` the application's own sessions use the file as well, for
+    benchmarks that drive the FastAPI app in-process. ``profile`` selects the SQLite
+    tuning profile for the async engine (see ``app.database.configure_sqlite``).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+        configure_sqlite(async_engine.sync_engine, profile)
+        Base.metadata.create_all(bind=engine)
+        if bind_app:
+            SessionLocal.configure(bind=engine)
+            AsyncSessionLocal.configure(bind=async_engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        Session.async_session = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+        Session.path = path
+        try:
+            yield Session
+        finally:
+            if bind_app:
+                SessionLocal.configure(bind=default_engine)
+                AsyncSessionLocal.configure(bind=default_async_engine)
+            engine.dispose()
+
+
+def seed_organizer(db, email="organizer@bench.example.com"):
+    organizer = User(username=email, email=email, password="x")
+    db.add(organizer)
+    db.commit()
+    return organizer.id
+
+
+def seed_events(db, organizer_id, count, start=datetime(2025, 1, 1, 9, 0)):
+    """Insert `count` one-hour events spaced an hour apart and return their ids."""
+    rows = [
+        {
+            "name": f"Event {i}",
+            "description": f"Synthetic event number {i}",
+            "start_time": start + timedelta(hours=i),
+            "end_time": start + timedelta(hours=i + 1),
+            "location": f"Hall {i % 50}",
+            "max_attendees": 1_000_000,
+            "status": "scheduled",
+            "organizer_id": organizer_id,
+        }
+        for i in range(count)
+    ]
+    for offset in range(0, len(rows), SEED_CHUNK_SIZE):
+        db.execute(insert(Event), rows[offset:offset + SEED_CHUNK_SIZE])
+    db.commit()
+    return [event_id for (event_id,) in db.query(Event.event_id).order_by(Event.event_id)]
+
+
+def seed_attendees(db, count, event_id=None, prefix="guest", password="x"):
+    """Insert `count` attendees registered for `event_id` and return their emails."""
+    emails = [f"{prefix}{i}@bench.example.com" for i in range(count)]
+    for offset in range(0, count, SEED_CHUNK_SIZE):
+        chunk = emails[offset:offset + SEED_CHUNK_SIZE]
+        db.execute(insert(Attendee), [
+            {"first_name": "Guest", "last_name": str(offset + i), "email": email, "password": password}
+            for i, email in enumerate(chunk)
+        ])
+        if event_id is not None:
+            db.execute(insert(EventRegistration).from_select(
+                ["event_id", "attendee_id"],
+                select(literal(event_id), Attendee.id).where(Attendee.email.in_(chunk)),
+            ))
+    if event_id is not None:
+        db.execute(
+            update(Event).where(Event.event_id == event_id).values(registered_count=Event.registered_count + count)
+        )
+    db.commit()
+    return emails
+
+
+@contextmanager
+def timer():
+    """Measure wall time; read `elapsed` on the yielded dict after the block."""
+    result = {}
+    started = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["elapsed"] = time.perf_counter() - started
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
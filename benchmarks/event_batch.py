@@ -0,0 +1,97 @@
+"""Importing a venue's sessions one request at a time versus through the batch endpoints.
+
+    python -m benchmarks.event_batch [--sessions 30000] [--single 1000] [--batch-size 1000]
+
+Creates --sessions events through POST /events/batch and then edits all of them
+through PATCH /events/batch, and times --single events through POST /events/
+and PUT /events/{id} for comparison (extrapolated to --sessions).
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.common import seed_organizer, temp_database, timer
+from app.main import app
+from app.routes.auth import create_access_token, principal_cache
+
+START = datetime(2026, 9, 1, 9, 0)
+
+
+def session_payload(i):
+    start = START + timedelta(minutes=30 * i)
+    return {
+        "name": f"Session {i}",
+        "description": f"Imported session {i}",
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(minutes=45)).isoformat(),
+        "location": f"Room {i % 40}",
+        "max_attendees": 200,
+    }
+
+
+async def import_single(client, headers, count):
+    with timer() as created:
+        ids = []
+        for i in range(count):
+            response = await client.post("/events/", headers=headers, json=session_payload(i))
+            ids.append(response.json()["event_id"])
+    with timer() as updated:
+        for event_id in ids:
+            await client.put(f"/events/{event_id}", headers=headers, json={"max_attendees": 250})
+    return created["elapsed"], updated["elapsed"]
+
+
+async def import_batched(client, headers, count, batch_size):
+    ids, failed = [], 0
+    with timer() as created:
+        for offset in range(0, count, batch_size):
+            items = [session_payload(i) for i in range(offset, min(offset + batch_size, count))]
+            report = (await client.post("/events/batch", headers=headers, json=items)).json()
+            failed += report["failed"]
+            ids.extend(result["event"]["event_id"] for result in report["results"] if result["event"])
+    with timer() as updated:
+        for offset in range(0, len(ids), batch_size):
+            items = [{"event_id": event_id, "max_attendees": 250} for event_id in ids[offset:offset + batch_size]]
+            report = (await client.patch("/events/batch", headers=headers, json=items)).json()
+            failed += report["failed"]
+    return created["elapsed"], updated["elapsed"], failed
+
+
+async def run(args, email):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': email, 'role': 'organizer'})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        single = await import_single(client, headers, args.single)
+        batched = await import_batched(client, headers, args.sessions, args.batch_size)
+    return single, batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=30_000)
+    parser.add_argument("--single", type=int, default=1_000)
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    args = parser.parse_args()
+
+    principal_cache.clear()
+    with temp_database(bind_app=True) as Session:
+        with Session() as db:
+            seed_organizer(db)
+        started = time.perf_counter()
+        (single_create, single_update), (batch_create, batch_update, failed) = asyncio.run(
+            run(args, "organizer@bench.example.com")
+        )
+
+    scale = args.sessions / args.single
+    print(f"single  create {args.single} in {single_create:6.2f}s  (~{single_create * scale:7.1f}s for {args.sessions})")
+    print(f"single  update {args.single} in {single_update:6.2f}s  (~{single_update * scale:7.1f}s for {args.sessions})")
+    print(f"batch   create {args.sessions} in {batch_create:6.2f}s  ({args.sessions / batch_create:,.0f} events/s)")
+    print(f"batch   update {args.sessions} in {batch_update:6.2f}s  ({args.sessions / batch_update:,.0f} events/s)")
+    print(f"failed items: {failed}   total {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Latency of ranked FTS5 event search against the LIKE '%...%' fallback.
+
+    python -m benchmarks.event_search [--events 1000000] [--repeat 20]
+
+Seeds a synthetic catalog of events with generated names, descriptions and
+locations, then times the same first-page searches through both backends.
+Common words match far more than EVENT_SEARCH_RANK_LIMIT events, so the fts5
+backend lists their matches in start time order, as the like backend does;
+"4711" (a name number, so a handful of prefix matches) is ranked.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import crud
+from app.models import Event
+from benchmarks.common import SEED_CHUNK_SIZE, percentile, seed_organizer, temp_database, timer
+
+TOPICS = ["python", "data", "cloud", "security", "design", "startup", "music", "gardening", "robotics", "finance"]
+FORMATS = ["conference", "meetup", "workshop", "summit", "hackathon", "webinar", "festival", "bootcamp"]
+FILLER = ["talks", "networking", "hands-on", "keynote", "panel", "sprints", "demos", "lunch", "awards", "party"]
+CITIES = ["Berlin", "Paris", "London", "Lisbon", "Madrid", "Warsaw", "Vienna", "Prague", "Dublin", "Oslo"]
+QUERIES = ["python", "pyth", "robotics summit", "keynote", "lisbon hackathon", "4711", "zebra"]
+
+
+def seed_catalog(db, organizer_id, count, rng):
+    start = datetime(2025, 1, 1, 9, 0)
+    for offset in range(0, count, SEED_CHUNK_SIZE):
+        db.execute(insert(Event), [
+            {
+                "name": f"{rng.choice(TOPICS).title()} {rng.choice(FORMATS).title()} {i}",
+                "description": " ".join(rng.sample(FILLER, 4)) + " about " + rng.choice(TOPICS),
+                "start_time": start + timedelta(minutes=i),
+                "end_time": start + timedelta(minutes=i + 60),
+                "location": rng.choice(CITIES),
+                "max_attendees": 100,
+                "status": "scheduled",
+                "organizer_id": organizer_id,
+            }
+            for i in range(offset, min(offset + SEED_CHUNK_SIZE, count))
+        ])
+    db.commit()
+
+
+async def time_queries(Session, backend, repeat):
+    crud.EVENT_SEARCH_BACKEND = backend
+    results = {}
+    async with Session.async_session() as db:
+        for q in QUERIES:
+            latencies = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                page = await crud.get_events(db, q=q, limit=20)
+                latencies.append(time.perf_counter() - started)
+            results[q] = (latencies, len(page["items"]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with temp_database() as Session:
+        with Session() as db:
+            with timer() as elapsed:
+                seed_catalog(db, seed_organizer(db), args.events, random.Random(42))
+        print(f"seeded {args.events:,} events (FTS triggers included) in {elapsed['elapsed']:.1f}s")
+
+        for backend in ("auto", "like"):
+            label = "fts5" if backend == "auto" else "like"
+            for q, (latencies, hits) in asyncio.run(time_queries(Session, backend, args.repeat)).items():
+                print(
+                    f"{label:>5}  q={q!r:<20} hits={hits:>3}  "
+                    f"p50={percentile(latencies, 50) * 1000:>9.2f}ms  p95={percentile(latencies, 95) * 1000:>9.2f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Latency of time-window event queries with and without the R*Tree window index.
+
+    python -m benchmarks.event_windows [--events 1000000] [--repeat 20]
+
+Seeds events of mixed length (one hour to a week) every 30 minutes on both
+sides of "now", times the first page of several overlap queries through
+``crud.get_events``, then times the status scheduler's catch-up pass and a
+steady-state pass.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import crud, scheduler
+from app.models import Event
+from benchmarks.common import SEED_CHUNK_SIZE, percentile, seed_organizer, temp_database, timer
+
+DURATIONS = [timedelta(hours=1), timedelta(hours=3), timedelta(hours=8), timedelta(days=2), timedelta(days=7)]
+
+
+def seed_timeline(db, organizer_id, count, now, rng):
+    first = now - timedelta(minutes=30 * (count // 2))
+    for offset in range(0, count, SEED_CHUNK_SIZE):
+        rows = []
+        for i in range(offset, min(offset + SEED_CHUNK_SIZE, count)):
+            start = first + timedelta(minutes=30 * i)
+            rows.append({
+                "name": f"Event {i}", "description": "", "start_time": start,
+                "end_time": start + rng.choice(DURATIONS), "location": f"Hall {i % 50}",
+                "max_attendees": 100, "status": "scheduled", "organizer_id": organizer_id,
+            })
+        db.execute(insert(Event), rows)
+    db.commit()
+
+
+def windows(now):
+    return {
+        "happening now": (now, now),
+        "next 7 days": (now, now + timedelta(days=7)),
+        "one day, 5y ago": (now - timedelta(days=5 * 365), now - timedelta(days=5 * 365 - 1)),
+        "from now on": (now, None),
+        "next year": (now, now + timedelta(days=365)),
+    }
+
+
+async def time_windows(Session, index, now, repeat):
+    crud.EVENT_WINDOW_INDEX = index
+    results = {}
+    async with Session.async_session() as db:
+        for label, (start, end) in windows(now).items():
+            latencies = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                await crud.get_events(db, start=start, end=end, limit=50)
+                latencies.append(time.perf_counter() - started)
+            results[label] = latencies
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    now = datetime(2026, 6, 1, 12, 0)
+
+    with temp_database(bind_app=True) as Session:
+        with Session() as db:
+            with timer() as elapsed:
+                seed_timeline(db, seed_organizer(db), args.events, now, random.Random(7))
+        print(f"seeded {args.events:,} events in {elapsed['elapsed']:.1f}s")
+
+        for index in ("auto", "none"):
+            label = "rtree" if index == "auto" else "btree"
+            for window, latencies in asyncio.run(time_windows(Session, index, now, args.repeat)).items():
+                print(
+                    f"{label:>5}  {window:<16} p50={percentile(latencies, 50) * 1000:>9.2f}ms  "
+                    f"p95={percentile(latencies, 95) * 1000:>9.2f}ms"
+                )
+
+        for label, moment in (("catch-up", now), ("steady", now + timedelta(minutes=1))):
+            with timer() as elapsed:
+                moved = asyncio.run(scheduler.advance_statuses(now=moment))
+            print(f"scheduler {label:<9} {elapsed['elapsed']:8.2f}s  moved={moved}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""Per-endpoint load test of the API hot paths, with JSON results and baseline comparison.
+
+    python -m benchmarks.load_test [--scale small] [--transport asgi|uvicorn|both] [--workers 2]
+                                   [--duration 5] [--concurrency 16] [--endpoints list_events,check_in]
+                                   [--output results.json] [--baseline baseline.json] [--threshold 0.2]
+                                   [--rate-limits]
+    python -m benchmarks.load_test --compare results.json --baseline baseline.json
+
+Seeds a throwaway database with organizers, events and attendees at the chosen
+scale, then drives each endpoint in turn for --duration seconds from
+--concurrency clients: in-process through httpx's ASGI transport (with the
+app's lifespan running), and/or over HTTP against ``uvicorn --workers N``.
+Reports requests/s and p50/p95/p99 latency per endpoint. Every client shares
+one address, so per-IP rate limits are switched off unless --rate-limits is
+given.
+
+With --baseline, every endpoint is compared against the stored results and the
+script exits with status 1 if any of them lost more than --threshold of its
+throughput or gained more than --threshold on its p95 latency.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.common import percentile, seed_attendees, seed_events, seed_organizer, temp_database
+from app import hashing, ratelimit
+from app.main import app
+from app.routes.auth import create_access_token, principal_cache
+
+SCALES = {
+    "small": {"organizers": 5, "events": 1_000, "attendees": 5_000},
+    "medium": {"organizers": 50, "events": 50_000, "attendees": 50_000},
+    "large": {"organizers": 200, "events": 500_000, "attendees": 500_000},
+}
+PASSWORD = "load-test"
+SEARCH_TERMS = ["synthetic", "hall", "event 12", "number 7", "hall 3"]
+WARMUP_REQUESTS = 20
+
+
+class Workload:
+    """Seeded ids and credentials the endpoint scenarios draw from."""
+
+    def __init__(self, event_ids, organizer_emails, guest_emails, checkin_emails, checkin_event_id):
+        self.event_ids = event_ids
+        self.organizer_emails = organizer_emails
+        self.guest_emails = guest_emails
+        self.checkin_emails = checkin_emails
+        self.checkin_event_id = checkin_event_id
+        self.rng = random.Random(7)
+        self._guests = itertools.count()
+        self._checkins = itertools.count()
+        self._tokens = {}
+
+    def headers(self, email, role):
+        if email not in self._tokens:
+            self._tokens[email] = {"Authorization": f"Bearer {create_access_token({'sub': email, 'role': role})}"}
+        return self._tokens[email]
+
+    def next_guest(self):
+        return self.guest_emails[next(self._guests) % len(self.guest_emails)]
+
+    def next_checkin(self):
+        # Each seeded registration checks in once; past the pool the endpoint answers 400
+        return self.checkin_emails[next(self._checkins) % len(self.checkin_emails)]
+
+
+def _login(work, client):
+    return client.post("/auth/login", data={"username": work.next_guest(), "password": PASSWORD})
+
+
+def _list_events(work, client):
+    return client.get("/events/", params={"limit": 50})
+
+
+def _search(work, client):
+    return client.get("/events/", params={"q": work.rng.choice(SEARCH_TERMS), "limit": 20})
+
+
+def _get_event(work, client):
+    return client.get(f"/events/{work.rng.choice(work.event_ids)}")
+
+
+def _me(work, client):
+    return client.get("/auth/me", headers=work.headers(work.rng.choice(work.organizer_emails), "organizer"))
+
+
+def _register(work, client):
+    event_id = work.rng.choice(work.event_ids)
+    return client.post(f"/events/{event_id}/register", headers=work.headers(work.next_guest(), "attendee"))
+
+
+def _check_in(work, client):
+    headers = work.headers(work.next_checkin(), "attendee")
+    return client.post(f"/events/{work.checkin_event_id}/check-in", headers=headers)
+
+
+ENDPOINTS = {
+    "login": _login,
+    "me": _me,
+    "list_events": _list_events,
+    "search": _search,
+    "get_event": _get_event,
+    "register": _register,
+    "check_in": _check_in,
+}
+
+
+def seed(Session, scale):
+    """Seed one database for a run; returns the Workload that targets it."""
+    shared_hash = hashing.pwd_context.hash(PASSWORD)  # One hash reused to keep seeding fast
+    with Session() as db:
+        organizer_emails = [f"organizer{i}@bench.example.com" for i in range(scale["organizers"])]
+        organizer_ids = [seed_organizer(db, email) for email in organizer_emails]
+        per_organizer = max(1, scale["events"] // len(organizer_ids))
+        event_ids = []
+        for organizer_id in organizer_ids:
+            event_ids.extend(seed_events(db, organizer_id, per_organizer))
+        event_ids = sorted(set(event_ids))
+        guest_emails = seed_attendees(db, scale["attendees"], password=shared_hash)
+        checkin_emails = seed_attendees(db, scale["attendees"], event_id=event_ids[0], prefix="checkin")
+    return Workload(event_ids, organizer_emails, guest_emails, checkin_emails, event_ids[0])
+
+
+async def drive(client, work, endpoint, duration, concurrency):
+    """Hit one endpoint from ``concurrency`` clients for ``duration`` seconds."""
+    request = ENDPOINTS[endpoint]
+    for _ in range(WARMUP_REQUESTS):
+        await request(work, client)
+
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+
+    async def client_loop():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await request(work, client)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, statuses, elapsed)
+
+
+def summarize(latencies, statuses, elapsed):
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+async def run_asgi(work, endpoints, duration, concurrency):
+    results = {}
+    async with app.router.lifespan_context(app):  # Write queue, hashing pool and background tasks, as served
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for endpoint in endpoints:
+                results[endpoint] = await drive(client, work, endpoint, duration, concurrency)
+    return results
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_ready(base_url, server, timeout=60):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+            try:
+                if (await client.get("/events/", params={"limit": 1})).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn did not become ready in time")
+
+
+async def run_uvicorn(work, endpoints, duration, concurrency, database_path, workers):
+    port = _free_port()
+    env = {
+        **os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{database_path}",
+        "RATE_LIMIT_ENABLED": str(ratelimit.RATE_LIMIT_ENABLED).lower(),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        await _wait_until_ready(base_url, server)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            return {
+                endpoint: await drive(client, work, endpoint, duration, concurrency) for endpoint in endpoints
+            }
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def compare(results, baseline, threshold):
+    """Regressions of ``results`` against ``baseline``, as human-readable lines (empty when none)."""
+    regressions = []
+    for transport, endpoints in results["results"].items():
+        for endpoint, current in endpoints.items():
+            previous = baseline.get("results", {}).get(transport, {}).get(endpoint)
+            if previous is None:
+                continue
+            if current["rps"] < previous["rps"] * (1 - threshold):
+                regressions.append(
+                    f"{transport} {endpoint}: {current['rps']:.1f} req/s, baseline {previous['rps']:.1f}"
+                )
+            if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{transport} {endpoint}: p95 {current['p95_ms']:.1f}ms, baseline {previous['p95_ms']:.1f}ms"
+                )
+    return regressions
+
+
+def report(results):
+    for transport, endpoints in results["results"].items():
+        for endpoint, stats in endpoints.items():
+            print(
+                f"{transport:>8} {endpoint:>12}  n={stats['requests']:>7}  rps={stats['rps']:>8.1f}  "
+                f"p50={stats['p50_ms']:>8.1f}ms  p95={stats['p95_ms']:>8.1f}ms  p99={stats['p99_ms']:>8.1f}ms  "
+                f"statuses={stats['statuses']}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--events", type=int, help="override the scale's event count")
+    parser.add_argument("--attendees", type=int, help="override the scale's attendee count")
+    parser.add_argument("--transport", choices=("asgi", "uvicorn", "both"), default="asgi")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn worker processes")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma-separated subset of endpoints")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="compare an existing results file instead of running")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="tolerated relative slowdown")
+    parser.add_argument("--rate-limits", action="store_true", help="keep the per-IP and per-user rate limits on")
+    args = parser.parse_args()
+    ratelimit.RATE_LIMIT_ENABLED = args.rate_limits
+
+    if args.compare:
+        with open(args.compare) as source:
+            results = json.load(source)
+    else:
+        endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+        unknown = [endpoint for endpoint in endpoints if endpoint not in ENDPOINTS]
+        if unknown:
+            parser.error(f"unknown endpoints: {', '.join(unknown)}")
+        scale = {**SCALES[args.scale]}
+        scale.update({key: value for key, value in (("events", args.events), ("attendees", args.attendees)) if value})
+
+        transports = ("asgi", "uvicorn") if args.transport == "both" else (args.transport,)
+        results = {
+            "meta": {
+                "scale": args.scale, **scale, "duration": args.duration, "concurrency": args.concurrency,
+                "workers": args.workers, "rate_limits": args.rate_limits,
+                "python": platform.python_version(), "cpus": os.cpu_count(),
+                "sqlite_profile": os.getenv("SQLITE_PROFILE", "default"),
+                "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            },
+            "results": {},
+        }
+        for transport in transports:
+            principal_cache.clear()
+            with temp_database(bind_app=transport == "asgi") as Session:
+                work = seed(Session, scale)
+                if transport == "asgi":
+                    run = run_asgi(work, endpoints, args.duration, args.concurrency)
+                else:
+                    run = run_uvicorn(work, endpoints, args.duration, args.concurrency, Session.path, args.workers)
+                results["results"][transport] = asyncio.run(run)
+
+        if args.output:
+            with open(args.output, "w") as target:
+                json.dump(results, target, indent=2)
+
+    report(results)
+
+    if args.baseline:
+        with open(args.baseline) as source:
+            regressions = compare(results, json.load(source), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Login p99 under a doors-open login storm while other clients browse events.
+
+    python -m benchmarks.login_storm [--duration 10] [--logins 32] [--browsers 8]
+
+Runs the same load twice against the in-process app: once hashing in the
+shared request threadpool (how /auth/login behaved before the hashing pool)
+and once through the dedicated process pool.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import temp_database, seed_organizer, seed_events, seed_attendees, percentile
+from app import hashing
+from app.main import app
+
+
+async def _worker(client, request, latencies, statuses, deadline):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await request(client)
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def storm(emails, duration, logins, browsers):
+    results = {"login": ([], {}), "browse": ([], {})}
+    deadline = time.perf_counter() + duration
+
+    def login(i):
+        data = {"username": emails[i % len(emails)], "password": "doors-open"}
+        return lambda client: client.post("/auth/login", data=data)
+
+    def browse(client):
+        return client.get("/events/", params={"limit": 50})
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(
+            *(_worker(client, login(i), *results["login"], deadline) for i in range(logins)),
+            *(_worker(client, browse, *results["browse"], deadline) for _ in range(browsers)),
+        )
+    return results
+
+
+def report(mode, results, duration):
+    for endpoint, (latencies, statuses) in results.items():
+        print(
+            f"{mode:>10} {endpoint:>7}  n={len(latencies):>6}  rps={len(latencies) / duration:>8.1f}  "
+            f"p50={percentile(latencies, 50) * 1000:>8.1f}ms  p95={percentile(latencies, 95) * 1000:>8.1f}ms  "
+            f"p99={percentile(latencies, 99) * 1000:>8.1f}ms  statuses={statuses}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--logins", type=int, default=32, help="concurrent login clients")
+    parser.add_argument("--browsers", type=int, default=8, help="concurrent event-browsing clients")
+    parser.add_argument("--workers", type=int, default=hashing.PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+
+    with temp_database(bind_app=True) as Session:
+        with Session() as db:
+            organizer_id = seed_organizer(db)
+            seed_events(db, organizer_id, 500)
+            shared_hash = hashing.pwd_context.hash("doors-open")  # One hash reused to keep seeding fast
+            emails = seed_attendees(db, args.logins, password=shared_hash)
+
+        modes = {"threadpool": (0, 10_000), "pool": (args.workers, hashing.PASSWORD_HASH_QUEUE)}
+        for mode, (workers, queue_limit) in modes.items():
+            hashing.configure(workers=workers, queue_limit=queue_limit)
+            report(mode, asyncio.run(storm(emails, args.duration, args.logins, args.browsers)), args.duration)
+        hashing.pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""CPU time per request of the list endpoints, where response serialization dominates.
+
+    python -m benchmarks.serialization [--attendees 5000] [--repeat 50]
+
+Drives the in-process app through httpx's ASGI transport and reports the
+process CPU time per request for: an uncached and a cached 200-event listing
+page, a single cached event, the full attendee list of a large event, and a
+1000-item batch update.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import percentile, seed_attendees, seed_events, seed_organizer, temp_database
+from app import crud
+from app.main import app
+from app.routes.auth import create_access_token
+
+
+async def cpu_per_request(client, request, repeat, before_each=None):
+    samples = []
+    for _ in range(repeat):
+        if before_each is not None:
+            before_each()
+        started = time.process_time()
+        response = await request(client)
+        samples.append(time.process_time() - started)
+        assert response.status_code == 200, response.text[:200]
+    return samples
+
+
+async def run(event_ids, repeat):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'organizer@bench.example.com', 'role': 'organizer'})}"}
+    updates = [{"event_id": event_id, "max_attendees": 1_000} for event_id in event_ids[:1_000]]
+    scenarios = {
+        "list 200 (uncached)": (lambda c: c.get("/events/", params={"limit": 200}), crud.invalidate_events),
+        "list 200 (cached)": (lambda c: c.get("/events/", params={"limit": 200}), None),
+        "event (cached)": (lambda c: c.get(f"/events/{event_ids[1]}"), None),
+        "attendees": (lambda c: c.get(f"/events/{event_ids[0]}/attendees"), None),
+        "batch update 1000": (lambda c: c.patch("/events/batch", headers=headers, json=updates), None),
+    }
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for name, (request, before_each) in scenarios.items():
+            await request(client)  # Warm up caches and code paths
+            results[name] = await cpu_per_request(client, request, repeat, before_each)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attendees", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with temp_database(bind_app=True) as Session:
+        with Session() as db:
+            organizer_id = seed_organizer(db)
+            event_ids = seed_events(db, organizer_id, 2_000)
+            seed_attendees(db, args.attendees, event_id=event_ids[0])
+        results = asyncio.run(run(event_ids, args.repeat))
+
+    for name, samples in results.items():
+        print(
+            f"{name:>20}  cpu p50={percentile(samples, 50) * 1000:>8.2f}ms  "
+            f"p95={percentile(samples, 95) * 1000:>8.2f}ms  mean={sum(samples) / len(samples) * 1000:>8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
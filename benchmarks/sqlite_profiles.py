@@ -0,0 +1,85 @@
+"""Mixed read/write throughput for the default and production SQLite profiles.
+
+    python -m benchmarks.sqlite_profiles [--duration 10] [--writers 16] [--readers 16]
+
+Writers register attendees for events and check them in; readers page through
+the event listing. The production profile runs with WAL, tuned pragmas and the
+single-writer group-commit queue.
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+
+import httpx
+
+from benchmarks.common import temp_database, seed_organizer, seed_events, seed_attendees, percentile
+from app import database
+from app.main import app
+from app.routes.auth import create_access_token, principal_cache
+
+
+async def run_profile(profile, emails, event_ids, duration, writers, readers):
+    stats = {"write": ([], {}), "read": ([], {})}
+    next_attendee = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    def record(kind, started, response):
+        latencies, statuses = stats[kind]
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def writer(client):
+        while time.perf_counter() < deadline:
+            email = emails[next(next_attendee) % len(emails)]
+            event_id = random.choice(event_ids)
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': email, 'role': 'attendee'})}"}
+            for path in (f"/events/{event_id}/register", f"/events/{event_id}/check-in"):
+                started = time.perf_counter()
+                record("write", started, await client.post(path, headers=headers))
+
+    async def reader(client):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            record("read", started, await client.get("/events/", params={"limit": 50}))
+
+    await database.start_write_queue(enabled=profile == "production")
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            await asyncio.gather(*(writer(client) for _ in range(writers)), *(reader(client) for _ in range(readers)))
+    finally:
+        await database.stop_write_queue()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--attendees", type=int, default=20_000)
+    args = parser.parse_args()
+
+    for profile in ("default", "production"):
+        principal_cache.clear()
+        with temp_database(bind_app=True, profile=profile) as Session:
+            with Session() as db:
+                organizer_id = seed_organizer(db)
+                event_ids = seed_events(db, organizer_id, 200)
+                emails = seed_attendees(db, args.attendees)
+            stats = asyncio.run(run_profile(profile, emails, event_ids, args.duration, args.writers, args.readers))
+
+        for kind, (latencies, statuses) in stats.items():
+            if not latencies:
+                continue
+            print(
+                f"{profile:>10} {kind:>5}  ops/s={len(latencies) / args.duration:>8.1f}  "
+                f"p50={percentile(latencies, 50) * 1000:>7.1f}ms  p99={percentile(latencies, 99) * 1000:>8.1f}ms  "
+                f"statuses={statuses}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Cost of looking up a waitlist position, by how deep in the queue it is.
+
+    python -m benchmarks.waitlist_position [--entries 200000] [--repeat 200]
+
+Seeds one full event with --entries waitlisted attendees (and the bucket counts
+app.crud keeps next to them), then times ``crud.waitlist_position`` for
+attendees at several depths, against counting every entry ahead directly.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import func, insert, select
+
+from benchmarks.common import SEED_CHUNK_SIZE, percentile, seed_events, seed_organizer, temp_database
+from app import crud
+from app.models import WAITLIST_BUCKET_SIZE, Attendee, WaitlistBucket, WaitlistEntry
+
+
+def seed_waitlist(db, event_id, count):
+    for offset in range(0, count, SEED_CHUNK_SIZE):
+        stop = min(offset + SEED_CHUNK_SIZE, count)
+        db.execute(insert(Attendee), [
+            {"first_name": "Queued", "last_name": str(i), "email": f"queued{i}@bench.example.com", "password": "x"}
+            for i in range(offset, stop)
+        ])
+        db.execute(insert(WaitlistEntry), [
+            {"event_id": event_id, "attendee_id": i + 1, "sequence": i + 1} for i in range(offset, stop)
+        ])
+    db.execute(insert(WaitlistBucket).from_select(
+        ["event_id", "bucket", "entries"],
+        select(WaitlistEntry.event_id, WaitlistEntry.sequence // WAITLIST_BUCKET_SIZE, func.count())
+        .group_by(WaitlistEntry.event_id, WaitlistEntry.sequence // WAITLIST_BUCKET_SIZE),
+    ))
+    db.commit()
+
+
+async def count_ahead(db, event_id, attendee_id):
+    """The plain way: count the entries with a lower sequence."""
+    mine = select(WaitlistEntry.sequence).where(
+        WaitlistEntry.event_id == event_id, WaitlistEntry.attendee_id == attendee_id
+    ).scalar_subquery()
+    return await db.scalar(
+        select(func.count() + 1).where(WaitlistEntry.event_id == event_id, WaitlistEntry.sequence < mine)
+    )
+
+
+async def time_lookups(Session, event_id, depths, repeat):
+    results = {}
+    async with Session.async_session() as db:
+        for name, lookup in (("buckets", crud.waitlist_position), ("count ahead", count_ahead)):
+            for depth in depths:
+                latencies = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    position = await lookup(db, event_id, depth)
+                    latencies.append(time.perf_counter() - started)
+                assert position == depth
+                results[name, depth] = latencies
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    depths = sorted({depth for depth in (10, 1_000, args.entries // 2, args.entries) if 0 < depth <= args.entries})
+    with temp_database() as Session:
+        with Session() as db:
+            (event_id,) = seed_events(db, seed_organizer(db), 1)
+            seed_waitlist(db, event_id, args.entries)
+
+        for (name, depth), latencies in asyncio.run(time_lookups(Session, event_id, depths, args.repeat)).items():
+            print(
+                f"{name:>12}  position {depth:>9,}  "
+                f"p50={percentile(latencies, 50) * 1000:8.3f}ms  p95={percentile(latencies, 95) * 1000:8.3f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,21 @@ import sqlite3
 
 DB_FILE = "./events.db"
 
+TABLES = (
+    "organizer_daily_stats",
+    "organizer_stats",
+    "event_stats",
+    "event_waitlist_buckets",
+    "event_waitlist",
+    "event_registrations",
+    "bulk_check_in_jobs",
+    "idempotency_keys",
+    "token_versions",
+    "attendees",
+    "events",
+    "users",
+)
+
 def reset_database():
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
@@ -9,10 +24,10 @@ def reset_database():
     try:
         print("Cleaning database...")
 
-        # Option 1: Delete all data but keep tables
-        cursor.execute("DELETE FROM attendees;")
-        cursor.execute("DELETE FROM events;")
-        cursor.execute("DELETE FROM users;")
+        # Option 1: Delete all data but keep tables (children before the rows they reference,
+        # so no registration or waitlist place outlives its event once ids are reused)
+        for table in TABLES:
+            cursor.execute(f"DELETE FROM {table};")
 
         # Option 2: Drop all tables
         # cursor.execute("DROP TABLE IF EXISTS attendees;")
@@ -0,0 +1,11 @@
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.rollups import rebuild_statements
+
+# Recompute the analytics rollups from events and registrations, in one transaction
+with Session(engine) as session, session.begin():
+    for statement in rebuild_statements():
+        session.execute(statement)
+
+print("Event statistics rebuilt successfully!")